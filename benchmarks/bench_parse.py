@@ -0,0 +1,128 @@
+# Parse time and peak memory of the "Calculation" sheet cleaning at 10k/100k/1M rows.
+#
+#   python benchmarks/bench_parse.py [--rows 10000 100000 1000000] [--repeat 3]
+#
+# "legacy" is the chained astype/str.replace cleaning load_data used to do,
+# "schema" is sheet_schema.parse_kpi_rows on a cold cache, "schema (unchanged)"
+# is a second refresh with identical sheet text (columns reused, not re-parsed).
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_sources import KPI_HEADER, format_count  # noqa: E402
+from sheet_schema import KPI_SCHEMA, SheetSchema, parse_kpi_rows  # noqa: E402
+
+ERROR_REPLACEMENTS = {
+    '#DIV/0!': '0.0',
+    '#N/A': '0.0',
+    '#NAME?': '0.0',
+    '#REF!': '0.0',
+    '#VALUE!': '0.0',
+    '#ERROR!': '0.0',
+    '': '0.0',
+    '-': '0.0',
+}
+
+
+def legacy_parse(data):
+    df = pd.DataFrame(data[1:], columns=data[0])
+    df.rename(columns={
+        'Planning': 'Planned Sleeves',
+        'Building': 'Sleeves Build',
+        'Pending': 'Not Produced Sleeves',
+        'Percentage': 'Production rate %'
+    }, inplace=True)
+    for col in ['Planned Sleeves', 'Sleeves Build', 'Not Produced Sleeves']:
+        df[col] = (
+            df[col].astype(str).str.replace(',', '').replace(ERROR_REPLACEMENTS).astype(float).astype(int)
+        )
+    df['Production rate %'] = (
+        df['Production rate %'].astype(str).str.replace('%', '').replace(ERROR_REPLACEMENTS).astype(float) / 100
+    )
+    df['Production rate Display'] = df['Production rate %'].round(3)
+    df['Area_Line_Key'] = df['Area'] + ' - ' + df['Line']
+    return df
+
+
+def make_rows(count, seed=0):
+    rng = random.Random(seed)
+    rows = [KPI_HEADER]
+    for i in range(count):
+        planned = rng.randrange(50, 5000)
+        built = rng.randrange(0, planned)
+        percentage = f"{built / planned:.1%}" if rng.random() > 0.01 else rng.choice(['#DIV/0!', '#REF!', ''])
+        rows.append([
+            f"Line-{i // 2}", 'Building' if i % 2 == 0 else 'Curing',
+            format_count(planned), format_count(built), format_count(planned - built), percentage,
+        ])
+    return rows
+
+
+def schema_cold(data):
+    return parse_kpi_rows(data, SheetSchema(KPI_SCHEMA.columns.values()))
+
+
+WARM_SCHEMA = SheetSchema(KPI_SCHEMA.columns.values())
+
+
+def schema_unchanged(data):
+    return parse_kpi_rows(data, WARM_SCHEMA)
+
+
+PARSERS = {"legacy": legacy_parse, "schema": schema_cold, "schema (unchanged)": schema_unchanged}
+
+
+# Runs in its own process so the peak-RSS high-water mark belongs to this case only.
+# RSS (not tracemalloc) because Arrow buffers are allocated outside the Python heap.
+def measure_one(label, count, repeat):
+    data = make_rows(count)
+    func = PARSERS[label]
+    if label == "schema (unchanged)":
+        func(data)  # warm the column cache
+
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(data)
+        best = min(best, time.perf_counter() - started)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline
+    return {"seconds": best, "peak_kb": peak}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Calculation sheet parsing.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--single", nargs=2, metavar=("PARSER", "ROWS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        print(json.dumps(measure_one(args.single[0], int(args.single[1]), args.repeat)))
+        return
+
+    data = make_rows(1000)
+    pd.testing.assert_frame_equal(legacy_parse(data), schema_cold(data), check_dtype=False)
+
+    print(f"{'rows':>10}  {'parser':<20}{'time (ms)':>12}{'peak RSS +MB':>14}")
+    for count in args.rows:
+        for label in PARSERS:
+            output = subprocess.run(
+                [sys.executable, __file__, "--single", label, str(count), "--repeat", str(args.repeat)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{count:>10,}  {label:<20}{result['seconds'] * 1000:>12.1f}{result['peak_kb'] / 1024:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
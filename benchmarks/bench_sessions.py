@@ -0,0 +1,306 @@
+# Load test: N dashboard sessions (TVs) rerunning live_app.py against the local Sheets stand-in.
+#
+#   python benchmarks/bench_sessions.py [--sessions 30] [--interval 20] [--duration 120]
+#                                       [--areas 30] [--scans 20000] [--scan-rate 2] [--latency 0.3]
+#                                       [--output report.json] [--compare baseline.json]
+#
+# Every session is an AppTest (streamlit.testing.v1) of live_app.py opened on
+# its own area (?area=) and rerun every --interval seconds, the sessions
+# staggered over the interval like TVs on st_autorefresh. They all run in this
+# process, so they share the cache_resource singletons (refresher, scan tail,
+# fetch scheduler) the way the sessions of one Streamlit server do. The fake
+# backend is LocalSheetsSource with a synthetic plant, appending --scan-rate
+# scans per second and answering each read after --latency seconds.
+#
+# AppTest runs one script at a time, so the reruns are driven from one thread
+# in order of their due time. A rerun that starts late because the previous
+# one was still running counts the wait in its latency, as a busy server's
+# queue would.
+#
+# What this does not model: the sessions never run side by side, and every
+# rerun is a full script run. A Streamlit server runs sessions on their own
+# threads, and with LIVE_REGIONS a TV mostly reruns its live-region fragments
+# (st.fragment run_every), which AppTest cannot tick on their own. The
+# render_live_* stages in the report are that share of each rerun; the rerun
+# numbers are an upper bound for a fragment tick of the same screen.
+#
+# Report (JSON, with --output; a summary is always printed):
+#   rerun_seconds            p50/p90/p95/p99/max from due time to done (queueing included)
+#   service_seconds          the same for the rerun alone
+#   stages                   the app's own stage timings (metrics.REGISTRY) after the warm-up
+#   cpu_percent              process CPU time / wall time (refresher threads included)
+#   rss_mb                   resident memory at the end of the run
+#   memory_per_session_mb    resident memory growth per session opened
+#   sheets_calls_per_minute  read requests the app sent to the backend
+#   errors, first_error      reruns that raised, and the first message
+#
+# --compare prints each headline number next to the one in an earlier report
+# and exits with status 1 when one is worse by more than --tolerance. A run in
+# which any rerun raised exits with status 2 (after writing the report).
+# The script changes into the repository root first, as the app opens its
+# images by relative path.
+import argparse
+import gc
+import heapq
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "live_app.py")
+sys.path.insert(0, ROOT)
+
+# Assumptions behind the numbers, copied into the report
+MODEL = {
+    "sessions": "one process, reruns run one at a time in due-time order",
+    "reruns": "full script runs (production ticks only the live-region fragments; see stages render_live_*)",
+}
+
+# Headline numbers checked by --compare (all lower-is-better)
+HEADLINE = (
+    ("rerun_seconds", "p50"),
+    ("rerun_seconds", "p95"),
+    ("service_seconds", "p95"),
+    ("cpu_percent", None),
+    ("memory_per_session_mb", None),
+    ("sheets_calls_per_minute", None),
+)
+
+
+def rss_bytes():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 # Peak, where /proc is missing
+
+
+def percentiles(samples):
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def at(q):
+        return round(ordered[min(int(q * len(ordered)), len(ordered) - 1)], 4)
+
+    return {"p50": at(0.5), "p90": at(0.9), "p95": at(0.95), "p99": at(0.99), "max": round(ordered[-1], 4)}
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, check=True, capture_output=True, text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Point the app at a synthetic plant in `workdir` (and keep its caches there)
+def prepare_environment(args, workdir):
+    from data_sources import LocalSheetsSource, generate_synthetic_plant
+    from sheet_schema import parse_kpi_rows
+
+    db_path = os.path.join(workdir, "sheets.db")
+    source = LocalSheetsSource(db_path)
+    generate_synthetic_plant(source, areas=args.areas, scans=args.scans, scan_rate=max(args.scan_rate, 1.0), seed=args.seed)
+    areas = parse_kpi_rows(source.batch_get(["'Calculation'"])[0])["Area"].unique().tolist()
+    source.conn.close()
+
+    os.environ.update({
+        "DATA_SOURCE": "local",
+        "LOCAL_SHEETS_DB": db_path,
+        "LOCAL_SCAN_RATE": str(args.scan_rate),
+        "LOCAL_SHEETS_LATENCY": str(args.latency),
+        "PLANTS_CONFIG": os.path.join(workdir, "plants.json"), # None: the one synthetic plant
+        "SNAPSHOT_CACHE_DIR": os.path.join(workdir, "snapshot_cache"),
+        "HISTORY_DB": os.path.join(workdir, "history.db"),
+        "PROFILE_DIR": os.path.join(workdir, "profiles"),
+        "SHARED_SNAPSHOTS": "0",
+    })
+    for port in ("SCAN_INGEST_PORT", "SNAPSHOT_API_PORT", "METRICS_PORT", "PROFILE_RERUNS"):
+        os.environ.pop(port, None)
+    return areas
+
+
+def first_error(session):
+    return session.exception[0].value if session.exception else None
+
+
+def run(args):
+    os.chdir(ROOT) # The app opens its logo and photos by relative path, like `streamlit run` from here
+    with tempfile.TemporaryDirectory(prefix="bench-sessions-") as workdir:
+        areas = prepare_environment(args, workdir)
+
+        from streamlit.testing.v1 import AppTest
+        from metrics import REGISTRY
+
+        logging.getLogger("streamlit.deprecation_util").disabled = True # Notices on every rerun
+
+        def open_session(number):
+            session = AppTest.from_file(APP, default_timeout=args.timeout)
+            session.query_params["area"] = areas[number % len(areas)]
+            session.run()
+            if session.exception:
+                raise RuntimeError(f"Session {number} failed on its first run: {first_error(session)}")
+            return session
+
+        # Warm-up: the first session pays for the imports and the first fetch
+        sessions = [open_session(0)]
+        gc.collect()
+        rss_one = rss_bytes()
+        for number in range(1, args.sessions):
+            sessions.append(open_session(number))
+        gc.collect()
+        rss_all = rss_bytes()
+        REGISTRY.reset_stages()
+
+        requests_before = REGISTRY.counter("sheets_requests_total")
+        cpu_before = time.process_time()
+        started = time.perf_counter()
+        end = started + args.duration
+
+        queue = [(started + number * args.interval / args.sessions, number) for number in range(args.sessions)]
+        heapq.heapify(queue)
+        latencies, service_times, errors, error_message = [], [], 0, None
+        while queue and queue[0][0] < end:
+            due, number = heapq.heappop(queue)
+            now = time.perf_counter()
+            if due > now:
+                time.sleep(due - now)
+
+            run_started = time.perf_counter()
+            sessions[number].run()
+            finished = time.perf_counter()
+            service_times.append(finished - run_started)
+            latencies.append(finished - due)
+            if sessions[number].exception:
+                errors += 1
+                error_message = error_message or first_error(sessions[number])
+            heapq.heappush(queue, (due + args.interval, number))
+
+        wall = max(time.perf_counter(), end) - started
+        cpu = time.process_time() - cpu_before
+        requests = REGISTRY.counter("sheets_requests_total") - requests_before
+
+        stages = {
+            stage: {key: round(value, 4) if isinstance(value, float) else value for key, value in summary.items()}
+            for stage, summary in REGISTRY.stage_summary().items()
+        }
+        return {
+            "reruns": len(latencies),
+            "errors": errors,
+            "first_error": error_message,
+            "rerun_seconds": percentiles(latencies),
+            "service_seconds": percentiles(service_times),
+            "stages": stages,
+            "cpu_percent": round(100 * cpu / wall, 1),
+            "rss_mb": round(rss_bytes() / 2**20, 1),
+            "memory_per_session_mb": round((rss_all - rss_one) / max(args.sessions - 1, 1) / 2**20, 2),
+            "sheets_calls_per_minute": round(requests / (wall / 60), 1),
+        }
+
+
+def headline_value(results, key, field):
+    value = results.get(key)
+    return value.get(field) if field is not None and isinstance(value, dict) else value
+
+
+# Print current vs. baseline; returns the headline numbers worse than `tolerance` (a fraction)
+def compare(report, baseline, tolerance):
+    if report["config"] != baseline.get("config"):
+        print("Note: the baseline was run with a different configuration")
+
+    regressions = []
+    print(f"{'metric':<28}{'baseline':>12}{'now':>12}{'change':>10}")
+    for key, field in HEADLINE:
+        name = f"{key}.{field}" if field else key
+        old = headline_value(baseline["results"], key, field)
+        new = headline_value(report["results"], key, field)
+        if old is None or new is None:
+            continue
+        change = (new - old) / old if old else 0.0
+        flag = " !" if change > tolerance else ""
+        print(f"{name:<28}{old:>12}{new:>12}{change:>+10.0%}{flag}")
+        if change > tolerance:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test live_app.py with many simulated dashboard sessions.")
+    parser.add_argument("--sessions", type=int, default=30, help="Concurrent dashboard sessions (TVs)")
+    parser.add_argument("--interval", type=float, default=20, help="Seconds between reruns of a session")
+    parser.add_argument("--duration", type=float, default=120, help="Seconds measured after the warm-up")
+    parser.add_argument("--areas", type=int, default=30, help="Areas in the synthetic plant (2 lines each)")
+    parser.add_argument("--scans", type=int, default=20_000, help="Rows in the synthetic Recent Scanned sheet")
+    parser.add_argument("--scan-rate", type=float, default=2.0, help="New scans per second while running")
+    parser.add_argument("--latency", type=float, default=0.3, help="Simulated Sheets round trip (seconds)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=60, help="Max seconds per rerun")
+    parser.add_argument("--output", help="Write the JSON report here")
+    parser.add_argument("--compare", help="Earlier JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown before --compare fails (0.2 = 20 %%)")
+    args = parser.parse_args()
+
+    config = {name: getattr(args, name) for name in
+              ("sessions", "interval", "duration", "areas", "scans", "scan_rate", "latency", "seed")}
+    results = run(args)
+
+    import pandas as pd
+    import streamlit as st
+
+    report = {
+        "benchmark": "sessions",
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": git_commit(),
+        "environment": {
+            "python": platform.python_version(),
+            "streamlit": st.__version__,
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "config": config,
+        "model": MODEL,
+        "results": results,
+    }
+
+    print(f"{args.sessions} sessions every {args.interval:g} s for {args.duration:g} s: "
+          f"{results['reruns']} reruns, {results['errors']} with errors")
+    print(f"  rerun latency (s)   {results['rerun_seconds']}")
+    print(f"  service time (s)    {results['service_seconds']}")
+    print(f"  CPU {results['cpu_percent']} % · RSS {results['rss_mb']} MB · "
+          f"{results['memory_per_session_mb']} MB per session · {results['sheets_calls_per_minute']} Sheets calls/min")
+    for stage in ("render_page", "render_live_kpi_region", "render_live_scans_region"):
+        if stage in results["stages"]:
+            print(f"  {stage + ' (s)':<30}{results['stages'][stage]}")
+    print("  Sessions ran one at a time with full reruns; production mostly ticks the live-region fragments.")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if results["errors"]:
+        print(f"{results['errors']} rerun(s) raised, first: {results['first_error']}", file=sys.stderr)
+        sys.exit(2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print(f"Worse than the baseline by more than {args.tolerance:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+import math
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+# Formats seen in the "Timestamp" column (the app script's and Google Forms')
+TIMESTAMP_FORMATS = ('%Y-%m-%d %H:%M:%S', '%m/%d/%Y %H:%M:%S', '%d/%m/%Y %H:%M:%S', '%Y-%m-%dT%H:%M:%S')
+
+
+# "H:MM:SS", "MM:SS" or plain seconds -> seconds (None when it is not a
+# duration, including "nan", "inf" and zero or negative times)
+def parse_duration(text):
+    text = str(text).strip()
+    if not text:
+        return None
+    try:
+        parts = [float(part) for part in text.split(':')]
+    except ValueError:
+        return None
+    if len(parts) > 3 or not all(math.isfinite(part) and part >= 0 for part in parts):
+        return None
+
+    seconds = 0.0
+    for part in parts:
+        seconds = seconds * 60 + part
+    return seconds if seconds > 0 else None
+
+
+# Scan timestamp -> epoch seconds (None when it cannot be read)
+def parse_timestamp(text):
+    text = str(text).strip()
+    for fmt in TIMESTAMP_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).timestamp()
+        except ValueError:
+            continue
+    return None
+
+
+# Seconds -> "H:MM:SS", the format of the sheet's "Time Taken"
+def format_seconds(seconds):
+    if seconds is None or math.isnan(seconds):
+        return '-'
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}"
+
+
+# Streaming quantile sketch with relative error `accuracy`.
+#
+# Values are counted in logarithmic bins (bin i holds gamma^(i-1)..gamma^i),
+# so memory depends on the spread of the values, not on how many there are:
+# cycle times between 1 s and 10 h need ~240 bins at 2 %. Sketches of the
+# same accuracy merge by adding their bins, which is what makes the rolling
+# window below cheap.
+class QuantileSketch:
+    def __init__(self, accuracy=0.02):
+        self.accuracy = accuracy
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins = {}
+        self.zeros = 0
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        if value <= 0:
+            self.zeros += 1
+            return
+        key = math.ceil(math.log(value) / self._log_gamma)
+        self.bins[key] = self.bins.get(key, 0) + 1
+
+    def merge(self, other):
+        self.count += other.count
+        self.total += other.total
+        self.zeros += other.zeros
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+
+    def quantile(self, q):
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if rank < seen:
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.bins) / (self.gamma + 1)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+
+# Rolling cycle-time statistics per (Line Name, Process).
+#
+# Each scan is added once, as it arrives, to the sketch of its time bucket
+# (bucket_seconds wide). A key keeps only the buckets of the last `window`
+# seconds, so adding scans costs O(new scans) and a summary merges at most
+# window / bucket_seconds small sketches, however long the shift has been.
+#
+# A row without a readable Timestamp is taken to have just been scanned, which
+# only holds for rows arriving as they are scanned: the rows of the first read
+# after reset() (the whole sheet) are old, so undated ones are skipped there.
+class CycleTimeStats:
+    def __init__(self, window=3600, bucket_seconds=60, accuracy=0.02):
+        self.window = window
+        self.bucket_seconds = bucket_seconds
+        self.accuracy = accuracy
+
+        self._lock = threading.Lock()
+        self._buckets = {} # key -> deque of [bucket start, QuantileSketch], oldest first
+        self.scans_seen = 0
+        self.unparsed = 0
+        self.undated = 0 # Rows of a full read skipped for want of a Timestamp
+        self._full_read = False # The next add_rows() is the whole sheet
+
+    def reset(self):
+        with self._lock:
+            self._buckets = {}
+            self._full_read = True
+
+    # Add "Recent Scanned" rows (padded to `header`), new rows only
+    def add_rows(self, header, rows, now=None):
+        now = time.time() if now is None else now
+        positions = {name: header.index(name) if name in header else None
+                     for name in ('Timestamp', 'line', 'Process', 'Duration')}
+        if positions['Duration'] is None:
+            return
+
+        with self._lock:
+            full_read, self._full_read = self._full_read, False
+            for row in rows:
+                if not any(row):
+                    continue
+                seconds = parse_duration(row[positions['Duration']])
+                if seconds is None:
+                    self.unparsed += 1
+                    continue
+                scanned_at = parse_timestamp(row[positions['Timestamp']]) if positions['Timestamp'] is not None else None
+                key = (
+                    row[positions['line']] if positions['line'] is not None else '',
+                    row[positions['Process']] if positions['Process'] is not None else '',
+                )
+                if scanned_at is None:
+                    if full_read:
+                        self.undated += 1
+                        continue
+                    scanned_at = now
+                self.scans_seen += 1
+                if scanned_at > now - self.window:
+                    self._add_locked(key, scanned_at, seconds)
+
+            for key in list(self._buckets):
+                self._expire_locked(key, now)
+
+    def _add_locked(self, key, scanned_at, seconds):
+        start = scanned_at - scanned_at % self.bucket_seconds
+        buckets = self._buckets.setdefault(key, deque())
+        if buckets and buckets[-1][0] == start:
+            buckets[-1][1].add(seconds)
+            return
+
+        if not buckets or buckets[-1][0] < start:
+            buckets.append([start, QuantileSketch(self.accuracy)])
+            buckets[-1][1].add(seconds)
+            return
+
+        # Late scan: find (or make) its bucket further back
+        for position in range(len(buckets) - 1, -1, -1):
+            if buckets[position][0] == start:
+                buckets[position][1].add(seconds)
+                return
+            if buckets[position][0] < start:
+                break
+        else:
+            position = -1
+        sketch = QuantileSketch(self.accuracy)
+        sketch.add(seconds)
+        buckets.insert(position + 1, [start, sketch])
+
+    def _expire_locked(self, key, now):
+        buckets = self._buckets[key]
+        while buckets and buckets[0][0] + self.bucket_seconds <= now - self.window:
+            buckets.popleft()
+        if not buckets:
+            del self._buckets[key]
+
+    # Count, mean, p50, p95 (seconds) and sleeves per hour over the window
+    def summary(self, key, now=None):
+        now = time.time() if now is None else now
+        merged = QuantileSketch(self.accuracy)
+        first_start = None
+        with self._lock:
+            for start, sketch in self._buckets.get(key, ()):
+                if start + self.bucket_seconds <= now - self.window:
+                    continue
+                merged.merge(sketch)
+                if first_start is None:
+                    first_start = start
+
+        if merged.count == 0:
+            return {'count': 0, 'mean': None, 'p50': None, 'p95': None, 'per_hour': 0.0}
+
+        # Rate over the part of the window that has data, so a fresh shift is not under-reported
+        covered = min(self.window, max(now - first_start, self.bucket_seconds))
+        return {
+            'count': merged.count,
+            'mean': merged.mean,
+            'p50': merged.quantile(0.5),
+            'p95': merged.quantile(0.95),
+            'per_hour': merged.count * 3600 / covered,
+        }
+
@@ -0,0 +1,335 @@
+import argparse
+import json
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+
+
+# Quote a worksheet title for use in an A1 range ("Recent Scanned" -> "'Recent Scanned'")
+def a1_sheet(sheet_name):
+    return "'" + sheet_name.replace("'", "''") + "'"
+
+
+# The values API drops trailing empty cells/rows; get_all_values() did not.
+# Pad every row to the header width so pd.DataFrame(rows[1:], columns=rows[0]) keeps working.
+def pad_rows(values):
+    if not values:
+        return []
+    width = max(len(row) for row in values)
+    return [row + [''] * (width - len(row)) if len(row) < width else row for row in values]
+
+
+# 'Recent Scanned'!A12:E -> ("Recent Scanned", 12, 1, 5, None); 'Calculation' -> whole sheet
+A1_RANGE = re.compile(
+    r"^(?:'(?P<quoted>(?:[^']|'')+)'|(?P<plain>[^!]+))"
+    r"(?:!(?P<c1>[A-Z]+)(?P<r1>\d*)(?::(?P<c2>[A-Z]+)(?P<r2>\d*))?)?$"
+)
+
+
+def column_number(letters):
+    number = 0
+    for letter in letters:
+        number = number * 26 + ord(letter) - ord('A') + 1
+    return number
+
+
+def parse_a1_range(a1_range):
+    match = A1_RANGE.match(a1_range)
+    if match is None:
+        raise ValueError(f"Unable to parse range: {a1_range}")
+
+    sheet_name = match.group('quoted').replace("''", "'") if match.group('quoted') else match.group('plain')
+    first_col = column_number(match.group('c1')) if match.group('c1') else 1
+    last_col = column_number(match.group('c2') or match.group('c1')) if match.group('c1') else None
+    first_row = int(match.group('r1')) if match.group('r1') else 1
+    last_row = int(match.group('r2')) if match.group('r2') else None
+    return sheet_name, first_row, last_row, first_col, last_col
+
+
+# Backend interface behind the dashboard loaders.
+#
+# A source serves worksheets by A1 range, the same way the Sheets values API
+# does, so everything above it (tail fetching, parsing, the refresher) runs
+# unchanged against Google Sheets or the local stand-in.
+class DataSource:
+    def __init__(self):
+        self.last_stats = {"round_trips": 0, "bytes": 0, "seconds": 0.0}
+        self.total_round_trips = 0
+        self.total_bytes = 0
+        self.total_appends = 0 # Write requests (kept apart from the read quota)
+
+    # Fetch several A1 ranges in one request; returns one padded grid per range
+    def batch_get(self, ranges):
+        raise NotImplementedError
+
+    # Append rows below the last row of a sheet in one request
+    def append_rows(self, sheet_name, rows):
+        raise NotImplementedError
+
+    def _record_stats(self, stats):
+        self.last_stats = stats
+        self.total_round_trips += stats["round_trips"]
+        self.total_bytes += stats["bytes"]
+
+
+# Google Sheets fetch layer.
+#
+# Keeps the opened Spreadsheet handle for the lifetime of the client, so a
+# refresh is a single values.batchGet call for every range it needs instead of
+# open_by_key + worksheet + get_all_values per sheet. Round trips and payload bytes of the last fetch are kept in last_stats.
+class GoogleSheetsSource(DataSource):
+    def __init__(self, gc, spreadsheet_id):
+        super().__init__()
+        self.gc = gc
+        self.spreadsheet_id = spreadsheet_id
+        self.spreadsheet = None
+
+    def _open(self, stats):
+        self.spreadsheet = self.gc.open_by_key(self.spreadsheet_id)
+        stats["round_trips"] += 1
+
+    def batch_get(self, ranges):
+        stats = {"round_trips": 0, "bytes": 0, "seconds": 0.0}
+        started = time.perf_counter()
+        try:
+            if self.spreadsheet is None:
+                self._open(stats)
+
+            response = self.spreadsheet.values_batch_get(ranges)
+            stats["round_trips"] += 1
+            stats["bytes"] = len(json.dumps(response, separators=(',', ':')).encode('utf-8'))
+        except Exception:
+            # A renamed/deleted sheet or an expired handle: reopen on the next refresh
+            self.spreadsheet = None
+            raise
+        finally:
+            stats["seconds"] = time.perf_counter() - started
+            self._record_stats(stats)
+
+        value_ranges = response.get("valueRanges", [])
+        return [pad_rows(value_range.get("values", [])) for value_range in value_ranges]
+
+    # RAW keeps the text exactly as sent, so the rows read back compare equal
+    def append_rows(self, sheet_name, rows):
+        stats = {"round_trips": 0}
+        try:
+            if self.spreadsheet is None:
+                self._open(stats)
+            self.spreadsheet.values_append(
+                a1_sheet(sheet_name),
+                {"valueInputOption": "RAW", "insertDataOption": "INSERT_ROWS"},
+                {"values": [list(row) for row in rows]},
+            )
+        except Exception:
+            self.spreadsheet = None
+            raise
+        finally:
+            self.total_round_trips += stats["round_trips"]
+        self.total_appends += 1
+
+
+# Offline stand-in for the spreadsheet: every worksheet row is stored as a JSON
+# array in SQLite, keyed by (sheet, row number), and served through the same
+# A1-range batch_get as GoogleSheetsSource. Nothing here needs credentials.
+#
+# With scan_rate > 0 the source behaves like a live plant: before each read it
+# appends the scans that "happened" since the previous read and bumps the
+# Building counters on the Calculation sheet accordingly.
+class LocalSheetsSource(DataSource):
+    def __init__(self, db_path, scan_rate=0.0, kpi_sheet="Calculation", scans_sheet="Recent Scanned", seed=None, latency=0.0):
+        super().__init__()
+        self.db_path = db_path
+        self.scan_rate = scan_rate
+        self.latency = latency # Simulated round-trip time per read request (seconds), like the Sheets API's
+        self.kpi_sheet = kpi_sheet
+        self.scans_sheet = scans_sheet
+
+        self._lock = threading.RLock()
+        self._random = random.Random(seed)
+        self._last_tick = time.time()
+        self._pending_scans = 0.0
+
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS sheet_rows ("
+            " sheet TEXT NOT NULL, row_number INTEGER NOT NULL, cells TEXT NOT NULL,"
+            " PRIMARY KEY (sheet, row_number))"
+        )
+        self.conn.commit()
+
+    def batch_get(self, ranges):
+        stats = {"round_trips": 1, "bytes": 0, "seconds": 0.0}
+        started = time.perf_counter()
+        try:
+            if self.latency > 0:
+                time.sleep(self.latency)
+            with self._lock:
+                if self.scan_rate > 0:
+                    self._simulate_scans()
+                grids = [self._read_range(a1_range) for a1_range in ranges]
+            stats["bytes"] = len(json.dumps(grids, separators=(',', ':')).encode('utf-8'))
+            return grids
+        finally:
+            stats["seconds"] = time.perf_counter() - started
+            self._record_stats(stats)
+
+    def _read_range(self, a1_range):
+        sheet_name, first_row, last_row, first_col, last_col = parse_a1_range(a1_range)
+        query = "SELECT cells FROM sheet_rows WHERE sheet = ? AND row_number >= ?"
+        params = [sheet_name, first_row]
+        if last_row is not None:
+            query += " AND row_number <= ?"
+            params.append(last_row)
+        query += " ORDER BY row_number"
+
+        rows = []
+        for (cells,) in self.conn.execute(query, params):
+            row = json.loads(cells)
+            rows.append(row[first_col - 1:last_col] if last_col is not None else row[first_col - 1:])
+        return pad_rows(rows)
+
+    # --- Writing (used by the generator, CSV import and the live simulation) ---
+
+    def row_count(self, sheet_name):
+        (count,) = self.conn.execute(
+            "SELECT COALESCE(MAX(row_number), 0) FROM sheet_rows WHERE sheet = ?", (sheet_name,)
+        ).fetchone()
+        return count
+
+    def write_sheet(self, sheet_name, rows):
+        self.conn.execute("DELETE FROM sheet_rows WHERE sheet = ?", (sheet_name,))
+        self.append_rows(sheet_name, rows)
+
+    def append_rows(self, sheet_name, rows):
+        with self._lock:
+            start = self.row_count(sheet_name) + 1
+            self.conn.executemany(
+                "INSERT INTO sheet_rows (sheet, row_number, cells) VALUES (?, ?, ?)",
+                ((sheet_name, start + i, json.dumps(list(row))) for i, row in enumerate(rows)),
+            )
+            self.conn.commit()
+        self.total_appends += 1
+
+    def load_csv(self, sheet_name, csv_path):
+        import csv
+
+        with open(csv_path, newline='', encoding='utf-8') as f:
+            self.write_sheet(sheet_name, list(csv.reader(f)))
+
+    def _simulate_scans(self):
+        now = time.time()
+        self._pending_scans += (now - self._last_tick) * self.scan_rate
+        self._last_tick = now
+        count = int(self._pending_scans)
+        if count == 0:
+            return
+        self._pending_scans -= count
+
+        kpi_rows = self._read_range(f"'{self.kpi_sheet}'")
+        if len(kpi_rows) < 2:
+            return
+        header, lines = kpi_rows[0], kpi_rows[1:]
+        scans = random_scans(self._random, lines, header, count, now - count / self.scan_rate, 1 / self.scan_rate)
+        self.append_rows(self.scans_sheet, scans)
+
+        built = {}
+        for scan in scans:
+            built[(scan[1], scan[2])] = built.get((scan[1], scan[2]), 0) + 1
+        for row in lines:
+            added = built.get((row[header.index('Area')], row[header.index('Line')]), 0)
+            if added:
+                update_kpi_row(row, header, added)
+        self.write_sheet(self.kpi_sheet, kpi_rows)
+
+
+# --- Synthetic plant generator ---
+
+KPI_HEADER = ['Area', 'Line', 'Planning', 'Building', 'Pending', 'Percentage']
+SCANS_HEADER = ['Timestamp', 'line', 'Process', 'BELT NAME', 'Duration']
+
+
+def format_count(value):
+    return f"{value:,}"
+
+
+def format_duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}"
+
+
+# Add `added` built sleeves to one Calculation row, keeping the sheet's text formats
+def update_kpi_row(row, header, added):
+    planned = int(row[header.index('Planning')].replace(',', '') or 0)
+    built = int(row[header.index('Building')].replace(',', '') or 0) + added
+    row[header.index('Building')] = format_count(built)
+    row[header.index('Pending')] = format_count(max(planned - built, 0))
+    row[header.index('Percentage')] = f"{built / planned:.1%}" if planned else '#DIV/0!'
+
+
+def random_scans(rng, lines, header, count, started_at=None, interval=1.0):
+    area_pos, line_pos = header.index('Area'), header.index('Line')
+    started_at = time.time() if started_at is None else started_at
+    scans = []
+    for i in range(count):
+        row = rng.choice(lines)
+        scans.append([
+            time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(started_at + i * interval)),
+            row[area_pos],
+            row[line_pos],
+            f"SLV-{rng.randrange(10 ** 6):06d}",
+            format_duration(rng.gauss(240, 60) if row[line_pos] == 'Building' else rng.gauss(600, 120)),
+        ])
+    return scans
+
+
+# Build a fake plant: `areas` areas (Line-1 .. Line-N), each with a Building and
+# a Curing line on "Calculation", and `scans` rows on "Recent Scanned" spread
+# over the shift at `scan_rate` scans per second.
+def generate_synthetic_plant(source, areas=6, scans=2000, scan_rate=1.0, error_rate=0.01, seed=None):
+    rng = random.Random(seed)
+
+    kpi_rows = [KPI_HEADER]
+    for n in range(1, areas + 1):
+        for line in ('Building', 'Curing'):
+            planned = rng.randrange(50, 500)
+            kpi_rows.append([f"Line-{n}", line, format_count(planned), '0', format_count(planned), '0.0%'])
+            if rng.random() < error_rate:
+                kpi_rows[-1][5] = rng.choice(['#DIV/0!', '#REF!', '#N/A', ''])
+
+    started_at = time.time() - scans / scan_rate
+    source.write_sheet(source.scans_sheet, [SCANS_HEADER])
+
+    built = {}
+    chunk = 100_000
+    for offset in range(0, scans, chunk):
+        batch = random_scans(
+            rng, kpi_rows[1:], KPI_HEADER, min(chunk, scans - offset),
+            started_at + offset / scan_rate, 1 / scan_rate,
+        )
+        for scan in batch:
+            built[(scan[1], scan[2])] = built.get((scan[1], scan[2]), 0) + 1
+        source.append_rows(source.scans_sheet, batch)
+
+    for row in kpi_rows[1:]:
+        if row[5] == '0.0%':
+            update_kpi_row(row, KPI_HEADER, built.get((row[0], row[1]), 0))
+    source.write_sheet(source.kpi_sheet, kpi_rows)
+
+
+# python data_sources.py --db local_sheets.db --areas 1000 --scans 1000000
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic local spreadsheet for offline runs.")
+    parser.add_argument("--db", default=os.environ.get("LOCAL_SHEETS_DB", "local_sheets.db"))
+    parser.add_argument("--areas", type=int, default=6)
+    parser.add_argument("--scans", type=int, default=2000)
+    parser.add_argument("--scan-rate", type=float, default=1.0, help="Scans per second across the plant")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    generate_synthetic_plant(LocalSheetsSource(args.db), args.areas, args.scans, args.scan_rate, seed=args.seed)
+    print(f"Wrote {args.areas * 2} lines and {args.scans:,} scans to {args.db} in {time.perf_counter() - started:.1f} s")
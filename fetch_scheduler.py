@@ -0,0 +1,184 @@
+import random
+import threading
+import time
+from collections import deque
+
+# Error kinds (see classify_error)
+QUOTA = "quota"       # 429: per-minute quota exhausted
+SERVER = "server"     # 5xx from the API
+NETWORK = "network"   # timeouts, connection resets
+CONFIG = "config"     # bad sheet name / range, missing permission: retrying fast will not help
+UNKNOWN = "unknown"
+
+RETRYABLE = {QUOTA, SERVER, NETWORK, UNKNOWN}
+
+
+def _status_code(exc):
+    response = getattr(exc, 'response', None)
+    code = getattr(response, 'status_code', None)
+    if code is None:
+        code = getattr(exc, 'code', None)
+    return code if isinstance(code, int) else None
+
+
+# Walk the exception chain (the loaders wrap API errors in RuntimeError) and
+# decide what kind of failure this was.
+def classify_error(exc):
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        code = _status_code(exc)
+        if code == 429:
+            return QUOTA
+        if code is not None and code >= 500:
+            return SERVER
+        if code is not None and 400 <= code < 500:
+            return CONFIG
+        if isinstance(exc, (TimeoutError, ConnectionError)) or type(exc).__name__ in ('Timeout', 'ConnectionError', 'ReadTimeout', 'ConnectTimeout'):
+            return NETWORK
+        exc = exc.__cause__ or exc.__context__
+    return UNKNOWN
+
+
+# Decides when the next Sheets fetch may start.
+#
+#   * Budget: requests of the last 60 s are counted against
+#     quota_per_minute * budget_fraction. The refresh interval is stretched so
+#     that (requests per refresh) * (refreshes per minute) stays under it, and
+#     no fetch starts while the window is already full.
+#   * Backoff: quota (429), 5xx and network errors back off exponentially
+#     (base_interval * 2^n, capped at max_backoff) with +-50% jitter, so
+#     replicas that failed together do not retry together. Config errors (bad
+#     sheet name, 403/404) are retried at a slow fixed config_retry_interval.
+#   * Circuit breaker: after failure_threshold consecutive retryable failures
+#     the breaker opens and no fetch is made for open_seconds (doubling up to
+#     max_open_seconds while it keeps failing). Then one trial fetch is let
+#     through (half-open); success closes it. Cached data is served meanwhile.
+class FetchScheduler:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, base_interval=10, quota_per_minute=60, budget_fraction=0.8,
+                 max_backoff=300, failure_threshold=5, open_seconds=60, max_open_seconds=600,
+                 config_retry_interval=60):
+        self.base_interval = base_interval
+        self.quota_per_minute = quota_per_minute
+        self.budget_fraction = budget_fraction
+        self.max_backoff = max_backoff
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.config_retry_interval = config_retry_interval
+
+        self._lock = threading.Lock()
+        self._requests = deque() # Timestamps of Sheets requests in the last minute
+        self._requests_per_refresh = 1.0
+        self._next_fetch_at = 0.0
+        self._current_open_seconds = open_seconds
+        self._breaker = self.CLOSED
+        self._opened_at = None
+
+        self.consecutive_failures = 0
+        self.last_error_kind = None
+        self.total_failures = 0
+        self.breaker_trips = 0
+
+    @property
+    def budget_per_minute(self):
+        return self.quota_per_minute * self.budget_fraction
+
+    @property
+    def interval(self):
+        # Slowest of the base interval and what the budget allows
+        budget_interval = self._requests_per_refresh * 60 / max(self.budget_per_minute, 1e-9)
+        return max(self.base_interval, budget_interval)
+
+    def _trim(self, now):
+        while self._requests and now - self._requests[0] >= 60:
+            self._requests.popleft()
+
+    # May a fetch start now? Moves an open breaker to half-open once its time is up.
+    def due(self):
+        with self._lock:
+            now = time.time()
+            self._trim(now)
+
+            if self._breaker == self.OPEN:
+                if now - self._opened_at < self._current_open_seconds:
+                    return False
+                self._breaker = self.HALF_OPEN
+                return True
+            if self._breaker == self.HALF_OPEN:
+                return False # The trial fetch is still running
+
+            if now < self._next_fetch_at:
+                return False
+            if len(self._requests) + self._requests_per_refresh > self.budget_per_minute:
+                return False
+            return True
+
+    def record_requests(self, count):
+        with self._lock:
+            now = time.time()
+            self._requests.extend([now] * count)
+            if count:
+                # Smoothed requests per refresh (a full resync costs more than a tail read)
+                self._requests_per_refresh = 0.8 * self._requests_per_refresh + 0.2 * count
+
+    def record_success(self):
+        with self._lock:
+            self.consecutive_failures = 0
+            self.last_error_kind = None
+            self._breaker = self.CLOSED
+            self._current_open_seconds = self.open_seconds
+            self._next_fetch_at = time.time() + self.interval
+
+    def record_failure(self, exc):
+        with self._lock:
+            now = time.time()
+            kind = classify_error(exc)
+            self.last_error_kind = kind
+            self.total_failures += 1
+
+            if kind not in RETRYABLE:
+                self._next_fetch_at = now + self.config_retry_interval
+                if self._breaker == self.HALF_OPEN:
+                    self._breaker = self.CLOSED
+                return
+
+            self.consecutive_failures += 1
+            if self._breaker == self.HALF_OPEN:
+                self._open(now, self._current_open_seconds * 2)
+            elif self.consecutive_failures >= self.failure_threshold:
+                self._open(now, self._current_open_seconds)
+            else:
+                backoff = min(self.max_backoff, self.base_interval * 2 ** self.consecutive_failures)
+                self._next_fetch_at = now + backoff * random.uniform(0.5, 1.5)
+
+    def _open(self, now, open_seconds):
+        self._breaker = self.OPEN
+        self._opened_at = now
+        self._current_open_seconds = min(open_seconds, self.max_open_seconds)
+        self.breaker_trips += 1
+
+    def state(self):
+        with self._lock:
+            now = time.time()
+            self._trim(now)
+            if self._breaker == self.OPEN:
+                next_fetch_in = self._opened_at + self._current_open_seconds - now
+            else:
+                next_fetch_in = self._next_fetch_at - now
+            return {
+                "breaker": self._breaker,
+                "requests_last_minute": len(self._requests),
+                "budget_per_minute": self.budget_per_minute,
+                "quota_per_minute": self.quota_per_minute,
+                "interval": self.interval,
+                "next_fetch_in": max(next_fetch_in, 0.0),
+                "consecutive_failures": self.consecutive_failures,
+                "last_error_kind": self.last_error_kind,
+                "total_failures": self.total_failures,
+                "breaker_trips": self.breaker_trips,
+            }
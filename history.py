@@ -0,0 +1,133 @@
+import os
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+# (table, bucket seconds) from finest to coarsest
+TIERS = (
+    ("kpi_raw", 0),
+    ("kpi_1min", 60),
+    ("kpi_15min", 900),
+)
+
+
+# Local time series of Planned / Built / Pending per Area_Line_Key.
+#
+# Every refreshed snapshot is appended to kpi_raw (insert only). Closed time
+# buckets are rolled up into kpi_1min and kpi_15min, keeping the last sample of
+# each bucket (the counters are running totals). Each tier has its own retention,
+# so raw samples are kept for hours, minutes for days and quarter hours for
+# months. Every table is indexed on (key, ts) and queries pick the coarsest tier
+# that still resolves the requested bucket size, so a query only reads the
+# points it returns, however many days are kept.
+class KpiHistory:
+    def __init__(self, path, raw_retention=6 * 3600, minute_retention=7 * 86400, quarter_retention=400 * 86400):
+        self.path = path
+        self.retention = {
+            "kpi_raw": raw_retention,
+            "kpi_1min": minute_retention,
+            "kpi_15min": quarter_retention,
+        }
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        for table, _ in TIERS:
+            self.conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                " key TEXT NOT NULL, ts REAL NOT NULL,"
+                " planned INTEGER, built INTEGER, pending INTEGER)"
+            )
+            self.conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_key_ts ON {table} (key, ts)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS rollup_state (tier TEXT PRIMARY KEY, rolled_until REAL NOT NULL)")
+        self.conn.commit()
+
+    # Refresher listener: append one sample per line
+    def record(self, snapshot):
+        kpi = snapshot.kpi
+        if kpi.empty or snapshot.fetched_at is None:
+            return
+
+        rows = list(zip(
+            kpi['Area_Line_Key'].tolist(),
+            [snapshot.fetched_at] * len(kpi),
+            kpi['Planned Sleeves'].astype(int).tolist(),
+            kpi['Sleeves Build'].astype(int).tolist(),
+            kpi['Not Produced Sleeves'].astype(int).tolist(),
+        ))
+        with self._lock:
+            self.conn.executemany("INSERT INTO kpi_raw VALUES (?, ?, ?, ?, ?)", rows)
+            self._rollup(snapshot.fetched_at)
+            self.conn.commit()
+
+    def _rolled_until(self, tier):
+        row = self.conn.execute("SELECT rolled_until FROM rollup_state WHERE tier = ?", (tier,)).fetchone()
+        return row[0] if row else 0.0
+
+    # Roll closed buckets of each tier into the next coarser one, then apply retention
+    def _rollup(self, now):
+        for (source, _), (target, bucket) in zip(TIERS, TIERS[1:]):
+            rolled_until = self._rolled_until(target)
+            closed_until = (now // bucket) * bucket
+            if closed_until <= rolled_until:
+                continue
+
+            # SQLite returns the bare columns of the row holding MAX(ts): the last sample per bucket
+            self.conn.execute(
+                f"INSERT INTO {target} (key, ts, planned, built, pending) "
+                f"SELECT key, CAST(ts / {bucket} AS INTEGER) * {bucket} AS bucket, planned, built, pending "
+                f"FROM (SELECT key, ts, MAX(ts) AS last_ts, planned, built, pending FROM {source} "
+                f"      WHERE ts >= ? AND ts < ? GROUP BY key, CAST(ts / {bucket} AS INTEGER))",
+                (rolled_until, closed_until),
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO rollup_state (tier, rolled_until) VALUES (?, ?)", (target, closed_until)
+            )
+
+            for table, retention in self.retention.items():
+                self.conn.execute(f"DELETE FROM {table} WHERE ts < ?", (now - retention,))
+
+    # Planned/Built/Pending samples of one line from the coarsest tier whose
+    # bucket is no larger than `resolution` (seconds). Samples newer than that
+    # tier's last rollup are read from the finer tiers below it.
+    def series(self, key, since, until=None, resolution=0):
+        until = time.time() if until is None else until
+        chosen = max(position for position, (_, bucket) in enumerate(TIERS) if bucket <= resolution)
+
+        with self._lock:
+            parts = []
+            params = []
+            lower = since
+            for position in range(chosen, -1, -1):
+                table = TIERS[position][0]
+                parts.append(f"SELECT ts, planned, built, pending FROM {table} WHERE key = ? AND ts >= ? AND ts <= ?")
+                params += [key, lower, until]
+                if position > 0:
+                    lower = max(lower, self._rolled_until(table))
+            rows = self.conn.execute(" UNION ALL ".join(parts) + " ORDER BY ts", params).fetchall()
+
+        df = pd.DataFrame(rows, columns=['ts', 'Planned', 'Built', 'Pending'])
+        # Local wall-clock time for the charts
+        df.index = pd.to_datetime(df.pop('ts') + time.localtime().tm_gmtoff, unit='s')
+        return df
+
+    # Sleeves built per `bucket_seconds` for each line, one column per key
+    def throughput(self, keys, since, bucket_seconds=900, until=None):
+        columns = {}
+        for key in keys:
+            built = self.series(key, since, until, resolution=bucket_seconds)['Built']
+            if built.empty:
+                continue
+            per_bucket = built.resample(f"{bucket_seconds}s").last().ffill()
+            # A counter that goes down was reset (new shift/plan): count from the new value
+            built_in_bucket = per_bucket.diff()
+            reset = built_in_bucket < 0
+            built_in_bucket[reset] = per_bucket[reset]
+            columns[key] = built_in_bucket.fillna(0)
+        return pd.DataFrame(columns)
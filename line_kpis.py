@@ -0,0 +1,114 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from cycle_times import parse_timestamp
+
+
+# Start (epoch seconds) of the shift `now` falls in, for shifts starting at the
+# local "HH:MM" times in `starts`
+def shift_start(now, starts):
+    moment = datetime.fromtimestamp(now)
+    begins = []
+    for start in starts:
+        hour, minute = (int(part) for part in start.split(':'))
+        begin = moment.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if begin > moment:
+            begin -= timedelta(days=1)
+        begins.append(begin)
+    return max(begins).timestamp()
+
+
+# Target / Completed / Pending / Production Rate per Area_Line_Key, computed in
+# process from the scan stream instead of the "Calculation" sheet's formulas.
+#
+# The plan (Planned Sleeves per line) is taken from the Calculation sheet with
+# set_plan(), which the app only does on a full "Recent Scanned" read (start
+# up, new shift, periodic resync). Every scan is folded into its line's
+# counter as it is ingested (one dict update), so the numbers move as soon as
+# a scan arrives and a refresh never waits on Google recalculating the sheet.
+# Scans are matched to the plan by "<line> - <Process>" = Area_Line_Key.
+#
+# Only scans of the current shift count: with `shift_starts` (local "HH:MM"
+# times), rows whose Timestamp is before the start of the shift are skipped,
+# so a sheet that keeps earlier days does not inflate Completed, and the
+# counters start again from zero when the next shift begins. Rows without a
+# readable Timestamp cannot be placed and are counted. Without shift_starts
+# every row in the sheet counts (for a sheet cleared at each shift change).
+class LineKpiEngine:
+    def __init__(self, shift_starts=None):
+        self._lock = threading.Lock()
+        self.plan = None # KPI frame of the last plan read: Area, Line, Planned Sleeves, Area_Line_Key
+        self.built = {}
+        self.unplanned_scans = 0
+        self.shift_starts = tuple(shift_starts or ())
+        self.shift_started_at = None
+        self.earlier_scans = 0 # Rows from before the current shift, not counted
+
+    def set_plan(self, kpi):
+        with self._lock:
+            if kpi.empty:
+                self.plan = kpi
+                return
+            self.plan = kpi[['Area', 'Line', 'Planned Sleeves', 'Area_Line_Key']].reset_index(drop=True)
+
+    # New shift / rewritten sheet: the scans are counted again from the full read
+    def reset(self):
+        with self._lock:
+            self.built = {}
+            self.earlier_scans = 0
+
+    # A new shift has begun since the last call: start counting from zero
+    def _roll_shift(self, now):
+        if not self.shift_starts:
+            return
+        started_at = shift_start(now, self.shift_starts)
+        if started_at != self.shift_started_at:
+            if self.shift_started_at is not None:
+                self.built = {}
+                self.earlier_scans = 0
+            self.shift_started_at = started_at
+
+    # Add "Recent Scanned" rows (padded to `header`), new rows only
+    def add_rows(self, header, rows):
+        if 'line' not in header or 'Process' not in header:
+            return
+        line_pos, process_pos = header.index('line'), header.index('Process')
+        time_pos = header.index('Timestamp') if self.shift_starts and 'Timestamp' in header else None
+
+        with self._lock:
+            self._roll_shift(time.time())
+            built = self.built
+            for row in rows:
+                if not any(row):
+                    continue
+                if time_pos is not None:
+                    scanned_at = parse_timestamp(row[time_pos])
+                    if scanned_at is not None and scanned_at < self.shift_started_at:
+                        self.earlier_scans += 1
+                        continue
+                key = f"{row[line_pos]} - {row[process_pos]}"
+                built[key] = built.get(key, 0) + 1
+
+    # KPI frame in the same shape parse_kpi_rows() gives for the Calculation sheet
+    def frame(self):
+        with self._lock:
+            self._roll_shift(time.time())
+            if self.plan is None or self.plan.empty:
+                return pd.DataFrame()
+            df = self.plan.copy()
+            built = self.built.copy()
+
+        planned = df['Planned Sleeves']
+        df['Sleeves Build'] = df['Area_Line_Key'].map(built).fillna(0).astype('int64')
+        df['Not Produced Sleeves'] = (planned - df['Sleeves Build']).clip(lower=0)
+        # No plan -> 0 % (the sheet showed #DIV/0! here)
+        df['Production rate %'] = (df['Sleeves Build'] / planned.where(planned > 0)).fillna(0.0)
+        df['Production rate Display'] = df['Production rate %'].round(3)
+        planned_keys = set(df['Area_Line_Key'])
+        self.unplanned_scans = sum(count for key, count in built.items() if key not in planned_keys)
+
+        return df[['Area', 'Line', 'Planned Sleeves', 'Sleeves Build', 'Not Produced Sleeves',
+                   'Production rate %', 'Production rate Display', 'Area_Line_Key']]
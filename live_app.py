@@ -1,10 +1,35 @@
 import streamlit as st
 import pandas as pd
 import gspread
+import os
 import time
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 from streamlit_option_menu import option_menu
 from streamlit_autorefresh import st_autorefresh
 import streamlit.components.v1 as components 
+from snapshots import RECENT_SCANS_SHOWN, RecentScansTail, SnapshotRefresher, SnapshotStore
+from cycle_times import CycleTimeStats, format_seconds
+from line_kpis import LineKpiEngine
+from scan_ingest import ScanIngest
+from snapshot_api import SnapshotApiServer
+from shared_snapshots import SharedSnapshots, default_shared_dir
+from fetch_scheduler import FetchScheduler, classify_error
+from metrics import REGISTRY, ActiveSessions, MetricsServer
+from rerun_profiler import RerunProfiler
+from history import KpiHistory
+from plants import Plant, PlantRefreshers, load_plants
+from sheet_schema import KPI_SCHEMA, SheetSchema, parse_kpi_rows
+from operator_photos import build_manifest, make_thumbnail
+from data_sources import GoogleSheetsSource, LocalSheetsSource, a1_sheet
+from wall_view import format_production_rate, wall_grid_html as build_wall_grid_html
+
+# Copy-on-write (always on from pandas 3): the frames every session reads from the
+# shared snapshot are handed out as views, and a write gets a private copy instead
+# of changing the snapshot under the other sessions
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
 
 # Streamlit Page Config
 st.set_page_config(
@@ -25,55 +50,56 @@ KPI_LABEL_FONT_SIZE = 20
 SHEET_NAME = "Calculation" # Used for KPI data
 RECENT_SCANNED_SHEET_NAME = "Recent Scanned" # Sheet name for scanned data
 SPREADSHEET_ID = "1tqxNHszQ3tJ09mT2F1XxzmywmBP_4uFlHkB24EwvN7s"
+PLANTS_CONFIG = os.environ.get("PLANTS_CONFIG", os.path.join(os.path.dirname(os.path.abspath(__file__)), "plants.json")) # Several plants/spreadsheets (see plants.py)
+DEFAULT_PLANT_NAME = "Main" # The plant above, served alone when there is no PLANTS_CONFIG file
+# Data source: "gsheets" (default) or "local" (SQLite stand-in, see data_sources.py)
+DATA_SOURCE = os.environ.get("DATA_SOURCE", "gsheets")
+LOCAL_SHEETS_DB = os.environ.get("LOCAL_SHEETS_DB", "local_sheets.db")
+LOCAL_SCAN_RATE = float(os.environ.get("LOCAL_SCAN_RATE", "0")) # Simulated scans per second (0 = static data)
+LOCAL_SHEETS_LATENCY = float(os.environ.get("LOCAL_SHEETS_LATENCY", "0")) # Simulated Sheets round trip per read (seconds)
+REFRESH_INTERVAL_SECONDS = 10 # Max snapshot age before a background refresh is started
+SHEETS_READ_QUOTA_PER_MINUTE = int(os.environ.get("SHEETS_READ_QUOTA_PER_MINUTE", "60")) # Read requests/min for our service account
+SHEETS_QUOTA_BUDGET_FRACTION = 0.8 # Share of the quota this process may use (headroom for editors/scanners)
+INCREMENTAL_RECENT_SCANS = True # Only fetch rows appended to "Recent Scanned" since the last refresh
+RECENT_SCANS_RESYNC_EVERY = 60 # Full "Recent Scanned" re-read every N refreshes (~10 min) to catch edits
+CYCLE_TIME_WINDOW_SECONDS = 3600 # Rolling window of the cycle-time stats under the scan tables
+LOCAL_KPIS = True # Count Completed/Pending/Rate from the scans; the Calculation sheet is only read for the plan
+SHIFT_STARTS = tuple(os.environ.get("SHIFT_STARTS", "00:00").split(',')) # Local "HH:MM" shift starts; LOCAL_KPIS only count scans of the current shift
+LIVE_REGIONS = True # Refresh only the KPI tiles and scan tables on a timer (st.fragment) instead of whole-page reruns
+FIRST_PAINT_DEADLINE_SECONDS = 3 # With live regions, a rerun waits at most this long for a plant's first fetch, then paints a placeholder
+SCAN_INGEST_PORT = int(os.environ.get("SCAN_INGEST_PORT", "0")) # Port scanners POST scans to (0 = off, scans only come through Sheets)
+SCAN_INGEST_TOKEN = os.environ.get("SCAN_INGEST_TOKEN") # Bearer token the scanners must send (required unless the host is loopback)
+SCAN_INGEST_HOST = os.environ.get("SCAN_INGEST_HOST", "127.0.0.1") # 0.0.0.0 for scanners on the network (needs SCAN_INGEST_TOKEN)
+SHEETS_MIRROR_INTERVAL_SECONDS = 5 # Pushed scans are appended to "Recent Scanned" in batches this often
+SNAPSHOT_API_PORT = int(os.environ.get("SNAPSHOT_API_PORT", "0")) # Port of the read-only JSON API + kiosk page (0 = off)
+# Several replicas on one host: only one of them fetches from Sheets, the others read its snapshots
+SHARED_SNAPSHOTS = os.environ.get("SHARED_SNAPSHOTS", "0") == "1"
+SHARED_SNAPSHOT_DIR = os.environ.get("SHARED_SNAPSHOT_DIR") or default_shared_dir()
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "0")) # Prometheus /metrics endpoint (0 = off); ?diagnostics=1 shows the same in the app
+PROFILE_DIR = os.environ.get("PROFILE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".profiles"))
+PROFILE_RERUNS = int(os.environ.get("PROFILE_RERUNS", "0")) # Profile the next N reruns of any session after start-up (0 = only on ?profile=N)
+PROFILE_REPORTS_KEPT = 50 # Older reports in PROFILE_DIR are removed
+LIVE_REFRESH_SECONDS = 2 if SCAN_INGEST_PORT else 20 # Screen refresh interval (pushed scans show up within it)
+SNAPSHOT_CACHE_DIR = os.environ.get("SNAPSHOT_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".snapshot_cache"))
+STALE_AFTER_SECONDS = 60 # Show the staleness badge once the data on screen is older than this
+HISTORY_DB = os.environ.get("HISTORY_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".history", "kpi_history.db"))
+SHOW_TRENDS = True # Throughput trend chart under the KPI tiles
+TREND_WINDOW_HOURS = 8 # How far back the trend chart goes
+TREND_BUCKET_SECONDS = 900 # Sleeves built per 15 minutes
+WALL_CARD_MIN_WIDTH = 340 # px; the wall view (?view=wall) fits as many area cards per row as the screen allows
 
-# Image Configuration (KEYS MUST MATCH 'Area - Line')
+# Operator photo overrides on top of the photo files (KEYS MUST MATCH 'Area - Line').
+# Who is on a line comes from the "Line-<n>-<Process>-<Name>" file names; an entry
+# here renames a photo's caption and moves it to the line it is listed under.
 EMPLOYEE_IMAGES = {
-    # Key format: "Area - Line"
+    # Key format: "Area - Line"; a photo listed here moves to that line, None hides it
     "Line-1 - Building": [
-        ("Line-1-Building-John paul.jpeg", "John paul"),
-        ("Line-1-Building-Normandy.jpg", "Normandy"),
+        ("Line-1-Building-John Rey.jpg", None),
     ],
     "Line-1 - Curing": [
-        ("Line-1-Curing-Charles.JPG", "Charles"),
         ("Line-1-Curing-Chathuranga madushan.jpg", "Madushan"),
-        
-    ],
-    "Line-2 - Building": [
-        ("Line-2-Building-Jonh eurhis.jpeg", "Jonh eurhis"),
-        ("Line-2-Building-Samuel.jpg", "Samuel"),
-        
-    ],
-    "Line-2 - Curing": [
-        ("Line-2-Curing-Gilbert Mutura.jpg", "Gilbert Mutura"),
-        ("Line-2-Curing-Sudip.jpg", "Sudip"),
-    ],
-        
-    "Line-3 - Building": [
-        ("Line-3-Building-Ian.jpg", "Ian"),
-        
-        
-    ],
-    "Line-3 - Curing": [
-        ("Line-3-Curing-Joseph.jpg", "Joseph"),
-        
-    ],
-    "Line-4 - Building": [
-        ("Line-4-Building-Asela.jpg", "Asela"),
-        
-    ],
-    "Line-4 - Curing": [
-        ("Line-4-Curing-Danushka.jpg", "Danushka"),
-        
-    ],
-    "Line-MMV - Building": [
-        ("Line-MMV-Building-Pramoth.jpg", "Pramoth"),
-        ("Line-MMV-Building-Ramesh.jpeg", "Ramesh"),
-        
-        
-        
     ],
     "Line-MMV - Curing": [
-        
         ("Line-MMV-Building-Simon.jpeg", "Simon"),
         ("Line-MMV-Building-Chemal.jpg", "Chamal"),
         ("Line-MMV-Building-Chamidu.JPG", "Chamidu"),
@@ -82,7 +108,28 @@ EMPLOYEE_IMAGES = {
 
 LOGO_PATH = "urbmlogonew.png"
 
+# Plants served by this deployment: PLANTS_CONFIG, or the spreadsheet and overrides above
+PLANTS = load_plants(PLANTS_CONFIG, default=Plant(
+    DEFAULT_PLANT_NAME, SPREADSHEET_ID, kpi_sheet=SHEET_NAME, scans_sheet=RECENT_SCANNED_SHEET_NAME, roster=EMPLOYEE_IMAGES,
+))
+FIRST_PLANT = next(iter(PLANTS)) # Served by the scan ingest and kiosk ports
+
+# Operator photos: "Line-<n>-<Process>-<Name>.<ext>" files in this directory are
+# picked up automatically; EMPLOYEE_IMAGES above renames, moves or hides them.
+OPERATOR_IMAGE_DIR = os.environ.get("OPERATOR_IMAGE_DIR", os.path.dirname(os.path.abspath(__file__)))
+THUMBNAIL_CACHE_DIR = os.path.join(OPERATOR_IMAGE_DIR, ".thumbnails")
+THUMBNAIL_MEMORY_ENTRIES = 256 # In-memory thumbnail LRU size
+OPERATOR_MANIFEST_TTL_SECONDS = 300 # Rescan the image directory every 5 minutes
+
+# Per-plant file or directory next to `base` (just `base` while there is only one plant)
+def plant_path(base, plant_name):
+    if len(PLANTS) == 1:
+        return base
+    root, ext = os.path.splitext(base)
+    return f"{root}-{PLANTS[plant_name].key}{ext}"
+
 # Google Sheets Client (Resource Caching)
+# One authenticated client, shared by the sources of every plant
 @st.cache_resource(ttl=3600)
 def get_gspread_client():
     try:
@@ -90,118 +137,315 @@ def get_gspread_client():
             st.error("Missing 'gcp_service_account' in st.secrets.toml.")
             return None
             
-        gc = gspread.service_account_from_dict(st.secrets["gcp_service_account"])
-        return gc
+        return gspread.service_account_from_dict(st.secrets["gcp_service_account"])
     except Exception as e:
         st.error(f"Failed to connect to Google Sheets API. Check your secrets.toml configuration. Error: {e}")
         return None
 
-# Load & Clean KPI Data (Refreshes every 10 seconds)
-@st.cache_data(ttl=10) # TTL of 10 seconds for production data refresh
-def load_data():
+# Holds the opened Spreadsheet handle of one plant, so each refresh costs one
+# batched values read. Kept for the life of the process: the refresher holds on
+# to it, and it reopens the spreadsheet by itself after a failed request.
+@st.cache_resource
+def get_sheets_source(plant_name):
     gc = get_gspread_client()
     if gc is None:
-        return pd.DataFrame()
+        return None
+    return GoogleSheetsSource(gc, PLANTS[plant_name].spreadsheet_id)
 
-    try:
-        spreadsheet = gc.open_by_key(SPREADSHEET_ID)
-        worksheet = spreadsheet.worksheet(SHEET_NAME)
-        data = worksheet.get_all_values()
-
-        if not data or len(data) < 2:
-            st.warning("Google Sheet is empty or only contains headers.")
-            return pd.DataFrame()
-
-        df = pd.DataFrame(data[1:], columns=data[0])
-
-        df.rename(columns={
-            'Planning': 'Planned Sleeves',
-            'Building': 'Sleeves Build',
-            'Pending': 'Not Produced Sleeves',
-            'Percentage': 'Production rate %'
-        }, inplace=True)
-
-        # --- START: ERROR HANDLING FIX ---
-        ERROR_REPLACEMENTS = {
-            '#DIV/0!': '0.0', 
-            '#N/A': '0.0', 
-            '#NAME?': '0.0', 
-            '#REF!': '0.0', 
-            '#VALUE!': '0.0',
-            '#ERROR!': '0.0',
-            '': '0.0',
-            '-': '0.0',
-        }
-        numeric_cols = ['Planned Sleeves', 'Sleeves Build', 'Not Produced Sleeves']
-
-        for col in numeric_cols:
-            df[col] = (
-                df[col]
-                .astype(str)
-                .str.replace(',', '')
-                .replace((ERROR_REPLACEMENTS))
-                .astype(float)
-                .astype(int)
-            )
+# Offline stand-in for the spreadsheet (no credentials, no Sheets quota)
+@st.cache_resource
+def get_local_sheets_source(plant_name):
+    plant = PLANTS[plant_name]
+    return LocalSheetsSource(
+        plant.local_db or plant_path(LOCAL_SHEETS_DB, plant_name),
+        scan_rate=LOCAL_SCAN_RATE,
+        kpi_sheet=plant.kpi_sheet,
+        scans_sheet=plant.scans_sheet,
+        latency=LOCAL_SHEETS_LATENCY,
+    )
 
-        # Special handling for Production rate % (which might also contain #DIV/0!)
-        df['Production rate %'] = (
-            df['Production rate %']
-            .astype(str)
-            .str.replace('%', '')
-            .replace(ERROR_REPLACEMENTS) # **New: Replace GSheet errors and empty strings**
-            .astype(float) / 100
-        )
-        
-        # 🌟 CORRECTED: Create a display column as a float, rounded to handle floating-point issues.
-        # DO NOT convert to a string here.
-        df['Production rate Display'] = df['Production rate %'].round(3)
-        df['Area_Line_Key'] = df['Area'] + ' - ' + df['Line']
+# Data Source (Google Sheets, or the local stand-in for profiling / load tests)
+def get_data_source(plant_name):
+    if DATA_SOURCE == "local":
+        return get_local_sheets_source(plant_name)
+    return get_sheets_source(plant_name)
 
-        return df
+# ⏱️ Rolling cycle-time stats, fed by the tail
+@st.cache_resource
+def get_cycle_time_stats(plant_name):
+    return CycleTimeStats(window=CYCLE_TIME_WINDOW_SECONDS)
 
-    except Exception as e:
-        st.error(f"Error loading data from Google Sheet. Check Sheet ID/Name/Permissions. Error: {e}")
-        return pd.DataFrame()
+# 📊 Line KPIs counted from the scan stream, fed by the tail
+@st.cache_resource
+def get_line_kpis(plant_name):
+    return LineKpiEngine(shift_starts=SHIFT_STARTS)
 
-# 🌟 Load Recent Scanned Data:
-@st.cache_data(ttl=10) 
-def load_recent_scanned_data():
-    gc = get_gspread_client()
-    if gc is None:
-        return pd.DataFrame()
-    
-    try:
-        spreadsheet = gc.open_by_key(SPREADSHEET_ID)
-        worksheet = spreadsheet.worksheet(RECENT_SCANNED_SHEET_NAME) 
-        data = worksheet.get_all_values()
+# Calculation sheet parser; per plant, as it remembers the columns it parsed last
+@st.cache_resource
+def get_kpi_schema(plant_name):
+    return SheetSchema(KPI_SCHEMA.columns.values())
 
-        if not data or len(data) < 2:
-            return pd.DataFrame()
+# 🌟 Recent Scanned tail state (kept across refreshes, only new rows are fetched)
+@st.cache_resource
+def get_recent_scans_tail(plant_name):
+    resync_every = RECENT_SCANS_RESYNC_EVERY if INCREMENTAL_RECENT_SCANS else 0
+    observers = [get_cycle_time_stats(plant_name)] + ([get_line_kpis(plant_name)] if LOCAL_KPIS else [])
+    return RecentScansTail(
+        PLANTS[plant_name].scans_sheet, per_group=RECENT_SCANS_SHOWN, resync_every=resync_every, observers=observers,
+    )
 
-        df = pd.DataFrame(data[1:], columns=data[0])
-        
-        df.rename(columns={
-            'line': 'Line Name',
-            'Process': 'Process', 
-            'BELT NAME': 'Sleeve Name', 
-            'Duration': 'Time Taken'
-        }, inplace=True)
-        
-        df = df[['Line Name', 'Process', 'Sleeve Name', 'Time Taken']]
+# One refresh = both sheets in a single batched read, so a session never mixes
+# KPIs and scans from different fetches. With LOCAL_KPIS the Calculation sheet
+# (the plan) is only read along with a full "Recent Scanned" read; otherwise a
+# refresh reads just the scan tail and the KPIs come from the local counters.
+#
+# Runs on the refresher's worker thread, which has no script run context: the
+# cached resources it uses are looked up once, when the refresher is built
+# (get_snapshot_refresher), and passed in.
+def fetch_snapshot(plant_name, source, tail, line_kpis, schema, scheduler):
+    plant = PLANTS[plant_name]
+    if source is None:
+        raise RuntimeError("Google Sheets client is not available. Check your secrets.toml configuration.")
 
-        return df
+    scanned_range = tail.next_range()
+    read_plan = line_kpis is None or line_kpis.plan is None or tail.needs_full_fetch
+    round_trips_before = source.total_round_trips
+    try:
+        with REGISTRY.timer('fetch'):
+            results = source.batch_get(([a1_sheet(plant.kpi_sheet)] if read_plan else []) + [scanned_range])
+            kpi_data = results[0] if read_plan else None
+            scanned_data = results[-1]
 
+            # The tail no longer matches what we ingested (rows deleted, new shift): full resync, fresh plan
+            if not tail.ingest(scanned_data, scanned_range):
+                kpi_data, scanned_data = source.batch_get([a1_sheet(plant.kpi_sheet), tail.full_range()])
+                tail.ingest_full(scanned_data)
     except Exception as e:
-        st.warning(f"Error loading 'Recent Scanned' data. Please ensure the sheet name '{RECENT_SCANNED_SHEET_NAME}' exists. Error: {e}")
-        return pd.DataFrame()
+        REGISTRY.inc('sheets_errors_total', kind=classify_error(e))
+        raise RuntimeError(f"Please ensure the sheets '{plant.kpi_sheet}' and '{plant.scans_sheet}' exist. Error: {e}") from e
+    finally:
+        # Failed requests count against the quota too
+        round_trips = source.total_round_trips - round_trips_before
+        scheduler.record_requests(round_trips)
+        REGISTRY.inc('sheets_requests_total', round_trips)
+
+    # The frames are built by the refresher, in order with the pushed scans' publishes
+    with REGISTRY.timer('parse'):
+        if line_kpis is None:
+            kpi = parse_kpi_rows(kpi_data, schema)
+            return lambda: (kpi, tail.frame())
+
+        if kpi_data is not None:
+            line_kpis.set_plan(parse_kpi_rows(kpi_data, schema))
+        return lambda: (line_kpis.frame(), tail.frame())
+
+# Fetch Scheduler: Sheets quota budget, backoff on 429/5xx and circuit breaker.
+# Per plant, so one failing spreadsheet does not hold back the others; the read
+# quota belongs to the service account, so the plants split the budget.
+@st.cache_resource
+def get_fetch_scheduler(plant_name):
+    return FetchScheduler(
+        base_interval=REFRESH_INTERVAL_SECONDS,
+        quota_per_minute=SHEETS_READ_QUOTA_PER_MINUTE,
+        budget_fraction=SHEETS_QUOTA_BUDGET_FRACTION / len(PLANTS),
+    )
+
+# KPI History (local time series of every refreshed snapshot)
+@st.cache_resource
+def get_kpi_history(plant_name):
+    return KpiHistory(plant_path(HISTORY_DB, plant_name))
+
+# Thread pool the refreshes of all plants run on (a worker per plant)
+@st.cache_resource
+def get_refresh_pool():
+    return ThreadPoolExecutor(max_workers=len(PLANTS), thread_name_prefix="snapshot-refresher")
+
+# Background Refresher (one per plant and process, shared by every session / TV)
+@st.cache_resource
+def get_snapshot_refresher(plant_name):
+    scheduler = get_fetch_scheduler(plant_name)
+    fetch = functools.partial(
+        fetch_snapshot, plant_name,
+        source=get_data_source(plant_name),
+        tail=get_recent_scans_tail(plant_name),
+        line_kpis=get_line_kpis(plant_name) if LOCAL_KPIS else None,
+        schema=get_kpi_schema(plant_name),
+        scheduler=scheduler,
+    )
+    return SnapshotRefresher(
+        fetch,
+        max_age=REFRESH_INTERVAL_SECONDS,
+        store=SnapshotStore(plant_path(SNAPSHOT_CACHE_DIR, plant_name)),
+        scheduler=scheduler,
+        listeners=[get_kpi_history(plant_name).record],
+        shared=SharedSnapshots(plant_path(SHARED_SNAPSHOT_DIR, plant_name)) if SHARED_SNAPSHOTS else None,
+        executor=get_refresh_pool(),
+    )
+
+# 🏭 All plants' refreshers: fetching side by side, failing independently
+@st.cache_resource
+def get_plant_refreshers():
+    return PlantRefreshers({plant_name: get_snapshot_refresher(plant_name) for plant_name in PLANTS})
+
+# 👥 Sessions seen within the last few live-region ticks
+@st.cache_resource
+def get_active_sessions():
+    return ActiveSessions(timeout=3 * LIVE_REFRESH_SECONDS)
+
+def touch_session():
+    ctx = get_script_run_ctx()
+    if ctx is not None:
+        get_active_sessions().touch(ctx.session_id)
+
+# 📊 Gauges read when metrics are scraped (registered once per process)
+@st.cache_resource
+def register_gauges():
+    refreshers = get_plant_refreshers().refreshers
+    schedulers = {plant_name: get_fetch_scheduler(plant_name) for plant_name in PLANTS}
+    sessions = get_active_sessions()
+
+    def per_plant(objects, read):
+        return lambda: {(('plant', plant_name),): read(obj) for plant_name, obj in objects.items()}
+
+    REGISTRY.gauge('snapshot_age_seconds', per_plant(refreshers, lambda r: r.current.age), "Seconds since the last good Sheets fetch")
+    REGISTRY.gauge('snapshot_version', per_plant(refreshers, lambda r: r.current.version))
+    REGISTRY.gauge('snapshot_resident_bytes', per_plant(refreshers, lambda r: r.current.nbytes), "Memory held by the snapshot frames and index")
+    REGISTRY.gauge('active_sessions', sessions.count, "Sessions seen in the last few refresh ticks")
+    REGISTRY.gauge('sheets_requests_last_minute', per_plant(schedulers, lambda s: s.state()['requests_last_minute']))
+    REGISTRY.gauge('sheets_refresh_interval_seconds', per_plant(schedulers, lambda s: s.interval))
+    REGISTRY.gauge('sheets_breaker_open', per_plant(schedulers, lambda s: 0 if s.state()['breaker'] == FetchScheduler.CLOSED else 1))
+    return True
+
+# 🔬 Rerun profiler (reports in PROFILE_DIR)
+@st.cache_resource
+def get_rerun_profiler():
+    profiler = RerunProfiler(PROFILE_DIR, keep=PROFILE_REPORTS_KEPT)
+    profiler.env_remaining = PROFILE_RERUNS
+    return profiler
+
+# Run func, under the profiler when asked to:
+#   ?profile=<N>         this session's next N reruns (default 1), live-region ticks included
+#   ?profile=sampling    the next rerun with the sampling profiler (pyinstrument)
+#   PROFILE_RERUNS=<N>   the next N reruns of any session after start-up
+# Without either it is a plain call.
+def run_profiled(label, func, *args):
+    if not PROFILE_RERUNS and "profile" not in st.query_params:
+        return func(*args)
+
+    profiler = get_rerun_profiler()
+    requested = st.query_params.get("profile")
+    if requested is None and profiler.env_remaining <= 0:
+        return func(*args)
+
+    mode = "sampling" if requested == "sampling" else "deterministic"
+    result, report = profiler.run(label, func, *args, mode=mode)
+    if report is None:
+        return result # Nested in a profiled rerun, or another session is being profiled
+
+    if requested is None:
+        profiler.env_remaining -= 1
+    else:
+        remaining = st.session_state.get("profile_remaining")
+        if remaining is None:
+            remaining = int(requested) if requested.isdigit() else 1
+        remaining -= 1
+        st.session_state["profile_remaining"] = remaining
+        if remaining <= 0:
+            del st.session_state["profile_remaining"]
+            del st.query_params["profile"]
+    st.toast(f"🔬 Profile saved: {os.path.basename(report)}")
+    return result
+
+# 📊 Prometheus endpoint
+@st.cache_resource
+def get_metrics_server():
+    return MetricsServer(METRICS_PORT)
+
+# 📺 Read-only JSON snapshot API and kiosk page (TVs poll it instead of running a Streamlit session)
+@st.cache_resource
+def get_snapshot_api():
+    api = SnapshotApiServer(SNAPSHOT_API_PORT, get_snapshot_refresher(FIRST_PLANT).snapshot)
+    REGISTRY.gauge('snapshot_api_requests_total', lambda: api.requests, kind='counter')
+    REGISTRY.gauge('snapshot_api_not_modified_total', lambda: api.not_modified, kind='counter')
+    return api
+
+# 📥 Scan ingest endpoint: scanners POST scans, which are on screen at the next
+# live-region tick and reach the "Recent Scanned" sheet in batched appends
+@st.cache_resource
+def get_scan_ingest():
+    source = get_data_source(FIRST_PLANT)
+    if source is None:
+        return None
+    refresher = get_snapshot_refresher(FIRST_PLANT)
+    tail = get_recent_scans_tail(FIRST_PLANT)
+    line_kpis = get_line_kpis(FIRST_PLANT) if LOCAL_KPIS else None
+
+    def publish():
+        refresher.publish(lambda: (
+            line_kpis.frame() if line_kpis is not None else refresher.current.kpi, tail.frame()
+        ))
+
+    ingest = ScanIngest(
+        tail, publish, source, PLANTS[FIRST_PLANT].scans_sheet, SCAN_INGEST_PORT,
+        token=SCAN_INGEST_TOKEN, host=SCAN_INGEST_HOST, mirror_interval=SHEETS_MIRROR_INTERVAL_SECONDS,
+    )
+    REGISTRY.gauge('scan_ingest_received_total', lambda: ingest.log.appended, kind='counter')
+    REGISTRY.gauge('scan_ingest_backlog', lambda: ingest.log.backlog, "Pushed scans not written to the sheet yet")
+    REGISTRY.gauge('scan_ingest_rejected_total', lambda: ingest.log.rejected, kind='counter')
+    REGISTRY.gauge('sheets_appends_total', lambda: ingest.mirror.writes, kind='counter')
+    return ingest
+
+# 📈 Throughput per line from the local history store (shared by all sessions for a minute;
+# a cache_resource, so a hit is the same frame rather than an unpickled copy)
+@REGISTRY.cache_calls("load_throughput_trend")
+@st.cache_resource(ttl=60)
+@REGISTRY.cache_misses("load_throughput_trend")
+def load_throughput_trend(plant_name, area_line_keys):
+    since = time.time() - TREND_WINDOW_HOURS * 3600
+    return get_kpi_history(plant_name).throughput(area_line_keys, since, bucket_seconds=TREND_BUCKET_SECONDS)
+
+# Photo directory and thumbnail cache of a plant
+def operator_image_dirs(plant_name):
+    image_dir = PLANTS[plant_name].image_dir
+    if image_dir is None:
+        return OPERATOR_IMAGE_DIR, THUMBNAIL_CACHE_DIR
+    return image_dir, os.path.join(image_dir, ".thumbnails")
+
+# Operator photo manifest: built from the image directory at startup and rescanned
+# every few minutes, so roster changes are just added/removed files. Thumbnails are
+# generated here once, so no viewer pays for the first resize.
+@REGISTRY.cache_calls("get_operator_manifest")
+@st.cache_resource(ttl=OPERATOR_MANIFEST_TTL_SECONDS)
+@REGISTRY.cache_misses("get_operator_manifest")
+def get_operator_manifest(plant_name):
+    image_dir, thumbnail_dir = operator_image_dirs(plant_name)
+    manifest = build_manifest(image_dir, overrides=PLANTS[plant_name].roster)
+    for images_and_names in manifest.values():
+        for img_path, _ in images_and_names:
+            if img_path is not None:
+                try:
+                    make_thumbnail(img_path, thumbnail_dir)
+                except Exception:
+                    pass # Reported as "Img Fail" when the line is shown
+    return manifest
+
+# Thumbnail bytes (bounded in-memory LRU over the on-disk thumbnail cache, shared
+# by every session). mtime is part of the key so a replaced photo is picked up.
+@REGISTRY.cache_calls("load_operator_thumbnail")
+@st.cache_resource(max_entries=THUMBNAIL_MEMORY_ENTRIES)
+@REGISTRY.cache_misses("load_operator_thumbnail")
+def load_operator_thumbnail(img_path, mtime, thumbnail_dir=THUMBNAIL_CACHE_DIR):
+    return make_thumbnail(img_path, thumbnail_dir)
 
 # CACHED Function to display OPERATORS
-@st.cache_data(ttl=None) 
-def display_operators_cacheable(area_line_key):
+@REGISTRY.cache_calls("display_operators_cacheable")
+@st.cache_data(ttl=OPERATOR_MANIFEST_TTL_SECONDS) 
+@REGISTRY.cache_misses("display_operators_cacheable")
+def display_operators_cacheable(plant_name, area_line_key):
     st.markdown("#### 👷 Operators")
     
-    images_and_names = EMPLOYEE_IMAGES.get(area_line_key, [])
+    images_and_names = get_operator_manifest(plant_name).get(area_line_key, [])
+    thumbnail_dir = operator_image_dirs(plant_name)[1]
 
     if images_and_names:
         num_cols = min(len(images_and_names), 4)
@@ -209,7 +453,8 @@ def display_operators_cacheable(area_line_key):
         for i, (img_path, emp_name) in enumerate(images_and_names):
             if i < num_cols: 
                 try:
-                    cols[i].image(img_path, caption=emp_name, width=70) 
+                    img_bytes = load_operator_thumbnail(img_path, os.path.getmtime(img_path), thumbnail_dir)
+                    cols[i].image(img_bytes, caption=emp_name, width=70) 
                 except Exception:
                     cols[i].warning("Img Fail") 
 
@@ -220,7 +465,7 @@ def display_operators_cacheable(area_line_key):
 
 
 # Function to display the KPI data for a single sub-line
-def display_sub_line(line_df, area_name, line_name):
+def display_sub_line(plant_name, line_df, area_name, line_name):
     if line_df.empty:
         st.warning(f"No data to display for {area_name} - {line_name}.")
         return
@@ -241,15 +486,7 @@ def display_sub_line(line_df, area_name, line_name):
         delta_value = None
 
     # Get the rounded float value (1.0 for 100%)
-    production_rate_value = row['Production rate Display']
-    
-    # 🌟 NEW: Determine the correct display string based on the value
-    if production_rate_value == 1.0:
-        # If the value is 1.0, show "100%" without decimals
-        production_rate_display_string = "100%"
-    else:
-        # Otherwise, use the standard f-string formatting with one decimal place
-        production_rate_display_string = f"{production_rate_value:.1%}"
+    production_rate_display_string = format_production_rate(row['Production rate Display'])
     with metric_cols[0]:
         st.metric("Target", row["Planned Sleeves"])
         # 🌟 CORRECTED: Pass the rounded float to st.metric and use the f-string formatter.
@@ -259,10 +496,11 @@ def display_sub_line(line_df, area_name, line_name):
         st.metric("Completed", built)
         st.metric("Pending", row["Not Produced Sleeves"]) 
 
-    display_operators_cacheable(area_line_key)
+    with REGISTRY.timer('operator_images'):
+        display_operators_cacheable(plant_name, area_line_key)
 
 # 🌟 Display Recent Scanned Table
-def display_recent_scanned_table(df_scanned_line, process_name, count=4):
+def display_recent_scanned_table(df_scanned_line, process_name, count=RECENT_SCANS_SHOWN):
     st.markdown(f"#### {process_name}")
     
     if df_scanned_line.empty:
@@ -274,9 +512,7 @@ def display_recent_scanned_table(df_scanned_line, process_name, count=4):
         )
         return
 
-    df_display = df_scanned_line.tail(count).copy()
-    
-    df_display = df_display[['Sleeve Name', 'Time Taken']]
+    df_display = df_scanned_line.tail(count)[['Sleeve Name', 'Time Taken']]
     
     st.dataframe(
         df_display,
@@ -285,48 +521,258 @@ def display_recent_scanned_table(df_scanned_line, process_name, count=4):
     )
 
 
-# ⭐ EDITED: Display Dashboard for Selected Area
-def display_area_kpis_only(df_area_kpi, area_name):
-    line_values = df_area_kpi["Line"].unique()
+# ⏱️ Rolling cycle-time stats of one line/process (maintained as scans arrive)
+def display_cycle_time_stats(plant_name, line_name, process):
+    stats = get_cycle_time_stats(plant_name).summary((line_name, process))
+    if stats['count'] == 0:
+        return
+
+    st.caption(
+        f"Last {CYCLE_TIME_WINDOW_SECONDS // 60} min · {stats['count']} scans · {stats['per_hour']:.0f}/h · "
+        f"mean {format_seconds(stats['mean'])} · p50 {format_seconds(stats['p50'])} · p95 {format_seconds(stats['p95'])}"
+    )
+
+
+# ⭐ EDITED: Display Dashboard for Selected Area (row lookups come from the snapshot index)
+def display_area_kpis_only(plant_name, index, area_name):
+    df_area_kpi = index.area(area_name)
+    df_building_kpi = index.line(area_name, "Building")
+    df_curing_kpi = index.line(area_name, "Curing")
     
-    is_split_view = ("Building" in line_values) and ("Curing" in line_values) and area_name.startswith("Line-")
+    is_split_view = (not df_building_kpi.empty) and (not df_curing_kpi.empty) and area_name.startswith("Line-")
 
     if is_split_view:
         col_building, col_curing = st.columns([1, 1]) 
-        
-        df_building_kpi = df_area_kpi[df_area_kpi["Line"] == "Building"]
-        df_curing_kpi = df_area_kpi[df_area_kpi["Line"] == "Curing"]
 
         with col_building:
             if not df_building_kpi.empty:
-                display_sub_line(df_building_kpi, area_name, "Building")
+                display_sub_line(plant_name, df_building_kpi, area_name, "Building")
             else:
                 st.warning(f"No 'Building' KPI data found for {area_name}.")
 
         with col_curing:
             if not df_curing_kpi.empty:
-                display_sub_line(df_curing_kpi, area_name, "Curing")
+                display_sub_line(plant_name, df_curing_kpi, area_name, "Curing")
             else:
                 st.warning(f"No 'Curing' KPI data found for {area_name}.")
         
     else:
         st.warning(f"Area **{area_name}** does not have a 'Building/Curing' split or data is missing. Displaying single line metrics.")
         
-        df_single = df_area_kpi.copy() 
+        df_single = df_area_kpi
         
         if not df_single.empty:
-            display_sub_line(df_single, area_name, df_single.iloc[0]['Line']) 
+            display_sub_line(plant_name, df_single, area_name, df_single.iloc[0]['Line']) 
         else:
             st.error(f"No production data found for {area_name}.")
 
 
+# 🧱 Wall view: every area's Building/Curing tiles as one HTML grid (wall_view.py).
+# Built once per snapshot version and plant and then sent as is to every wall
+# screen, so a tick costs one markdown element instead of four metrics per line per area.
+@REGISTRY.cache_calls("wall_grid_html")
+@st.cache_resource(max_entries=2 * len(PLANTS))
+@REGISTRY.cache_misses("wall_grid_html")
+def wall_grid_html(plant_name, version, _index):
+    return build_wall_grid_html(_index, card_min_width=WALL_CARD_MIN_WIDTH)
+
+
+# 📈 Trend chart: sleeves built per bucket for each line of the area
+def display_throughput_trend(plant_name, index, area_name):
+    area_line_keys = tuple(index.area(area_name)["Area_Line_Key"].tolist()) if not index.area(area_name).empty else ()
+    if not area_line_keys:
+        return
+
+    st.markdown(f"#### 📈 Sleeves Built per {TREND_BUCKET_SECONDS // 60} min")
+    df_trend = load_throughput_trend(plant_name, area_line_keys)
+    if df_trend.empty:
+        st.caption("Collecting history…")
+        return
+
+    df_trend = df_trend.rename(columns=lambda key: key.split(" - ")[-1])
+    st.line_chart(df_trend, height=180)
+
+# ⏳ Staleness badge: saved data from before a restart, or data that stopped updating
+def display_staleness_badge(snapshot):
+    if snapshot.fetched_at is None:
+        return
+    age_minutes = int(snapshot.age // 60)
+    fetched = time.strftime('%H:%M', time.localtime(snapshot.fetched_at))
+
+    if snapshot.restored:
+        text = f"⏳ Saved data from {fetched} ({age_minutes} min old), loading live data…"
+    elif snapshot.age > STALE_AFTER_SECONDS:
+        text = f"⏳ Data from {fetched} ({age_minutes} min old)"
+    else:
+        return
+
+    st.markdown(
+        f"""
+        <span style="background-color: #F07D02; color: #010712; border-radius: 0.8rem; padding: 2px 10px; font-weight: 600;">
+            {text}
+        </span>
+        """,
+        unsafe_allow_html=True
+    )
+
+# Refresh errors / empty sheet notice (shown above the KPIs)
+def display_snapshot_status(refresher, snapshot):
+    display_staleness_badge(snapshot)
+    if refresher.last_error is not None:
+        if snapshot.kpi.empty:
+            st.error(f"Error loading data from Google Sheet. Check Sheet ID/Name/Permissions. Error: {refresher.last_error}")
+        else:
+            retry_note = ""
+            if refresher.scheduler is not None:
+                scheduler_state = refresher.scheduler.state()
+                retry_note = f" Next attempt in {scheduler_state['next_fetch_in']:.0f} s (breaker {scheduler_state['breaker']})."
+            st.warning(f"Showing last good data from {time.strftime('%H:%M:%S', time.localtime(snapshot.fetched_at))}. Latest refresh failed: {refresher.last_error}.{retry_note}")
+    elif snapshot.kpi.empty and snapshot.fetched_at is not None:
+        st.warning("Google Sheet is empty or only contains headers.")
+
+
+# Live regions: with LIVE_REGIONS on, these rerun on their own timer as fragments
+# and the rest of the page (sidebar, logos, fullscreen button, CSS) is only sent
+# on a full rerun, i.e. once per session plus when another area is picked.
+# Without fragment support the whole script reruns via st_autorefresh as before.
+USE_LIVE_REGIONS = LIVE_REGIONS and hasattr(st, "fragment")
+
+def live_region(func):
+    @functools.wraps(func)
+    def region(*args):
+        touch_session()
+        with REGISTRY.timer(f"render_{func.__name__}"):
+            return run_profiled(func.__name__, func, *args)
+
+    if USE_LIVE_REGIONS:
+        return st.fragment(run_every=LIVE_REFRESH_SECONDS)(region)
+    return region
+
+# ⚡ LIVE: KPI tiles for the selected area
+@live_region
+def live_kpi_region(plant_name, selected_area):
+    snapshot = get_plant_refreshers().snapshot(plant_name, timeout=0)
+    display_snapshot_status(get_snapshot_refresher(plant_name), snapshot)
+
+    if selected_area:
+        display_area_kpis_only(plant_name, snapshot.index, selected_area)
+
+        if SHOW_TRENDS:
+            display_throughput_trend(plant_name, snapshot.index, selected_area)
+
+# ⚡ LIVE: Clock and recent scans for the selected area
+@live_region
+def live_scans_region(plant_name, selected_area):
+    st.markdown(
+        f"""
+        <div style="text-align: right; margin-top: 5px;">
+            <p style="font-size: 15px; margin: 0; line-height: 1.5; color: #aaa;">
+                <span style="color: white; font-size: 70px;">{time.strftime('%H:%M %p')}</span>
+            </p>
+            <p style="font-size: 15px; margin: 0; line-height: 1.3; color: #aaa;">
+                <span style="color: white; font-size: 25px;">{time.strftime('%d-%B-%Y')}</span>
+            </p>
+            
+        </div>
+        """,
+        unsafe_allow_html=True
+    )
+    st.markdown("<br><br>", unsafe_allow_html=True)
+
+    if selected_area:
+        index = get_plant_refreshers().snapshot(plant_name, timeout=0).index
+        display_recent_scanned_table(index.recent_scans(selected_area, "Building"), "Recently Scanned Building") 
+        display_cycle_time_stats(plant_name, selected_area, "Building")
+        display_recent_scanned_table(index.recent_scans(selected_area, "Curing"), "Recently Scanned Curing")
+        display_cycle_time_stats(plant_name, selected_area, "Curing")
+
+
+# ⚡ LIVE: Clock and every area of the plant in one grid (?view=wall)
+@live_region
+def live_wall_region(plant_name):
+    st.markdown(
+        f"""<p style="text-align: right; margin: 0; color: white;">
+        <span style="font-size: 44px;">{time.strftime('%H:%M %p')}</span>
+        <span style="font-size: 20px; margin-left: 12px;">{time.strftime('%d-%B-%Y')}</span></p>""",
+        unsafe_allow_html=True
+    )
+
+    snapshot = get_plant_refreshers().snapshot(plant_name, timeout=0)
+    display_snapshot_status(get_snapshot_refresher(plant_name), snapshot)
+    if snapshot.index.areas:
+        st.markdown(wall_grid_html(plant_name, snapshot.version, snapshot.index), unsafe_allow_html=True)
+
+
+# ⏳ Placeholder while a plant's first fetch is still running past the rerun
+# deadline: checks every second and reruns the page (sidebar areas included)
+# once the fetch is done, successful or not
+def first_fetch_placeholder(plant_name):
+    if not get_snapshot_refresher(plant_name).refreshing:
+        st.rerun()
+    st.info("⏳ Loading live data…")
+
+if USE_LIVE_REGIONS:
+    first_fetch_placeholder = st.fragment(run_every=1)(first_fetch_placeholder)
+
+
+# 🩺 Hidden diagnostics panel (open the app with ?diagnostics=1)
+def display_diagnostics():
+    with st.expander("🩺 Diagnostics", expanded=True):
+        stages = pd.DataFrame.from_dict(REGISTRY.stage_summary(), orient='index')
+        if not stages.empty:
+            for column in ('mean', 'p50', 'p95'):
+                stages[column] = (stages[column] * 1000).round(2)
+            st.markdown("**Stage timings (ms)**")
+            st.dataframe(stages, use_container_width=True)
+
+        caches = pd.DataFrame.from_dict(REGISTRY.cache_summary(), orient='index')
+        if not caches.empty:
+            st.markdown("**Caches**")
+            st.dataframe(caches, use_container_width=True)
+
+        gauges = {
+            name + (str(dict(labels)) if labels else ''): value
+            for name, (_, series) in REGISTRY.gauge_values().items()
+            for labels, value in series.items()
+        }
+        counters = {'sheets_requests_total': REGISTRY.counter('sheets_requests_total')}
+        for result in ('changed', 'unchanged', 'followed', 'pushed', 'error'):
+            counters[f"snapshot_refreshes_total{{result={result}}}"] = REGISTRY.counter('snapshot_refreshes_total', result=result)
+        st.markdown("**Sheets, snapshot, sessions**")
+        st.json({**gauges, **counters, 'sheets_errors_total': sum(
+            REGISTRY.counter('sheets_errors_total', kind=kind) for kind in ('quota', 'server', 'network', 'config', 'unknown')
+        )})
+
+
 # Main App
 def main():
-    df_kpi = load_data() 
-    df_scanned_full = load_recent_scanned_data() 
+    touch_session()
+    register_gauges()
+    plant_refreshers = get_plant_refreshers()
+
+    if METRICS_PORT:
+        try:
+            get_metrics_server()
+        except OSError as e:
+            st.sidebar.warning(f"Metrics endpoint is off: port {METRICS_PORT} is not available ({e})")
+
+    scan_ingest = None
+    if SCAN_INGEST_PORT:
+        try:
+            scan_ingest = get_scan_ingest()
+        except OSError as e:
+            st.sidebar.warning(f"Scan ingest is off: port {SCAN_INGEST_PORT} is not available ({e})")
+        except ValueError as e:
+            st.sidebar.warning(f"Scan ingest is off: {e} (set SCAN_INGEST_TOKEN)")
+
+    snapshot_api = None
+    if SNAPSHOT_API_PORT:
+        try:
+            snapshot_api = get_snapshot_api()
+        except OSError as e:
+            st.sidebar.warning(f"Kiosk API is off: port {SNAPSHOT_API_PORT} is not available ({e})")
     
     selected_area = None
-    area_names = df_kpi["Area"].unique().tolist() if not df_kpi.empty else []
 
     # Sidebar 
     with st.sidebar:
@@ -337,22 +783,97 @@ def main():
             st.warning("Logo not found.")
 
         st.markdown("---")
-        st.subheader("Select Production Area")
-
-        selected_area = option_menu(
-            menu_title=None,
-            options=area_names,
-            icons=['map'] * len(area_names),
-            default_index=0,
-            styles={
-                "container": {"padding": "0!important"},
-                "nav-link-selected": {"background-color": "#F07D02"},
-                "icon": {"color": "orange", "font-size": "18px"},
-            }
-        )
+
+        # 🏭 Plant (?plant=<name> pins a TV to one plant)
+        plant_names = plant_refreshers.names
+        plant_name = st.query_params.get("plant")
+        if plant_name not in PLANTS:
+            plant_name = FIRST_PLANT
+        if len(plant_names) > 1:
+            plant_name = st.selectbox("Plant", plant_names, index=plant_names.index(plant_name))
+            if st.query_params.get("plant") != plant_name:
+                st.query_params["plant"] = plant_name
+
+        # Only the first fetch of a plant can block here; past the deadline the page is
+        # painted without it and first_fetch_placeholder fills it in when it arrives
+        snapshot = plant_refreshers.snapshot(plant_name, timeout=FIRST_PAINT_DEADLINE_SECONDS if USE_LIVE_REGIONS else None)
+        still_loading = snapshot.fetched_at is None and get_snapshot_refresher(plant_name).refreshing
+        if still_loading:
+            REGISTRY.inc('first_paint_deadline_missed_total')
+        area_names = snapshot.index.areas
+
+        # 🧱 All areas in one grid instead of one area per screen (?view=wall)
+        wall_view = st.toggle("Wall view (all areas)", value=st.query_params.get("view") == "wall")
+        if wall_view != (st.query_params.get("view") == "wall"):
+            if wall_view:
+                st.query_params["view"] = "wall"
+            else:
+                del st.query_params["view"]
+
+        if wall_view:
+            st.caption(f"Showing all {len(area_names)} areas.")
+        elif area_names:
+            st.subheader("Select Production Area")
+            # ?area=<name> opens a TV on one area
+            requested_area = st.query_params.get("area")
+            selected_area = option_menu(
+                menu_title=None,
+                options=area_names,
+                icons=['map'] * len(area_names),
+                default_index=area_names.index(requested_area) if requested_area in area_names else 0,
+                key=f"area_menu_{PLANTS[plant_name].key}",
+                styles={
+                    "container": {"padding": "0!important"},
+                    "nav-link-selected": {"background-color": "#F07D02"},
+                    "icon": {"color": "orange", "font-size": "18px"},
+                }
+            )
+        else:
+            st.subheader("Select Production Area")
+            st.caption("No areas loaded yet.")
 
         st.markdown("---")
 
+        if len(plant_names) > 1:
+            for name, (age, error) in plant_refreshers.status().items():
+                state = "no data yet" if age is None else f"{age:.0f} s old"
+                st.caption(f"{'⚠️' if error is not None else '✅'} {name}: {state}")
+
+        try:
+            source = get_data_source(plant_name)
+        except Exception:
+            source = None # The plant's refresh error is shown with its KPIs
+        if source is not None and source.total_round_trips:
+            fetch_stats = source.last_stats
+            st.caption(
+                f"Last refresh: {fetch_stats['round_trips']} request(s), "
+                f"{fetch_stats['bytes'] / 1024:.1f} KB, {fetch_stats['seconds']:.2f} s"
+            )
+
+        shared = get_snapshot_refresher(plant_name).shared
+        if shared is not None:
+            st.caption(f"Replica: {'publisher' if shared.is_publisher else 'reading shared snapshots'} (pid {os.getpid()})")
+
+        scheduler_state = get_fetch_scheduler(plant_name).state()
+        st.caption(
+            f"Sheets quota: {scheduler_state['requests_last_minute']}/{scheduler_state['budget_per_minute']:.0f} per min · "
+            f"every {scheduler_state['interval']:.0f} s · breaker {scheduler_state['breaker']}"
+        )
+
+        if scan_ingest is not None:
+            st.caption(
+                f"Scan ingest: port {scan_ingest.server.port} · {scan_ingest.log.appended} received · "
+                f"{scan_ingest.log.backlog} waiting for Sheets"
+            )
+            if scan_ingest.mirror.last_error is not None:
+                st.caption(f"Sheets mirror is retrying: {scan_ingest.mirror.last_error}")
+
+        if snapshot_api is not None:
+            st.caption(
+                f"Kiosk API: port {snapshot_api.port} · {snapshot_api.requests} requests · "
+                f"{snapshot_api.not_modified} not modified"
+            )
+
         import streamlit.components.v1 as components
         components.html(
                 """
@@ -386,54 +907,39 @@ def main():
     
     with st.container(): 
         
-        main_content_col, recent_scans_col = st.columns([0.7, 0.3]) 
+        if wall_view:
+            plant_prefix = f"{plant_name} · " if len(PLANTS) > 1 else ""
+            st.title(f"🏭 {plant_prefix}Production Floor")
+            if still_loading:
+                first_fetch_placeholder(plant_name)
+            live_wall_region(plant_name)
+        else:
+            main_content_col, recent_scans_col = st.columns([0.7, 0.3]) 
         
         
-        # LEFT ZONE (TITLE, DATE/TIME, & KPIs)
-        with main_content_col:
-            title_col, logo_col = st.columns([0.80, 0.20]) 
-
-            with title_col:
-                if selected_area:
-                     # Adjust width as needed
-                    st.title(f"🏭 {selected_area} Production Overview") 
-                else:
-                    st.title("🏭 Production Dashboard")
-
-            if selected_area:
-                df_area_kpi = df_kpi[df_kpi["Area"] == selected_area]
-                
-                display_area_kpis_only(df_area_kpi, selected_area)
-                
-            with logo_col:
-                  st.image("urbmlogo.jpg", width=250) # Keep or adjust width as needed
-                  
-        # RIGHT ZONE (RECENT SCANS)
-        with recent_scans_col:
-            
-            st.markdown(
-                f"""
-                <div style="text-align: right; margin-top: 5px;">
-                    <p style="font-size: 15px; margin: 0; line-height: 1.5; color: #aaa;">
-                        <span style="color: white; font-size: 70px;">{time.strftime('%H:%M %p')}</span>
-                    </p>
-                    <p style="font-size: 15px; margin: 0; line-height: 1.3; color: #aaa;">
-                        <span style="color: white; font-size: 25px;">{time.strftime('%d-%B-%Y')}</span>
-                    </p>
-                    
-                </div>
-                """,
-                unsafe_allow_html=True
-            )
-            st.markdown("<br><br>", unsafe_allow_html=True)
+            # LEFT ZONE (TITLE, DATE/TIME, & KPIs)
+            with main_content_col:
+                title_col, logo_col = st.columns([0.80, 0.20]) 
 
-            if selected_area:
-                df_scanned_area = df_scanned_full[df_scanned_full["Line Name"] == selected_area]
+                with title_col:
+                    plant_prefix = f"{plant_name} · " if len(PLANTS) > 1 else ""
+                    if selected_area:
+                         # Adjust width as needed
+                        st.title(f"🏭 {plant_prefix}{selected_area} Production Overview") 
+                    else:
+                        st.title(f"🏭 {plant_prefix}Production Dashboard")
 
-                df_scanned_building = df_scanned_area[df_scanned_area["Process"] == "Building"]
-                df_scanned_curing = df_scanned_area[df_scanned_area["Process"] == "Curing"]
-                display_recent_scanned_table(df_scanned_building, "Recently Scanned Building", count=4) 
-                display_recent_scanned_table(df_scanned_curing, "Recently Scanned Curing", count=4)
+                if still_loading:
+                    first_fetch_placeholder(plant_name)
+
+                live_kpi_region(plant_name, selected_area)
+                
+                with logo_col:
+                      st.image("urbmlogo.jpg", width=250) # Keep or adjust width as needed
+                  
+            # RIGHT ZONE (RECENT SCANS)
+            with recent_scans_col:
+                live_scans_region(plant_name, selected_area)
 
         # Custom CSS
         st.markdown(
@@ -568,8 +1074,13 @@ def main():
             unsafe_allow_html=True
         )
         
-        st_autorefresh(interval=20 * 1000, key="production_dashboard_refresh")
+        if not USE_LIVE_REGIONS:
+            st_autorefresh(interval=LIVE_REFRESH_SECONDS * 1000, key="production_dashboard_refresh")
+
+    if st.query_params.get("diagnostics") == "1":
+        display_diagnostics()
     
 # Run App
 if __name__ == "__main__":
-    main()
+    with REGISTRY.timer('render_page'):
+        run_profiled("page", main)
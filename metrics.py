@@ -0,0 +1,247 @@
+import functools
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Upper bounds (seconds) of the stage timing histogram buckets
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+RECENT_SAMPLES = 512 # Per stage, for the p50/p95 of the diagnostics panel
+
+PREFIX = 'lpt_'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _label_text(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+def _percentile(samples, q):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+# Process-wide counters, stage timings and gauges, rendered in the Prometheus
+# text format. Like a Prometheus client's default registry it lives at module
+# level (REGISTRY below), so the refresher thread, the HTTP side servers and
+# every rerun of the script record into the same place.
+#
+#   counters    inc(name, **labels)
+#   timings     with timer(stage): ...  -> histogram lpt_stage_seconds{stage=...}
+#   gauges      gauge(name, callback)   -> read when scraped; the callback returns
+#               a number or {label tuple: number}
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._stages = {} # labels -> [bucket counts, sum, count, recent samples]
+        self._gauges = {}
+        self._help = {}
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            entry = self._stages.get(stage)
+            if entry is None:
+                entry = self._stages[stage] = [[0] * len(STAGE_BUCKETS), 0.0, 0, deque(maxlen=RECENT_SAMPLES)]
+            for position, bound in enumerate(STAGE_BUCKETS):
+                if seconds <= bound:
+                    entry[0][position] += 1
+            entry[1] += seconds
+            entry[2] += 1
+            entry[3].append(seconds)
+
+    @contextmanager
+    def timer(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def timed(self, stage):
+        def decorate(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(stage):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    # kind "counter" for values that only go up (totals kept by other objects)
+    def gauge(self, name, callback, help_text='', kind='gauge'):
+        with self._lock:
+            self._gauges[name] = (callback, kind)
+            if help_text:
+                self._help[name] = help_text
+
+    # Hit/miss counting around a Streamlit cache:
+    #
+    #   @REGISTRY.cache_calls("thumbnail")     every call
+    #   @st.cache_data(...)
+    #   @REGISTRY.cache_misses("thumbnail")    only runs when the cache misses
+    #   def load_thumbnail(...): ...
+    def cache_calls(self, name):
+        return self._counting('cache_requests_total', name)
+
+    def cache_misses(self, name):
+        return self._counting('cache_misses_total', name)
+
+    def _counting(self, counter, name):
+        def decorate(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                self.inc(counter, function=name)
+                return func(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    # Forget the stage timings so far (counters and gauges are kept), e.g. after a warm-up
+    def reset_stages(self):
+        with self._lock:
+            self._stages = {}
+
+    def counter(self, name, **labels):
+        with self._lock:
+            return self._counters.get((name, tuple(sorted(labels.items()))), 0)
+
+    # Stage -> count, mean, p50, p95 (seconds), for the diagnostics panel
+    def stage_summary(self):
+        with self._lock:
+            stages = {stage: (entry[1], entry[2], list(entry[3])) for stage, entry in self._stages.items()}
+        return {
+            stage: {
+                'count': count,
+                'mean': total / count if count else None,
+                'p50': _percentile(recent, 0.5),
+                'p95': _percentile(recent, 0.95),
+            }
+            for stage, (total, count, recent) in sorted(stages.items())
+        }
+
+    # Function -> requests, misses, hit ratio
+    def cache_summary(self):
+        with self._lock:
+            counters = dict(self._counters)
+        functions = sorted({dict(labels)['function'] for (name, labels) in counters if name == 'cache_requests_total'})
+        summary = {}
+        for function in functions:
+            requests = counters.get(('cache_requests_total', (('function', function),)), 0)
+            misses = counters.get(('cache_misses_total', (('function', function),)), 0)
+            summary[function] = {
+                'requests': requests,
+                'misses': misses,
+                'hit_ratio': 1 - misses / requests if requests else None,
+            }
+        return summary
+
+    def gauge_values(self):
+        with self._lock:
+            gauges = dict(self._gauges)
+        values = {}
+        for name, (callback, kind) in sorted(gauges.items()):
+            try:
+                value = callback()
+            except Exception:
+                continue
+            values[name] = (kind, value if isinstance(value, dict) else {(): value})
+        return values
+
+    def render_prometheus(self):
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            stages = {stage: (list(entry[0]), entry[1], entry[2]) for stage, entry in sorted(self._stages.items())}
+            help_texts = dict(self._help)
+
+        typed = set()
+        for (name, labels), value in counters:
+            if name not in typed:
+                lines.append(f"# TYPE {PREFIX}{name} counter")
+                typed.add(name)
+            lines.append(f"{PREFIX}{name}{_label_text(labels)} {value}")
+
+        if stages:
+            lines.append(f"# HELP {PREFIX}stage_seconds Time spent per stage (fetch, parse, index, render, ...)")
+            lines.append(f"# TYPE {PREFIX}stage_seconds histogram")
+        for stage, (buckets, total, count) in stages.items():
+            for bound, bucket_count in zip(STAGE_BUCKETS, buckets):
+                lines.append(f"{PREFIX}stage_seconds_bucket{_label_text((('stage', stage), ('le', bound)))} {bucket_count}")
+            lines.append(f"{PREFIX}stage_seconds_bucket{_label_text((('stage', stage), ('le', '+Inf')))} {count}")
+            lines.append(f"{PREFIX}stage_seconds_sum{_label_text((('stage', stage),))} {total}")
+            lines.append(f"{PREFIX}stage_seconds_count{_label_text((('stage', stage),))} {count}")
+
+        for name, (kind, series) in self.gauge_values().items():
+            if name in help_texts:
+                lines.append(f"# HELP {PREFIX}{name} {help_texts[name]}")
+            lines.append(f"# TYPE {PREFIX}{name} {kind}")
+            for labels, value in sorted(series.items()):
+                if value is None or (isinstance(value, float) and math.isnan(value)):
+                    continue
+                lines.append(f"{PREFIX}{name}{_label_text(labels)} {float(value)}")
+
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Metrics()
+
+
+# Sessions seen (script run or live-region tick) within the last `timeout` seconds
+class ActiveSessions:
+    def __init__(self, timeout=60):
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._last_seen = {}
+
+    def touch(self, session_id):
+        with self._lock:
+            self._last_seen[session_id] = time.time()
+
+    def count(self):
+        cutoff = time.time() - self.timeout
+        with self._lock:
+            for session_id in [s for s, seen in self._last_seen.items() if seen < cutoff]:
+                del self._last_seen[session_id]
+            return len(self._last_seen)
+
+
+# GET /metrics on its own port, for Prometheus to scrape
+class MetricsServer:
+    def __init__(self, port, registry=REGISTRY, host="0.0.0.0"):
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0].rstrip('/') != '/metrics':
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                payload = registry.render_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="metrics", daemon=True)
+        self._thread.start()
+
+    @property
+    def port(self):
+        return self.httpd.server_address[1]
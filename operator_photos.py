@@ -0,0 +1,104 @@
+import io
+import os
+import re
+
+try:  # Pillow ships with streamlit; without it the original files are served
+    from PIL import Image, ImageOps, features
+except ImportError:
+    Image = None
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp'}
+# Line-<n>-<Process>-<Name>.<ext>, e.g. "Line-MMV-Building-Chamidu.JPG"
+PHOTO_FILENAME = re.compile(r'^(?P<line>Line-[^-]+)-(?P<process>Building|Curing)-(?P<name>.+)$', re.IGNORECASE)
+
+THUMBNAIL_SIZE = 140 # px on the long side: 2x the 70 px the dashboard shows, sharp on HiDPI TVs
+THUMBNAIL_QUALITY = 80
+
+
+# Map "Area - Line" -> [(file path, caption)] for the photos in image_dir.
+#
+# Photos are picked up from the Line-<n>-<Process>-<Name> file name convention,
+# so adding or removing an operator is just adding or removing a file. Entries
+# in `overrides` ("Area - Line" -> [(file name, caption)], EMPLOYEE_IMAGES) sit
+# on top of that: the caption replaces the name from the file, and a photo
+# listed under other lines moves there (it shows on its file name's line only
+# if that line lists it too). A caption of None hides the photo. File names
+# are matched case-insensitively ("Samuel.jpg" finds "Samuel.JPG"); entries
+# for files that are gone are ignored.
+def build_manifest(image_dir, overrides=None):
+    files = {}
+    photos = [] # (path, line from the file name or None, name from the file name)
+    for entry in sorted(os.scandir(image_dir), key=lambda e: e.name.lower()):
+        stem, ext = os.path.splitext(entry.name)
+        if not entry.is_file() or ext.lower() not in IMAGE_EXTENSIONS:
+            continue
+        files[entry.name.lower()] = entry.path
+
+        match = PHOTO_FILENAME.match(stem)
+        if match:
+            key = f"{match.group('line')} - {match.group('process').capitalize()}"
+            photos.append((entry.path, key, match.group('name')))
+        else:
+            photos.append((entry.path, None, stem))
+
+    captions = {}
+    placed = {} # path -> lines listed in the overrides
+    hidden = set()
+    for key, images_and_names in (overrides or {}).items():
+        for file_name, caption in images_and_names:
+            path = files.get(file_name.lower())
+            if path is None:
+                continue
+            if caption is None:
+                hidden.add(path)
+                continue
+            captions[path] = caption
+            lines = placed.setdefault(path, [])
+            if key not in lines:
+                lines.append(key)
+
+    roster = {}
+    for path, key, name in photos:
+        if path in hidden:
+            continue
+        for line_key in placed.get(path, [key] if key else []):
+            roster.setdefault(line_key, []).append((path, captions.get(path, name)))
+    return roster
+
+
+def thumbnail_format():
+    if Image is not None and features.check('webp'):
+        return 'WEBP', '.webp'
+    return 'JPEG', '.jpg'
+
+
+# Small re-encoded copy of a photo, cached on disk in cache_dir and
+# keyed by size + mtime, so a replaced photo gets a new thumbnail.
+# Returns the thumbnail bytes (or the original bytes when Pillow is missing).
+def make_thumbnail(path, cache_dir, size=THUMBNAIL_SIZE):
+    if Image is None:
+        with open(path, 'rb') as f:
+            return f.read()
+
+    image_format, extension = thumbnail_format()
+    stat = os.stat(path)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    thumb_path = os.path.join(cache_dir, f"{stem}-{size}-{int(stat.st_mtime)}-{stat.st_size}{extension}")
+
+    if os.path.exists(thumb_path):
+        with open(thumb_path, 'rb') as f:
+            return f.read()
+
+    with Image.open(path) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((size, size))
+        buffer = io.BytesIO()
+        image.convert('RGB').save(buffer, format=image_format, quality=THUMBNAIL_QUALITY)
+    data = buffer.getvalue()
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f"{thumb_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, thumb_path)
+    return data
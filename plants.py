@@ -0,0 +1,101 @@
+import json
+import os
+import re
+
+
+# One spreadsheet the dashboard serves: a plant with its own sheets and operator roster
+class Plant:
+    def __init__(self, name, spreadsheet_id, kpi_sheet="Calculation", scans_sheet="Recent Scanned",
+                 roster=None, image_dir=None, local_db=None):
+        self.name = name
+        self.spreadsheet_id = spreadsheet_id
+        self.kpi_sheet = kpi_sheet
+        self.scans_sheet = scans_sheet
+        self.roster = roster or {} # Photo overrides: "Area - Line" -> [(file name, caption or None)], like EMPLOYEE_IMAGES
+        self.image_dir = image_dir
+        self.local_db = local_db
+
+    # File-name-safe form of the name, for per-plant caches
+    @property
+    def key(self):
+        return re.sub(r'[^a-z0-9]+', '-', self.name.lower()).strip('-') or 'plant'
+
+
+# Plants listed in a JSON config file, in file order:
+#
+#   {"plants": [
+#       {"name": "Colombo", "spreadsheet_id": "1tqx...",
+#        "kpi_sheet": "Calculation", "scans_sheet": "Recent Scanned",
+#        "image_dir": "photos/colombo",
+#        "roster": {"Line-1 - Building": [["Line-1-Building-Ian.jpg", "Ian"]]}},
+#       ...]}
+#
+# Only name and spreadsheet_id are required; relative image_dir / local_db
+# paths are relative to the config file. Without a config file the dashboard
+# serves `default` alone.
+def load_plants(path, default):
+    if not os.path.exists(path):
+        return {default.name: default}
+
+    with open(path, encoding='utf-8') as f:
+        config = json.load(f)
+
+    base_dir = os.path.dirname(os.path.abspath(path))
+    plants = {}
+    for entry in config.get('plants', []):
+        if 'name' not in entry or 'spreadsheet_id' not in entry:
+            raise ValueError(f"{path}: every plant needs a name and a spreadsheet_id ({entry})")
+        plant = Plant(
+            entry['name'],
+            entry['spreadsheet_id'],
+            kpi_sheet=entry.get('kpi_sheet', default.kpi_sheet),
+            scans_sheet=entry.get('scans_sheet', default.scans_sheet),
+            roster={key: [tuple(image) for image in images] for key, images in entry.get('roster', {}).items()},
+            image_dir=os.path.join(base_dir, entry['image_dir']) if entry.get('image_dir') else None,
+            local_db=os.path.join(base_dir, entry['local_db']) if entry.get('local_db') else None,
+        )
+        if plant.name in plants or plant.key in {p.key for p in plants.values()}:
+            raise ValueError(f"{path}: duplicate plant name {plant.name!r}")
+        plants[plant.name] = plant
+
+    if not plants:
+        raise ValueError(f"{path} does not list any plants")
+    return plants
+
+
+# The snapshot refreshers of all plants, refreshing side by side.
+#
+# Each plant keeps its own refresher (snapshot, cache directory, scheduler,
+# errors), so a plant whose spreadsheet is unreachable or over quota only
+# stales its own screens. The refreshers run their fetches on one shared
+# thread pool with a worker per plant, so a round over every plant takes as
+# long as the slowest plant, not the sum of all of them.
+class PlantRefreshers:
+    def __init__(self, refreshers):
+        self.refreshers = dict(refreshers)
+
+    @property
+    def names(self):
+        return list(self.refreshers)
+
+    # Snapshot of one plant; also starts the due refreshes of the others
+    def snapshot(self, name, timeout=None):
+        self.start_due()
+        return self.refreshers[name].snapshot(timeout)
+
+    # Start every due refresh without waiting for any of them
+    def start_due(self):
+        for refresher in self.refreshers.values():
+            refresher.start_if_due()
+
+    # Refresh every plant now and wait for all of them (at most `timeout` seconds)
+    def refresh_all(self, timeout=None):
+        for refresher in self.refreshers.values():
+            refresher.start_now()
+        for refresher in self.refreshers.values():
+            refresher.wait(timeout)
+        return {name: refresher.current for name, refresher in self.refreshers.items()}
+
+    # Plant -> (snapshot age in seconds or None, last error or None)
+    def status(self):
+        return {name: (refresher.current.age, refresher.last_error) for name, refresher in self.refreshers.items()}
@@ -0,0 +1,101 @@
+import cProfile
+import io
+import os
+import pstats
+import re
+import threading
+import time
+
+try:  # Optional: sampling profiler with an HTML flame view (pip install pyinstrument)
+    from pyinstrument import Profiler as SamplingProfiler
+except ImportError:
+    SamplingProfiler = None
+
+REPORT_EXTENSIONS = ('.pstats', '.txt', '.html')
+
+
+# Profiles single reruns on request and writes one report per rerun to
+# `directory`, keeping only the `keep` most recent ones.
+#
+#   deterministic  cProfile: <stamp>-<label>.pstats (snakeviz / flameprof /
+#                  pstats) plus a .txt with the top `top` calls by cumulative time
+#   sampling       pyinstrument, when installed: <stamp>-<label>.html
+#
+# Only one rerun is profiled at a time per process (the interpreter allows one
+# active profiler); a rerun that finds it busy simply runs unprofiled.
+class RerunProfiler:
+    def __init__(self, directory, keep=50, top=40):
+        self.directory = directory
+        self.keep = keep
+        self.top = top
+        self._busy = threading.Lock()
+        self.reports = 0
+
+    # Run func(*args) under the profiler. Returns (result, report path or None);
+    # exceptions from func (including Streamlit's rerun/stop) still propagate.
+    def run(self, label, func, *args, mode="deterministic", **kwargs):
+        if not self._busy.acquire(blocking=False):
+            return func(*args, **kwargs), None
+
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            stem = os.path.join(self.directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{int(time.time() * 1000) % 1000:03d}-{_slug(label)}")
+            if mode == "sampling" and SamplingProfiler is not None:
+                return self._run_sampling(stem, func, args, kwargs)
+            return self._run_deterministic(stem, func, args, kwargs)
+        finally:
+            self._busy.release()
+            self._rotate()
+
+    def _run_deterministic(self, stem, func, args, kwargs):
+        profile = cProfile.Profile()
+        started = time.perf_counter()
+        try:
+            profile.enable()
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                profile.disable()
+        finally:
+            elapsed = time.perf_counter() - started
+            profile.dump_stats(f"{stem}.pstats")
+            summary = io.StringIO()
+            summary.write(f"{os.path.basename(stem)}: {elapsed * 1000:.1f} ms wall\n\n")
+            pstats.Stats(profile, stream=summary).sort_stats('cumulative').print_stats(self.top)
+            with open(f"{stem}.txt", 'w', encoding='utf-8') as f:
+                f.write(summary.getvalue())
+            self.reports += 1
+        return result, f"{stem}.pstats"
+
+    def _run_sampling(self, stem, func, args, kwargs):
+        profiler = SamplingProfiler(interval=0.001)
+        try:
+            profiler.start()
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                profiler.stop()
+        finally:
+            with open(f"{stem}.html", 'w', encoding='utf-8') as f:
+                f.write(profiler.output_html())
+            self.reports += 1
+        return result, f"{stem}.html"
+
+    # Keep the reports of the `keep` most recent reruns
+    def _rotate(self):
+        try:
+            entries = [entry for entry in os.scandir(self.directory) if entry.name.endswith(REPORT_EXTENSIONS)]
+        except OSError:
+            return
+        stems = sorted({os.path.splitext(entry.name)[0] for entry in entries}, reverse=True)
+        stale = set(stems[self.keep:])
+        for entry in entries:
+            if os.path.splitext(entry.name)[0] in stale:
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+
+
+def _slug(label):
+    return re.sub(r'[^A-Za-z0-9_.-]+', '-', label).strip('-') or 'rerun'
@@ -0,0 +1,271 @@
+import hmac
+import ipaddress
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from cycle_times import format_seconds, parse_duration, parse_timestamp
+
+MAX_BODY_BYTES = 1 << 20
+MAX_EVENTS_PER_REQUEST = 1000
+MAX_BACKLOG = 20_000 # Pushed scans kept in memory while the sheet cannot be written
+
+
+# One scan as POSTed by a scanner -> a "Recent Scanned" row in `header` order.
+#
+#   {"line": "Line-MMV", "process": "Building", "belt_name": "SLV-000123",
+#    "duration": "0:04:12" | 252, "timestamp": "2026-10-17 10:42:05" (optional)}
+#
+# Raises ValueError with a message for the scanner when a field is missing or bad.
+def event_row(event, header, now=None):
+    if not isinstance(event, dict):
+        raise ValueError("each scan must be a JSON object")
+
+    fields = {}
+    for name in ('line', 'process', 'belt_name'):
+        value = event.get(name)
+        if not isinstance(value, str) or not value.strip():
+            raise ValueError(f"'{name}' is required")
+        fields[name] = value.strip()
+
+    seconds = parse_duration(event.get('duration', ''))
+    if seconds is None:
+        raise ValueError("'duration' must be seconds or H:MM:SS")
+
+    timestamp = event.get('timestamp')
+    if timestamp is None:
+        scanned_at = time.time() if now is None else now
+    else:
+        scanned_at = parse_timestamp(timestamp)
+        if scanned_at is None:
+            raise ValueError("'timestamp' must look like 2026-10-17 10:42:05")
+
+    values = {
+        'Timestamp': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(scanned_at)),
+        'line': fields['line'],
+        'Process': fields['process'],
+        'BELT NAME': fields['belt_name'],
+        'Duration': format_seconds(seconds),
+    }
+    return [values.get(name, '') for name in header]
+
+
+# Append-only log of pushed scans, in arrival order. Rows up to `mirrored` have
+# been written to the sheet; they are dropped from memory once written. At most
+# `max_backlog` rows wait for the sheet: past that, scans are refused (and
+# counted in `rejected`) until the writes catch up, so the scanners keep them.
+class ScanEventLog:
+    def __init__(self, max_backlog=MAX_BACKLOG):
+        self._lock = threading.Lock()
+        self._rows = []
+        self._first = 0 # Sequence number of self._rows[0]
+        self.max_backlog = max_backlog
+        self.appended = 0
+        self.mirrored = 0
+        self.rejected = 0
+
+    def has_room(self, count):
+        return self.backlog + count <= self.max_backlog
+
+    def append(self, rows):
+        with self._lock:
+            self._rows.extend(rows)
+            self.appended += len(rows)
+            return self.appended
+
+    # Up to `limit` rows not written to the sheet yet, and the sequence they end at
+    def unmirrored(self, limit):
+        with self._lock:
+            start = self.mirrored - self._first
+            rows = self._rows[start:start + limit]
+            return rows, self.mirrored + len(rows)
+
+    def mark_mirrored(self, until):
+        with self._lock:
+            self.mirrored = max(self.mirrored, until)
+            del self._rows[:self.mirrored - self._first]
+            self._first = self.mirrored
+
+    @property
+    def backlog(self):
+        return self.appended - self.mirrored
+
+
+# Background writer that copies pushed scans to the "Recent Scanned" sheet.
+#
+# Scans are collected for up to `interval` seconds (or until `batch_size` are
+# waiting) and written with one append request, so a burst of hundreds of
+# single scans costs a handful of API calls. A failed write keeps the rows
+# and is retried with exponential backoff; the dashboard shows them meanwhile.
+#
+# Delivery is at-least-once: a write that fails after Sheets applied it (a
+# timeout on the response) is written again, and the sheet then has those rows
+# twice. The scans carry no id to tell the copies apart, so a duplicate counts
+# as a second scan once it is read back.
+# `on_written(until)` is told the log sequence every successful write ends at.
+class SheetsMirror:
+    def __init__(self, log, source, sheet_name, interval=5, batch_size=500, max_backoff=300, on_written=None):
+        self.log = log
+        self.on_written = on_written
+        self.source = source
+        self.sheet_name = sheet_name
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_backoff = max_backoff
+
+        self._wake = threading.Event()
+        self._failures = 0
+        self.last_error = None
+        self.writes = 0
+
+        self._thread = threading.Thread(target=self._run, name="sheets-mirror", daemon=True)
+        self._thread.start()
+
+    # A batch is full: write it without waiting for the interval
+    def nudge(self):
+        if self.log.backlog >= self.batch_size:
+            self._wake.set()
+
+    def _run(self):
+        while True:
+            delay = self.interval if self._failures == 0 else min(self.max_backoff, self.interval * 2 ** self._failures)
+            self._wake.wait(delay)
+            self._wake.clear()
+            while self.log.backlog and self._write_batch():
+                pass
+
+    def _write_batch(self):
+        rows, until = self.log.unmirrored(self.batch_size)
+        if not rows:
+            return False
+        try:
+            self.source.append_rows(self.sheet_name, rows)
+        except Exception as e:
+            self._failures += 1
+            self.last_error = e
+            return False
+        self._failures = 0
+        self.last_error = None
+        self.writes += 1
+        self.log.mark_mirrored(until)
+        if self.on_written is not None:
+            self.on_written(until)
+        return True
+
+
+def is_loopback(host):
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+# Minimal HTTP endpoint for the scanners, on its own port next to Streamlit.
+#
+#   POST /scans   one scan object or a list of them -> 202 {"accepted": n}
+#   GET  /health  200 {"status": "ok", "backlog": <scans not in the sheet yet>,
+#                      "max_backlog": n, "rejected": <scans refused while it was full>}
+#
+# `accept(rows)` is called with the validated rows; it raises RuntimeError
+# while the app cannot take scans (not ready yet, backlog full: 503). With a token, requests must send
+# "Authorization: Bearer <token>". Scans end up in the production sheet, so
+# the server only listens beyond this host (e.g. host="0.0.0.0") with a token;
+# otherwise it raises ValueError.
+class ScanIngestServer:
+    def __init__(self, port, header, accept, log, token=None, host="127.0.0.1"):
+        if not token and not is_loopback(host):
+            raise ValueError(f"a token is required to accept scans on {host}")
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip('/') != '/health':
+                    return self._reply(404, {"error": "not found"})
+                self._reply(200, {
+                    "status": "ok", "backlog": log.backlog, "max_backlog": log.max_backlog, "rejected": log.rejected,
+                })
+
+            def do_POST(self):
+                if self.path.rstrip('/') != '/scans':
+                    return self._reply(404, {"error": "not found"})
+                if token and not hmac.compare_digest(self.headers.get('Authorization', ''), f"Bearer {token}"):
+                    return self._reply(401, {"error": "unauthorized"})
+
+                try:
+                    length = int(self.headers.get('Content-Length') or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    return self._reply(400, {"error": "bad Content-Length"})
+                if length > MAX_BODY_BYTES:
+                    return self._reply(413, {"error": "request too large"})
+                try:
+                    events = json.loads(self.rfile.read(length) or b'null')
+                    events = events if isinstance(events, list) else [events]
+                    if len(events) > MAX_EVENTS_PER_REQUEST:
+                        raise ValueError(f"at most {MAX_EVENTS_PER_REQUEST} scans per request")
+                    current_header = header()
+                    if current_header is None:
+                        raise RuntimeError("not ready")
+                    rows = [event_row(event, current_header) for event in events]
+                except ValueError as e:
+                    return self._reply(400, {"error": str(e)})
+                except RuntimeError as e:
+                    return self._reply(503, {"error": str(e)})
+
+                try:
+                    accept(rows)
+                except RuntimeError as e:
+                    return self._reply(503, {"error": str(e)})
+                self._reply(202, {"accepted": len(rows)})
+
+            def _reply(self, status, body):
+                payload = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                server.requests += 1
+
+        self.requests = 0
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="scan-ingest", daemon=True)
+        self._thread.start()
+
+    @property
+    def port(self):
+        return self.httpd.server_address[1]
+
+
+# Pushed scans end to end: validated rows go to the tail (on screen and
+# counted at once), the append-only log and, in batches, the sheet. Rows enter
+# the tail and the log in the same order, so a log sequence written to the
+# sheet confirms the tail's pushed rows up to the same number.
+class ScanIngest:
+    def __init__(self, tail, publish, source, sheet_name, port, token=None, host="127.0.0.1",
+                 mirror_interval=5, batch_size=500):
+        self.tail = tail
+        self.publish = publish
+        self.log = ScanEventLog()
+        self.server = ScanIngestServer(port, lambda: tail.header, self.accept, self.log, token=token, host=host)
+        self.mirror = SheetsMirror(
+            self.log, source, sheet_name, interval=mirror_interval, batch_size=batch_size, on_written=tail.confirm_local,
+        )
+        self._accept_lock = threading.Lock()
+
+    def accept(self, rows):
+        with self._accept_lock:
+            if not self.log.has_room(len(rows)):
+                self.log.rejected += len(rows)
+                raise RuntimeError(f"{self.log.backlog} scans are waiting for Sheets, try again later")
+            self.tail.add_local(rows)
+            self.log.append(rows)
+        self.publish()
+        self.mirror.nudge()
@@ -0,0 +1,152 @@
+import json
+import os
+
+import pyarrow as pa
+
+from snapshots import Snapshot
+
+try:  # POSIX only; elsewhere every replica fetches for itself
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+def default_shared_dir():
+    base = '/dev/shm' if os.path.isdir('/dev/shm') else os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'live-production-tracking')
+
+
+# Snapshots shared by the app replicas of one host.
+#
+# One replica is the publisher: it holds an exclusive flock on publisher.lock,
+# fetches from Sheets as usual and writes every new snapshot here as Arrow
+# IPC files plus a current.json pointer (swapped in with os.replace, like
+# SnapshotStore). The other replicas do not call Sheets at all; they read the
+# published version through a memory map, keeping the publisher's version
+# numbers, so every replica serves the same versions (and ETags).
+#
+# The lock goes away with the publisher's process, so when it dies the next
+# replica to refresh takes over. Until then, and if nobody can publish, the
+# replicas keep serving the last published version.
+class SharedSnapshots:
+    POINTER = 'current.json'
+    LOCK = 'publisher.lock'
+    KEEP_VERSIONS = 2 # A replica may still be mapping the previous version
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock_file = None
+        self.published = 0
+        self.loaded = 0
+
+    @property
+    def is_publisher(self):
+        return self._lock_file is not None
+
+    # Become (or stay) the publisher if nobody else is
+    def try_lead(self):
+        if self._lock_file is not None:
+            return True
+        if fcntl is None:
+            return True
+
+        lock_file = open(os.path.join(self.directory, self.LOCK), 'a+')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+
+        lock_file.seek(0)
+        lock_file.truncate()
+        lock_file.write(str(os.getpid()))
+        lock_file.flush()
+        self._lock_file = lock_file
+        return True
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def publish(self, snapshot):
+        stamp = f"{snapshot.version}-{int(snapshot.fetched_at * 1000)}-{os.getpid()}"
+        pointer = self._read_pointer()
+        if pointer is not None and pointer.get('content_hash') == snapshot.content_hash:
+            # Same data: only renew fetched_at
+            files = pointer['files']
+        else:
+            files = {'kpi': f"kpi-{stamp}.arrow", 'scanned': f"scanned-{stamp}.arrow"}
+            self._write_table(snapshot.kpi, files['kpi'])
+            self._write_table(snapshot.scanned, files['scanned'])
+
+        self._write_pointer({
+            'version': snapshot.version,
+            'fetched_at': snapshot.fetched_at,
+            'content_hash': snapshot.content_hash,
+            'files': files,
+            'publisher': os.getpid(),
+        })
+        self.published += 1
+        self._remove_old_versions(files)
+
+    # The published snapshot, or `previous` (renewed) when its content is unchanged.
+    # Raises LookupError while nothing has been published yet.
+    def load(self, previous=None):
+        pointer = self._read_pointer()
+        if pointer is None:
+            raise LookupError("No snapshot has been published yet")
+
+        if previous is not None and previous.content_hash == pointer['content_hash']:
+            return Snapshot(
+                previous.kpi, previous.scanned, fetched_at=pointer['fetched_at'],
+                version=pointer['version'], content_hash=pointer['content_hash'], index=previous.index,
+            )
+
+        kpi = self._read_table(pointer['files']['kpi'])
+        scanned = self._read_table(pointer['files']['scanned'])
+        self.loaded += 1
+        return Snapshot(
+            kpi, scanned, fetched_at=pointer['fetched_at'],
+            version=pointer['version'], content_hash=pointer['content_hash'],
+        )
+
+    def _write_table(self, df, name):
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        tmp_path = self._path(f"{name}.tmp")
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, self._path(name))
+
+    # Arrow buffers are mapped, not read: numeric columns come out without a copy
+    def _read_table(self, name):
+        with pa.memory_map(self._path(name), 'r') as source:
+            table = pa.ipc.open_file(source).read_all()
+        return table.to_pandas()
+
+    def _remove_old_versions(self, files):
+        arrow_files = sorted(
+            (entry for entry in os.scandir(self.directory) if entry.name.endswith('.arrow')),
+            key=lambda entry: entry.stat().st_mtime,
+            reverse=True,
+        )
+        keep = set(files.values())
+        for entry in arrow_files[2 * self.KEEP_VERSIONS:]:
+            if entry.name not in keep:
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+
+    def _read_pointer(self):
+        try:
+            with open(self._path(self.POINTER), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_pointer(self, pointer):
+        tmp_path = self._path(f"{self.POINTER}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(pointer, f)
+        os.replace(tmp_path, self._path(self.POINTER))
@@ -0,0 +1,156 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+try:  # pyarrow ships with streamlit; the pandas .str path below is only a fallback
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = None
+    pc = None
+
+
+# Google Sheets formula errors (and blanks) that mean "no value" -> parsed as 0
+ERROR_TOKENS = ('#DIV/0!', '#N/A', '#NAME?', '#REF!', '#VALUE!', '#ERROR!', '', '-')
+
+# Raised by a cast of text that is not a number
+CAST_ERRORS = (TypeError, ValueError) + ((pa.ArrowInvalid,) if pa is not None else ())
+
+
+# One column of a sheet: where it comes from, what it is called on the
+# dashboard and how its text is turned into numbers.
+#
+#   kind       "text", "int" or "float"
+#   thousands  the sheet formats the value with "," separators ("1,234")
+#   percent    the value is a percentage ("58.4%") -> 0.584
+class ColumnSpec:
+    def __init__(self, source, name=None, kind="text", thousands=False, percent=False,
+                 error_tokens=ERROR_TOKENS, fill_value=0):
+        self.source = source
+        self.name = name or source
+        self.kind = kind
+        self.strip_chars = (',' if thousands else '') + ('%' if percent else '')
+        self.percent = percent
+        self.error_tokens = tuple(error_tokens)
+        self.fill_value = fill_value
+        self._error_set = pa.array(self.error_tokens, type=pa.string()) if pa is not None else None
+
+    # Turn the raw column into its final dtype in one vectorized pass: padding
+    # is trimmed, error tokens are masked up front, the formatting characters
+    # are stripped and the column goes through a single C-level float cast.
+    # Anything else that does not parse ("abc") falls back to pd.to_numeric
+    # and is filled with 0.
+    def convert(self, raw):
+        if self.kind == "text":
+            return raw.to_pandas() if pa is not None else pd.Series(raw, dtype=object)
+
+        if pa is not None:
+            values = pc.utf8_trim_whitespace(raw)
+            is_error = pc.is_in(values, value_set=self._error_set)
+            for char in self.strip_chars:
+                values = pc.replace_substring(values, char, '')
+            values = pc.if_else(is_error, '0', values)
+            is_error = is_error.to_numpy(zero_copy_only=False)
+        else:
+            values = pd.Series(raw, dtype=object).str.strip()
+            is_error = values.isin(self.error_tokens).to_numpy()
+            for char in self.strip_chars:
+                values = values.str.replace(char, '', regex=False)
+            values = values.where(~is_error, '0').to_numpy()
+
+        try:
+            if pa is not None:
+                numbers = pc.cast(values, pa.float64()).to_numpy(zero_copy_only=False).copy()
+            else:
+                numbers = values.astype(float)
+        except CAST_ERRORS:
+            # Copied: with copy-on-write the array of a Series is read-only
+            numbers = np.nan_to_num(
+                pd.to_numeric(pd.Series(values.to_pylist() if pa is not None else list(values), dtype=object),
+                              errors='coerce').to_numpy(dtype=float, copy=True)
+            )
+
+        numbers[is_error] = self.fill_value
+        if self.percent:
+            numbers /= 100
+        if self.kind == "int":
+            return pd.Series(numbers.astype(np.int64))
+        return pd.Series(numbers)
+
+
+# A sheet's column specs compiled into a parser for header-first row grids.
+#
+# Parsed columns are remembered together with the raw text they came from;
+# a column whose text did not change since the last refresh is reused as is
+# instead of being parsed again (plan numbers rarely change within a shift).
+# The memory belongs to one sheet: give every sheet (plant) its own schema
+# object, e.g. SheetSchema(KPI_SCHEMA.columns.values()). A lock keeps parses
+# from several threads from interleaving on it.
+class SheetSchema:
+    def __init__(self, columns):
+        self.columns = {spec.source: spec for spec in columns}
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def parse(self, data):
+        if not data or len(data) < 2:
+            return pd.DataFrame()
+
+        with self._lock:
+            return self._parse(data)
+
+    def _parse(self, data):
+        header = data[0]
+        # One 2-D object array (rows are padded to the header width); columns are views
+        grid = np.array(data[1:], dtype=object)
+
+        parsed = {}
+        for position, source in enumerate(header):
+            raw = pa.array(grid[:, position], type=pa.string()) if pa is not None else grid[:, position]
+            spec = self.columns.get(source)
+            name = spec.name if spec is not None else source
+
+            cached = self._cache.get(source)
+            if cached is not None and self._same(cached[0], raw):
+                parsed[name] = cached[1]
+                continue
+
+            if spec is not None:
+                column = spec.convert(raw)
+            else:
+                column = raw.to_pandas() if pa is not None else pd.Series(raw, dtype=object)
+            self._cache[source] = (raw, column)
+            parsed[name] = column
+
+        return pd.DataFrame(parsed)
+
+    @staticmethod
+    def _same(previous, raw):
+        if len(previous) != len(raw):
+            return False
+        if pa is not None:
+            return previous.equals(raw)
+        return bool((previous == raw).all())
+
+
+KPI_SCHEMA = SheetSchema([
+    ColumnSpec('Area'),
+    ColumnSpec('Line'),
+    ColumnSpec('Planning', 'Planned Sleeves', kind="int", thousands=True),
+    ColumnSpec('Building', 'Sleeves Build', kind="int", thousands=True),
+    ColumnSpec('Pending', 'Not Produced Sleeves', kind="int", thousands=True),
+    ColumnSpec('Percentage', 'Production rate %', kind="float", percent=True),
+])
+
+
+# Clean KPI Data (rows as returned for the "Calculation" sheet, header first)
+def parse_kpi_rows(data, schema=KPI_SCHEMA):
+    df = schema.parse(data)
+    if df.empty:
+        return df
+
+    # Float, rounded to handle floating-point issues (not a string; formatted at render time)
+    df['Production rate Display'] = df['Production rate %'].round(3)
+    df['Area_Line_Key'] = df['Area'] + ' - ' + df['Line']
+    return df
@@ -0,0 +1,161 @@
+import gzip
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+KIOSK_PAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'kiosk', 'index.html')
+PROCESSES = ('Building', 'Curing')
+GZIP_MIN_BYTES = 1024
+
+
+# Compact JSON for one area of a snapshot: its lines' KPIs and latest scans
+def area_payload(snapshot, area):
+    lines = [
+        {
+            'line': row['Line'],
+            'key': row['Area_Line_Key'],
+            'planned': int(row['Planned Sleeves']),
+            'built': int(row['Sleeves Build']),
+            'pending': int(row['Not Produced Sleeves']),
+            'rate': round(float(row['Production rate Display']), 3),
+        }
+        for row in snapshot.index.area(area).to_dict('records')
+    ]
+    scans = {
+        process: snapshot.index.recent_scans(area, process).values.tolist()
+        for process in PROCESSES
+    }
+    return {
+        'version': snapshot.version,
+        'area': area,
+        'lines': lines,
+        'scans': scans, # [sleeve name, time taken], oldest first
+    }
+
+
+# Every area in one body, for wall screens and kiosks rotating through the areas
+def wall_payload(snapshot):
+    return {
+        'version': snapshot.version,
+        'areas': [area_payload(snapshot, area) for area in snapshot.index.areas],
+    }
+
+
+# Read-only HTTP view of the current snapshot for kiosk screens, so a TV is a
+# static page polling JSON instead of a full Streamlit session.
+#
+#   GET /api/areas         {"version", "areas": [...]}
+#   GET /api/areas/<area>  area_payload()
+#   GET /api/wall          wall_payload(): every area at once
+#   GET /  (or /kiosk)     the kiosk page (kiosk/index.html)
+#
+# Responses carry ETag W/"<version>" (snapshot versions only change when the
+# content does), so a poll with a matching If-None-Match costs a 304 and no
+# body. Each body is encoded (and gzipped) once per version and area and then
+# served to every screen from memory. X-Snapshot-Age (seconds since the last
+# good Sheets fetch) comes with the 304s too, for the staleness badge.
+class SnapshotApiServer:
+    def __init__(self, port, get_snapshot, host="0.0.0.0", kiosk_page=KIOSK_PAGE):
+        self.get_snapshot = get_snapshot
+        self.kiosk_page = kiosk_page
+        self._lock = threading.Lock()
+        self._bodies = {} # path -> (version, etag, body, gzipped body)
+        self.requests = 0
+        self.not_modified = 0
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests += 1
+                path = unquote(urlsplit(self.path).path).rstrip('/') or '/'
+                if path in ('/', '/kiosk'):
+                    return self._send_page()
+                if path in ('/api/areas', '/api/wall') or path.startswith('/api/areas/'):
+                    return self._send_json(path)
+                self._send(404, b'{"error": "not found"}')
+
+            def _send_json(self, path):
+                cached = server.body(path)
+                if cached is None:
+                    return self._send(404, b'{"error": "unknown area"}')
+                etag, body, gzipped, age = cached
+                age_header = f"{age:.0f}" if age is not None else ''
+
+                if etag in (tag.strip() for tag in self.headers.get('If-None-Match', '').split(',')):
+                    server.not_modified += 1
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.send_header('Cache-Control', 'no-cache')
+                    self.send_header('X-Snapshot-Age', age_header)
+                    self.end_headers()
+                    return
+
+                use_gzip = gzipped is not None and 'gzip' in self.headers.get('Accept-Encoding', '')
+                self._send(200, gzipped if use_gzip else body, etag=etag, encoding='gzip' if use_gzip else None,
+                           extra={'X-Snapshot-Age': age_header})
+
+            def _send_page(self):
+                try:
+                    with open(server.kiosk_page, 'rb') as f:
+                        page = f.read()
+                except OSError:
+                    return self._send(404, b'{"error": "kiosk page not found"}')
+                self._send(200, page, content_type='text/html; charset=utf-8')
+
+            def _send(self, status, payload, etag=None, encoding=None, content_type='application/json', extra=None):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(payload)))
+                self.send_header('Cache-Control', 'no-cache')
+                if etag is not None:
+                    self.send_header('ETag', etag)
+                if encoding is not None:
+                    self.send_header('Content-Encoding', encoding)
+                    self.send_header('Vary', 'Accept-Encoding')
+                for name, value in (extra or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="snapshot-api", daemon=True)
+        self._thread.start()
+
+    @property
+    def port(self):
+        return self.httpd.server_address[1]
+
+    # (etag, body, gzipped body or None, snapshot age) for an /api path, None for an unknown area
+    def body(self, path):
+        snapshot = self.get_snapshot()
+        with self._lock:
+            cached = self._bodies.get(path)
+            if cached is not None and cached[0] == snapshot.version:
+                return cached[1:] + (snapshot.age,)
+
+        if path == '/api/areas':
+            payload = {'version': snapshot.version, 'areas': snapshot.index.areas}
+        elif path == '/api/wall':
+            payload = wall_payload(snapshot)
+        else:
+            area = path[len('/api/areas/'):]
+            if area not in snapshot.index.by_area:
+                return None
+            payload = area_payload(snapshot, area)
+
+        body = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        gzipped = gzip.compress(body, compresslevel=6) if len(body) >= GZIP_MIN_BYTES else None
+        etag = f'W/"{snapshot.version}"' # Weak: the gzip and plain bodies share it
+        with self._lock:
+            # Bodies of older versions are never served again
+            if any(entry[0] != snapshot.version for entry in self._bodies.values()):
+                self._bodies = {p: entry for p, entry in self._bodies.items() if entry[0] == snapshot.version}
+            self._bodies[path] = (snapshot.version, etag, body, gzipped)
+        return etag, body, gzipped, snapshot.age
@@ -0,0 +1,731 @@
+import functools
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import wait as wait_futures
+
+import pandas as pd
+
+from data_sources import a1_sheet
+from metrics import REGISTRY
+
+
+RECENT_SCANS_SHOWN = 4 # Rows per "Recently Scanned" table
+
+# Snapshot frame columns with few distinct values, repeated on every row (stored as categoricals).
+# Not 'Time Taken': nearly every scan has its own duration, so it stays a string.
+CATEGORY_COLUMNS = ('Area', 'Line', 'Area_Line_Key', 'Line Name', 'Process')
+# Snapshot frame counts (stored in the narrowest integer dtype that holds them)
+COUNT_COLUMNS = ('Planned Sleeves', 'Sleeves Build', 'Not Produced Sleeves')
+
+
+# Lookups a rerun needs, built once per refresh (one groupby per key) instead
+# of every session boolean-masking the full frames on every rerun:
+#
+#   areas                       area names in sheet order (sidebar menu)
+#   area(area)                  KPI rows of one area
+#   line(area, line)            KPI row(s) of one Area_Line_Key
+#   recent_scans(line, process) last RECENT_SCANS_SHOWN scans, display columns only
+class SnapshotIndex:
+    def __init__(self, kpi, scanned, tail_count=RECENT_SCANS_SHOWN):
+        self.areas = []
+        self.by_area = {}
+        self.by_key = {}
+        self.by_scan_group = {}
+        self._empty_kpi = kpi.iloc[0:0]
+        self._empty_scans = pd.DataFrame(columns=['Sleeve Name', 'Time Taken'])
+
+        if not kpi.empty:
+            self.areas = kpi["Area"].unique().tolist()
+            self.by_area = {area: rows for area, rows in kpi.groupby("Area", sort=False, observed=True)}
+            self.by_key = {key: rows for key, rows in kpi.groupby("Area_Line_Key", sort=False, observed=True)}
+
+        if not scanned.empty:
+            self.by_scan_group = {
+                (line_name, process): rows[['Sleeve Name', 'Time Taken']].tail(tail_count)
+                for (line_name, process), rows in scanned.groupby(["Line Name", "Process"], sort=False, observed=True)
+            }
+
+    def area(self, area):
+        return self.by_area.get(area, self._empty_kpi)
+
+    def line(self, area, line):
+        return self.by_key.get(f"{area} - {line}", self._empty_kpi)
+
+    def recent_scans(self, line_name, process):
+        return self.by_scan_group.get((line_name, process), self._empty_scans)
+
+    # Bytes held by the lookup frames (categories shared with the snapshot frames are in `seen`)
+    def nbytes(self, seen):
+        frames = list(self.by_area.values()) + list(self.by_key.values()) + list(self.by_scan_group.values())
+        return sum(frame_nbytes(frame, seen) for frame in frames)
+
+
+# Hash of the frames' contents (values and column names, not the index)
+def content_hash(kpi, scanned):
+    digest = hashlib.blake2b(digest_size=16)
+    for frame in (kpi, scanned):
+        digest.update(repr(list(frame.columns)).encode('utf-8'))
+        if not frame.empty:
+            digest.update(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+# Resident bytes of a frame. The categories of a categorical column are shared
+# by every frame sliced from it, so they are only counted the first time they
+# show up in `seen` (ids of the categories already counted).
+def frame_nbytes(df, seen):
+    total = int(df.index.memory_usage(deep=True))
+    for _, column in df.items():
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            total += column.cat.codes.nbytes
+            categories = column.cat.categories
+            if id(categories) not in seen:
+                seen.add(id(categories))
+                total += int(categories.memory_usage(deep=True))
+        else:
+            total += int(column.memory_usage(index=False, deep=True))
+    return total
+
+
+# The same frame in compact dtypes. Snapshot frames are read by every session
+# and written by none, so they are stored as small as pandas allows: the
+# repeated keys as categoricals (a 1-2 byte code per row instead of a string),
+# counts as the narrowest integer that holds them and remaining free text
+# (sleeve names, durations) as Arrow strings instead of Python objects.
+def compact_frame(df):
+    if df.empty:
+        return df
+
+    columns = {}
+    for name, column in df.items():
+        if name in CATEGORY_COLUMNS:
+            if not isinstance(column.dtype, pd.CategoricalDtype):
+                column = column.astype('category')
+        elif name in COUNT_COLUMNS:
+            column = pd.to_numeric(column, downcast='integer')
+        elif column.dtype == object or isinstance(column.dtype, pd.CategoricalDtype):
+            # (categorical: a snapshot stored while the column was one)
+            try:
+                column = column.astype('string[pyarrow]')
+            except ImportError:
+                pass
+        columns[name] = column
+    return pd.DataFrame(columns)
+
+
+# One immutable view of the dashboard data: the KPI ("Calculation") frame and
+# the "Recent Scanned" frame, fetched together so they always belong together.
+# `version` only changes when the content does, so it can be used to tell
+# whether anything on screen needs to change.
+class Snapshot:
+    def __init__(self, kpi, scanned, fetched_at=None, version=0, content_hash=None, index=None):
+        self.kpi = kpi
+        self.scanned = scanned
+        self.fetched_at = fetched_at
+        self.version = version
+        self.content_hash = content_hash
+        if index is None:
+            with REGISTRY.timer('index'):
+                index = SnapshotIndex(kpi, scanned)
+        self.index = index
+        self.restored = False # Loaded from the on-disk copy, no live fetch yet
+
+    @property
+    def age(self):
+        if self.fetched_at is None:
+            return None
+        return time.time() - self.fetched_at
+
+    # Resident bytes of the frames and the index (pandas' deep memory usage)
+    @functools.cached_property
+    def nbytes(self):
+        seen = set()
+        return frame_nbytes(self.kpi, seen) + frame_nbytes(self.scanned, seen) + self.index.nbytes(seen)
+
+
+EMPTY_SNAPSHOT = Snapshot(pd.DataFrame(), pd.DataFrame())
+
+
+# Last good snapshot on local disk, for an instant warm start after a restart
+# and something to show while Sheets is unreachable.
+#
+# Each frame is written as its own Parquet file under a new name; current.json
+# (fetched_at, version, content hash and the two file names) is then swapped in
+# with os.replace, so readers only ever see a complete pair. Files no longer
+# referenced by current.json are removed afterwards.
+class SnapshotStore:
+    POINTER = 'current.json'
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def save(self, snapshot):
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = f"{snapshot.version}-{int(snapshot.fetched_at * 1000)}"
+        files = {'kpi': f"kpi-{stamp}.parquet", 'scanned': f"scanned-{stamp}.parquet"}
+        snapshot.kpi.to_parquet(self._path(files['kpi']), index=False)
+        snapshot.scanned.to_parquet(self._path(files['scanned']), index=False)
+        self._write_pointer(snapshot, files)
+
+        for name in os.listdir(self.directory):
+            if name.endswith('.parquet') and name not in files.values():
+                try:
+                    os.remove(self._path(name))
+                except OSError:
+                    pass
+
+    # Same data as the saved copy, only newer: just renew fetched_at in the pointer
+    def touch(self, snapshot):
+        pointer = self._read_pointer()
+        if pointer is None or pointer.get('content_hash') != snapshot.content_hash:
+            self.save(snapshot)
+            return
+        self._write_pointer(snapshot, pointer['files'])
+
+    def load(self):
+        pointer = self._read_pointer()
+        if pointer is None:
+            return None
+        try:
+            # Copies saved before the frames were compacted come back compact too
+            kpi = compact_frame(pd.read_parquet(self._path(pointer['files']['kpi'])))
+            scanned = compact_frame(pd.read_parquet(self._path(pointer['files']['scanned'])))
+        except Exception:
+            return None
+
+        snapshot = Snapshot(
+            kpi, scanned, fetched_at=pointer['fetched_at'],
+            version=pointer['version'], content_hash=pointer['content_hash'],
+        )
+        snapshot.restored = True
+        return snapshot
+
+    def _read_pointer(self):
+        try:
+            with open(self._path(self.POINTER), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_pointer(self, snapshot, files):
+        pointer = {
+            'fetched_at': snapshot.fetched_at,
+            'version': snapshot.version,
+            'content_hash': snapshot.content_hash,
+            'files': files,
+        }
+        tmp_path = self._path(f"{self.POINTER}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(pointer, f)
+        os.replace(tmp_path, self._path(self.POINTER))
+
+
+# Per-process owner of the current snapshot (stale-while-revalidate).
+#
+# snapshot() always returns the last good snapshot straight away. When it is
+# older than max_age, one background refresh is started; callers arriving
+# while that refresh is in flight simply get the old snapshot too, so the
+# number of Sheets fetches no longer depends on the number of open screens.
+# Only the very first caller (nothing fetched yet) waits for the fetch.
+#
+# With a SnapshotStore, the last good snapshot saved by a previous process is
+# served straight away on startup (marked `restored`) while the first live
+# fetch runs, and every successful refresh is written back to it.
+#
+# With a FetchScheduler, the scheduler (quota budget, backoff, circuit
+# breaker) decides when a refresh is due instead of the fixed max_age.
+#
+# Listeners are called with every successfully refreshed snapshot, on the
+# refresher thread (history, analytics); a failing listener is ignored.
+#
+# publish() swaps in frames built locally (pushed scans) without a fetch.
+# fetched_at is kept, since it says how fresh the Sheets data is. Frames that
+# come from local state shared with fetches (the scan tail) must be built in
+# the same order they are installed, or a refresh that read the tail before a
+# push could install its older frame after the push: so publish() takes a
+# function building the frames, and fetch may return one instead of the
+# frames, both called under the lock that orders the installs.
+#
+# With a SharedSnapshots tier only the elected publisher replica fetches (and
+# writes what it fetched to the tier); the others load the published version
+# every follow_interval seconds instead, without store, scheduler or listeners.
+#
+# With an executor (a thread pool shared by several refreshers, e.g. one per
+# plant) the refreshes run on its workers instead of a thread of their own.
+class SnapshotRefresher:
+    def __init__(self, fetch, max_age=10, cold_start_timeout=30, store=None, scheduler=None, listeners=(),
+                 shared=None, follow_interval=2, executor=None):
+        self._fetch = fetch
+        self.max_age = max_age
+        self.cold_start_timeout = cold_start_timeout
+        self.store = store
+        self.scheduler = scheduler
+        self.listeners = list(listeners)
+        self.shared = shared
+        self.follow_interval = follow_interval
+        self.executor = executor
+
+        self._lock = threading.Lock()
+        self._publish_lock = threading.Lock() # Orders refreshes and local publishes
+        self._thread = None
+        self._snapshot = store.load() if store is not None else None
+        self._last_attempt = 0.0
+
+        self.last_error = None
+        self.last_error_at = None
+        self.refresh_count = 0
+        self.error_count = 0
+
+    @property
+    def refreshing(self):
+        return self._thread is not None
+
+    # The snapshot being served, without starting a refresh (metrics, status)
+    @property
+    def current(self):
+        return self._snapshot if self._snapshot is not None else EMPTY_SNAPSHOT
+
+    # `timeout`: how long a caller with nothing to show waits for the first
+    # fetch (default cold_start_timeout; 0 returns the empty snapshot right away)
+    def snapshot(self, timeout=None):
+        with self._lock:
+            snap = self._snapshot
+            if self._thread is None and self._due_locked():
+                self._start_refresh_locked()
+
+        if snap is None:
+            self.wait(self.cold_start_timeout if timeout is None else timeout)
+            snap = self._snapshot
+
+        return snap if snap is not None else EMPTY_SNAPSHOT
+
+    def refresh_now(self):
+        # Start a refresh regardless of age (still single-flight) and wait for it.
+        self.start_now()
+        self.wait()
+        return self._snapshot if self._snapshot is not None else EMPTY_SNAPSHOT
+
+    # Start a refresh if one is due, without waiting for it
+    def start_if_due(self):
+        with self._lock:
+            if self._thread is None and self._due_locked():
+                self._start_refresh_locked()
+
+    # Start a refresh regardless of age (still single-flight), without waiting for it
+    def start_now(self):
+        with self._lock:
+            self._start_refresh_locked()
+
+    # Wait for the refresh in flight, if any
+    def wait(self, timeout=None):
+        with self._lock:
+            task = self._thread
+        if task is None:
+            return
+        if isinstance(task, threading.Thread):
+            task.join(timeout)
+        else:
+            wait_futures([task], timeout)
+
+    def _due_locked(self):
+        if self.shared is not None and not self.shared.is_publisher:
+            return time.time() - self._last_attempt >= self.follow_interval
+        if self.scheduler is not None:
+            return self.scheduler.due()
+        return time.time() - self._last_attempt >= self.max_age
+
+    def _start_refresh_locked(self):
+        if self._thread is not None:
+            return
+        self._last_attempt = time.time()
+        if self.executor is not None:
+            self._thread = self.executor.submit(self._run_refresh)
+            return
+        self._thread = threading.Thread(
+            target=self._run_refresh, name="snapshot-refresher", daemon=True
+        )
+        self._thread.start()
+
+    def publish(self, build_frames):
+        with self._publish_lock:
+            kpi, scanned = build_frames()
+            previous = self._snapshot
+            fetched_at = previous.fetched_at if previous is not None else time.time()
+            new_snapshot = self._next_snapshot(previous, kpi, scanned, fetched_at)
+            with self._lock:
+                self._snapshot = new_snapshot
+        REGISTRY.inc('snapshot_refreshes_total', result='pushed')
+        self._share(new_snapshot)
+        return new_snapshot
+
+    @staticmethod
+    def _next_snapshot(previous, kpi, scanned, fetched_at):
+        with REGISTRY.timer('compact'):
+            kpi, scanned = compact_frame(kpi), compact_frame(scanned)
+        with REGISTRY.timer('hash'):
+            digest = content_hash(kpi, scanned)
+        if previous is not None and previous.content_hash == digest:
+            # Nothing changed: keep the frames, index and version, only renew the age
+            return Snapshot(
+                previous.kpi, previous.scanned, fetched_at=fetched_at,
+                version=previous.version, content_hash=digest, index=previous.index,
+            )
+        version = previous.version + 1 if previous is not None else 1
+        return Snapshot(kpi, scanned, fetched_at=fetched_at, version=version, content_hash=digest)
+
+    def _run_refresh(self):
+        if self.shared is not None and not self.shared.try_lead():
+            self._run_follow()
+            return
+
+        try:
+            frames = self._fetch()
+            with self._publish_lock:
+                kpi, scanned = frames() if callable(frames) else frames
+                previous = self._snapshot
+                new_snapshot = self._next_snapshot(previous, kpi, scanned, time.time())
+                with self._lock:
+                    self._snapshot = new_snapshot
+                    self.refresh_count += 1
+                    self.last_error = None
+            REGISTRY.inc('snapshot_refreshes_total', result='changed' if new_snapshot.index is not getattr(previous, 'index', None) else 'unchanged')
+
+            if self.scheduler is not None:
+                self.scheduler.record_success()
+            self._persist(new_snapshot, changed=new_snapshot.index is not getattr(previous, 'index', None))
+            self._share(new_snapshot)
+            self._notify(new_snapshot)
+        except Exception as e:
+            # Keep serving the last good snapshot; the error is shown by the UI.
+            REGISTRY.inc('snapshot_refreshes_total', result='error')
+            with self._lock:
+                self.error_count += 1
+                self.last_error = e
+                self.last_error_at = time.time()
+            if self.scheduler is not None:
+                self.scheduler.record_failure(e)
+        finally:
+            with self._lock:
+                self._thread = None
+
+    # Another replica publishes: take its latest version
+    def _run_follow(self):
+        try:
+            with self._publish_lock:
+                new_snapshot = self.shared.load(self._snapshot)
+                with self._lock:
+                    self._snapshot = new_snapshot
+                    self.refresh_count += 1
+                    self.last_error = None
+            REGISTRY.inc('snapshot_refreshes_total', result='followed')
+        except Exception as e:
+            REGISTRY.inc('snapshot_refreshes_total', result='error')
+            with self._lock:
+                self.error_count += 1
+                self.last_error = e
+                self.last_error_at = time.time()
+        finally:
+            with self._lock:
+                self._thread = None
+
+    def _share(self, snapshot):
+        if self.shared is None or not self.shared.is_publisher:
+            return
+        try:
+            self.shared.publish(snapshot)
+        except Exception:
+            pass # The replicas keep the last version they loaded
+
+    def _notify(self, snapshot):
+        for listener in self.listeners:
+            try:
+                listener(snapshot)
+            except Exception:
+                pass
+
+    def _persist(self, snapshot, changed):
+        if self.store is None:
+            return
+        try:
+            if changed:
+                self.store.save(snapshot)
+            else:
+                self.store.touch(snapshot)
+        except Exception:
+            pass # A full disk must never take the live dashboard down
+
+
+# "Recent Scanned" sheet header -> dashboard column name
+RECENT_SCANNED_COLUMNS = {
+    'line': 'Line Name',
+    'Process': 'Process',
+    'BELT NAME': 'Sleeve Name',
+    'Duration': 'Time Taken',
+}
+RECENT_SCANS_PER_GROUP = 20 # Rows kept per (Line Name, Process); the UI shows the last 4
+LOCAL_ROWS_MAX = 10_000 # Pushed scans remembered until they show up in the sheet (oldest dropped first)
+LOCAL_ROW_MAX_AGE_SECONDS = 3600 # ... and for at most this long
+# Columns that identify a pushed scan when it reads back from the sheet (the
+# sheet may reformat the others, e.g. the timestamp or the duration)
+LOCAL_MATCH_COLUMNS = ('line', 'Process', 'BELT NAME')
+
+
+# 1 -> "A", 27 -> "AA"
+def column_letter(index):
+    letters = ''
+    while index > 0:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return letters
+
+
+# Incremental reader for the append-only "Recent Scanned" sheet.
+#
+# After one full read it remembers the sheet row number of the last row it
+# ingested and from then on only asks for that row and everything below it
+# ('Recent Scanned'!A<last>:<col>). The repeated first row must come back
+# unchanged; if it does not (rows deleted, sheet cleared for a new shift,
+# last row edited) the caller does a full resync. A full resync also runs every
+# resync_every refreshes as a safety net for edits further up the sheet.
+#
+# New rows go into a bounded ring buffer per (Line Name, Process), so the
+# cost of a refresh depends on the number of new scans, not on the sheet size.
+# Every new row is also handed to the `observers` (cycle-time stats, line
+# KPIs: objects with add_rows(header, rows) and reset()) exactly once: a full
+# resync only passes on the rows below the ones already seen, and resets the
+# observers first when the sheet was cleared or rewritten.
+#
+# Scans pushed to the app directly (add_local) are shown and counted right
+# away. When the same scan later shows up in the sheet (mirrored by the ingest
+# writer) it is matched to the local one by LOCAL_MATCH_COLUMNS and not counted
+# a second time. Once the writer confirms a row (confirm_local), the first read
+# started after that is expected to contain it; a row it does not contain was
+# dropped or rewritten on the way and is forgotten. At most `max_local` rows
+# are kept, for at most `max_local_age` seconds.
+class RecentScansTail:
+    def __init__(self, sheet_name, per_group=RECENT_SCANS_PER_GROUP, resync_every=60, observers=(),
+                 max_local=LOCAL_ROWS_MAX, max_local_age=LOCAL_ROW_MAX_AGE_SECONDS):
+        self.sheet_name = sheet_name
+        self.per_group = per_group
+        self.resync_every = resync_every
+        self.observers = list(observers)
+        self.max_local = max_local
+        self.max_local_age = max_local_age
+
+        self._lock = threading.RLock() # Sheet refreshes and pushed scans arrive on different threads
+        self.header = None
+        self.last_row_number = 0 # Sheet row number of the last ingested row (1 = header)
+        self.last_row = None
+        self.buffers = {}
+        self.refreshes_since_resync = 0
+        self.last_new_rows = 0
+        self.resync_count = 0
+        self.observed_until = 0 # Sheet row number of the last row given to the observers
+        self.local_rows = OrderedDict() # sequence -> [row, pushed at, confirmed at, match key]; not seen in the sheet yet
+        self._local_by_key = {} # match key -> sequences, oldest first
+        self._local_sequence = 0
+        self._read_started_at = 0.0
+
+    @property
+    def needs_full_fetch(self):
+        return self.header is None or self.refreshes_since_resync >= self.resync_every
+
+    def full_range(self):
+        return a1_sheet(self.sheet_name)
+
+    # Range for the next refresh: whole sheet on first use / resync, otherwise the tail
+    def next_range(self):
+        self._read_started_at = time.time()
+        if self.needs_full_fetch:
+            return self.full_range()
+        last_col = column_letter(len(self.header))
+        return f"{a1_sheet(self.sheet_name)}!A{self.last_row_number}:{last_col}"
+
+    # Ingest the values returned for next_range(). Returns False when the tail no
+    # longer lines up with what was ingested before and a full resync is needed.
+    def ingest(self, values, requested_range):
+        if requested_range == self.full_range():
+            self.ingest_full(values)
+            return True
+
+        with self._lock:
+            rows = self._pad(values)
+            if not rows or rows[0] != self.last_row:
+                return False
+
+            self.refreshes_since_resync += 1
+            self._append(rows[1:], self.last_row_number + 1)
+            self._expire_local()
+            return True
+
+    def ingest_full(self, values):
+        with self._lock:
+            reset = not self._continues(values)
+            if reset:
+                for observer in self.observers:
+                    observer.reset()
+                self.observed_until = 0
+
+            self.header = list(values[0]) if values else None
+            self.buffers = {}
+            self.last_row_number = 1 if values else 0
+            self.last_row = self.header
+            self.refreshes_since_resync = 0
+            self.resync_count += 1
+            self._append(self._pad(values[1:]), 2, rebuild=True, reset=reset)
+            self._expire_local()
+            if self.header is None:
+                # Empty sheet (cleared): nothing to show them under, but keep
+                # the pushed scans pending until the sheet has a header again
+                return
+
+            # Pushed scans that have not reached the sheet yet stay on screen (and counted)
+            pending = [row for row, *_ in self.local_rows.values()]
+            for sequence, (row, *_) in self.local_rows.items():
+                self._buffer_row((self.last_row_number, sequence), row)
+            if reset and pending and self.observers:
+                for observer in self.observers:
+                    observer.add_rows(self.header, pending)
+
+    # Rows (in sheet column order) pushed straight to the app, ahead of the sheet
+    def add_local(self, rows):
+        with self._lock:
+            if self.header is None:
+                raise RuntimeError("The Recent Scanned sheet has not been read yet")
+            rows = self._pad(rows)
+            now = time.time()
+            for row in rows:
+                self._local_sequence += 1
+                key = self._match_key(row)
+                self.local_rows[self._local_sequence] = [row, now, None, key]
+                self._local_by_key.setdefault(key, []).append(self._local_sequence)
+                self._buffer_row((self.last_row_number, self._local_sequence), row)
+            while len(self.local_rows) > self.max_local:
+                self._drop_local(next(iter(self.local_rows)))
+            for observer in self.observers:
+                observer.add_rows(self.header, rows)
+            return self._local_sequence
+
+    # The pushed rows up to sequence `until` (add_local numbers them from 1, in
+    # order) have been written to the sheet
+    def confirm_local(self, until):
+        with self._lock:
+            now = time.time()
+            for sequence, entry in self.local_rows.items():
+                if sequence > until:
+                    break
+                if entry[2] is None:
+                    entry[2] = now
+
+    # Is `values` (a full read) the sheet we ingested before, with rows added below?
+    def _continues(self, values):
+        if self.header is None or self.last_row_number < 2 or len(values) < self.last_row_number:
+            return False
+        if list(values[0]) != self.header:
+            return False
+        return self._pad([values[self.last_row_number - 1]])[0] == self.last_row
+
+    def _pad(self, rows):
+        width = len(self.header) if self.header else 0
+        return [
+            list(row[:width]) + [''] * (width - len(row)) if len(row) != width else list(row)
+            for row in rows
+        ]
+
+    def _match_key(self, row):
+        positions = [self.header.index(name) for name in LOCAL_MATCH_COLUMNS if name in self.header]
+        if len(positions) < len(LOCAL_MATCH_COLUMNS):
+            return tuple(row)
+        return tuple(row[position] for position in positions)
+
+    # A sheet row that was pushed locally before: stop tracking it as pending
+    def _take_local(self, row):
+        sequences = self._local_by_key.get(self._match_key(row))
+        if not sequences:
+            return False
+        self._drop_local(sequences[0])
+        return True
+
+    def _drop_local(self, sequence):
+        *_, key = self.local_rows.pop(sequence)
+        sequences = self._local_by_key[key]
+        sequences.remove(sequence)
+        if not sequences:
+            del self._local_by_key[key]
+
+    # After a read: forget pushed rows it should have contained (confirmed before
+    # it started) and rows older than max_local_age
+    def _expire_local(self):
+        too_old = time.time() - self.max_local_age
+        for sequence, (_, pushed_at, confirmed_at, _) in list(self.local_rows.items()):
+            if pushed_at < too_old or (confirmed_at is not None and confirmed_at < self._read_started_at):
+                self._drop_local(sequence)
+
+    def _buffer_row(self, sort_key, row):
+        if not any(row):
+            return
+        key = (
+            row[self._line_pos] if self._line_pos is not None else '',
+            row[self._process_pos] if self._process_pos is not None else '',
+        )
+        buffer = self.buffers.get(key)
+        if buffer is None:
+            buffer = self.buffers[key] = deque(maxlen=self.per_group)
+        buffer.append((sort_key, row))
+
+    @property
+    def _line_pos(self):
+        return self.header.index('line') if 'line' in self.header else None
+
+    @property
+    def _process_pos(self):
+        return self.header.index('Process') if 'Process' in self.header else None
+
+    # `rebuild`: the buffers were just cleared, so every row goes back in.
+    # `reset`: the observers were just reset, so every row is counted again.
+    def _append(self, rows, first_row_number, rebuild=False, reset=False):
+        self.last_new_rows = len(rows)
+        if not rows:
+            return
+
+        observed = []
+        for offset, row in enumerate(rows):
+            row_number = first_row_number + offset
+            new = row_number > self.observed_until
+            local = new and bool(self.local_rows) and self._take_local(row)
+            if rebuild or not local:
+                self._buffer_row((row_number, 0), row)
+            if new and (reset or not local):
+                observed.append(row)
+
+        self.last_row_number = first_row_number + len(rows) - 1
+        self.last_row = rows[-1]
+
+        if self.last_row_number > self.observed_until:
+            if observed:
+                for observer in self.observers:
+                    observer.add_rows(self.header, observed)
+            self.observed_until = self.last_row_number
+
+    # Buffered rows as the dashboard frame, in sheet order (pushed scans after
+    # the sheet row they arrived behind)
+    def frame(self):
+        with self._lock:
+            if self.header is None or not self.buffers:
+                return pd.DataFrame()
+
+            entries = sorted(
+                (entry for buffer in self.buffers.values() for entry in buffer),
+                key=lambda entry: entry[0],
+            )
+            df = pd.DataFrame([row for _, row in entries], columns=self.header)
+        df.rename(columns=RECENT_SCANNED_COLUMNS, inplace=True)
+
+        return df[list(RECENT_SCANNED_COLUMNS.values())]
@@ -0,0 +1,79 @@
+import pytest
+
+from cycle_times import CycleTimeStats, QuantileSketch, format_seconds, parse_duration
+
+HEADER = ['Timestamp', 'line', 'Process', 'BELT NAME', 'Duration']
+
+
+@pytest.mark.parametrize('text, seconds', [
+    ('0:04:12', 252),
+    ('04:12', 252),
+    ('252', 252),
+    (' 1:00:00 ', 3600),
+    (90.5, 90.5),
+])
+def test_parse_duration(text, seconds):
+    assert parse_duration(text) == seconds
+
+
+@pytest.mark.parametrize('text', ['', 'soon', '1:2:3:4', '-5', '0:-1:00', 'nan', 'inf', '-inf', '0:nan', '0', '0:00:00'])
+def test_parse_duration_rejects(text):
+    assert parse_duration(text) is None
+
+
+def test_format_seconds():
+    assert format_seconds(252) == '0:04:12'
+    assert format_seconds(None) == '-'
+    assert format_seconds(float('nan')) == '-'
+
+
+def test_sketch_quantiles_are_within_the_accuracy():
+    sketch = QuantileSketch(accuracy=0.02)
+    for value in range(1, 1001):
+        sketch.add(value)
+    assert sketch.count == 1000
+    assert sketch.quantile(0.5) == pytest.approx(500, rel=0.03)
+    assert sketch.quantile(0.95) == pytest.approx(950, rel=0.03)
+
+
+def test_sketches_merge():
+    low, high = QuantileSketch(), QuantileSketch()
+    for value in range(1, 501):
+        low.add(value)
+    for value in range(501, 1001):
+        high.add(value)
+    low.merge(high)
+    assert low.count == 1000
+    assert low.quantile(0.5) == pytest.approx(500, rel=0.03)
+
+
+def test_stats_skip_rows_that_are_not_durations():
+    stats = CycleTimeStats(window=3600)
+    now = 1_000_000.0
+    rows = [['', 'Line-1', 'Building', f'SLV-{n}', duration] for n, duration in enumerate(['0:04:00', 'nan', 'inf', '0:06:00'])]
+    stats.add_rows(HEADER, rows, now=now)
+
+    assert stats.unparsed == 2
+    summary = stats.summary(('Line-1', 'Building'), now=now)
+    assert summary['count'] == 2
+    assert summary['mean'] == 300
+
+
+def test_stats_forget_scans_outside_the_window():
+    stats = CycleTimeStats(window=600, bucket_seconds=60)
+    stats.add_rows(HEADER, [['', 'Line-1', 'Building', 'SLV-1', '0:04:00']], now=0.0)
+    assert stats.summary(('Line-1', 'Building'), now=60.0)['count'] == 1
+    assert stats.summary(('Line-1', 'Building'), now=2000.0)['count'] == 0
+
+
+def test_undated_rows_of_a_full_read_are_skipped():
+    stats = CycleTimeStats(window=3600)
+    now = 1_000_000.0
+    stats.reset() # A full read follows
+    stats.add_rows(HEADER, [['', 'Line-1', 'Building', f'SLV-{n}', '0:04:00'] for n in range(50)], now=now)
+    assert stats.summary(('Line-1', 'Building'), now=now)['count'] == 0
+    assert stats.undated == 50
+
+    # New rows after it: just scanned
+    stats.add_rows(HEADER, [['', 'Line-1', 'Building', 'SLV-50', '0:04:00']], now=now)
+    assert stats.summary(('Line-1', 'Building'), now=now)['count'] == 1
@@ -0,0 +1,94 @@
+import pytest
+
+from data_sources import GoogleSheetsSource, LocalSheetsSource, a1_sheet, pad_rows, parse_a1_range
+
+
+class FakeSpreadsheet:
+    def __init__(self):
+        self.calls = []
+
+    def values_batch_get(self, ranges):
+        self.calls.append(('values_batch_get', ranges))
+        return {'valueRanges': [{'values': [['a', 'b'], ['c']]} for _ in ranges]}
+
+    def worksheets(self):
+        raise AssertionError("worksheet metadata is not needed")
+
+
+class FakeClient:
+    def __init__(self):
+        self.opened = 0
+        self.spreadsheet = FakeSpreadsheet()
+
+    def open_by_key(self, key):
+        self.opened += 1
+        return self.spreadsheet
+
+
+def test_google_source_opens_once_and_reads_in_one_request():
+    gc = FakeClient()
+    source = GoogleSheetsSource(gc, 'sheet-id')
+
+    assert source.batch_get(["'Calculation'", "'Recent Scanned'!A5:E"]) == [[['a', 'b'], ['c', '']]] * 2
+    assert source.last_stats['round_trips'] == 2 # open_by_key + values.batchGet
+
+    source.batch_get(["'Recent Scanned'!A7:E"])
+    assert source.last_stats['round_trips'] == 1
+    assert gc.opened == 1
+
+
+@pytest.mark.parametrize('a1_range, parsed', [
+    ("'Calculation'", ('Calculation', 1, None, 1, None)),
+    ("'Recent Scanned'!A5:F", ('Recent Scanned', 5, None, 1, 6)),
+    ("'Recent Scanned'!B2:AA10", ('Recent Scanned', 2, 10, 2, 27)),
+    ("'Recent Scanned'!C", ('Recent Scanned', 1, None, 3, 3)),
+    ("Sheet1!A1:B2", ('Sheet1', 1, 2, 1, 2)),
+    (a1_sheet("Bob's scans") + "!A3:E", ("Bob's scans", 3, None, 1, 5)),
+])
+def test_parse_a1_range(a1_range, parsed):
+    assert parse_a1_range(a1_range) == parsed
+
+
+def test_parse_a1_range_rejects_garbage():
+    with pytest.raises(ValueError):
+        parse_a1_range("'Recent Scanned'!5:A")
+
+
+def test_pad_rows():
+    assert pad_rows([]) == []
+    assert pad_rows([['a', 'b', 'c'], ['d'], []]) == [['a', 'b', 'c'], ['d', '', ''], ['', '', '']]
+    rows = [['a', 'b']]
+    assert pad_rows(rows)[0] is rows[0] # Full rows are not copied
+
+
+@pytest.fixture
+def local_source(tmp_path):
+    source = LocalSheetsSource(str(tmp_path / 'sheets.db'))
+    source.write_sheet('Recent Scanned', [
+        ['Timestamp', 'line', 'Process', 'BELT NAME', 'Duration', 'Note'],
+        ['t1', 'Line-1', 'Building', 'SLV-1', '0:04:00'],
+        ['t2', 'Line-1', 'Curing', 'SLV-2'],
+        ['t3', 'Line-2', 'Building', 'SLV-3', '0:05:00'],
+        ['t4', 'Line-2', 'Curing', 'SLV-4', '0:06:00', 'late'],
+    ])
+    source.write_sheet('Calculation', [['Area', 'Line'], ['Line-1', 'Building']])
+    yield source
+    source.conn.close()
+
+
+def test_local_batch_get_tail_range(local_source):
+    calculation, tail = local_source.batch_get(["'Calculation'", "'Recent Scanned'!A3:F"])
+    assert calculation == [['Area', 'Line'], ['Line-1', 'Building']]
+    assert tail == [
+        ['t2', 'Line-1', 'Curing', 'SLV-2', '', ''],
+        ['t3', 'Line-2', 'Building', 'SLV-3', '0:05:00', ''],
+        ['t4', 'Line-2', 'Curing', 'SLV-4', '0:06:00', 'late'],
+    ]
+    assert local_source.last_stats['round_trips'] == 1
+
+
+def test_local_batch_get_columns_and_rows(local_source):
+    (grid,) = local_source.batch_get(["'Recent Scanned'!B2:C3"])
+    assert grid == [['Line-1', 'Building'], ['Line-1', 'Curing']]
+    # Past the last row: nothing, like the values API
+    assert local_source.batch_get(["'Recent Scanned'!A9:F"]) == [[]]
@@ -0,0 +1,100 @@
+import pytest
+
+import fetch_scheduler
+from fetch_scheduler import FetchScheduler, classify_error
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(fetch_scheduler.time, 'time', clock)
+    return clock
+
+
+class ApiError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.response = type('Response', (), {'status_code': status_code})()
+
+
+def wrapped(exc):
+    try:
+        raise exc
+    except Exception as inner:
+        try:
+            raise RuntimeError("fetch failed") from inner
+        except RuntimeError as outer:
+            return outer
+
+
+@pytest.mark.parametrize('exc, kind', [
+    (ApiError(429), 'quota'),
+    (ApiError(503), 'server'),
+    (ApiError(404), 'config'),
+    (TimeoutError(), 'network'),
+    (wrapped(ApiError(429)), 'quota'),
+    (ValueError("?"), 'unknown'),
+])
+def test_classify_error(exc, kind):
+    assert classify_error(exc) == kind
+
+
+def test_interval_stretches_to_the_budget(clock):
+    scheduler = FetchScheduler(base_interval=10, quota_per_minute=60, budget_fraction=0.5)
+    assert scheduler.interval == 10
+    for _ in range(20):
+        scheduler.record_requests(5) # A refresh costing ~5 requests: 30/min allows one every 10 s
+    assert scheduler.interval == pytest.approx(10, rel=0.01)
+    scheduler.record_requests(20)
+    assert scheduler.interval > 10
+
+
+def test_no_fetch_while_the_minute_is_used_up(clock):
+    scheduler = FetchScheduler(base_interval=0, quota_per_minute=10, budget_fraction=1.0)
+    assert scheduler.due()
+    scheduler.record_requests(10)
+    assert not scheduler.due()
+    clock.now += 61
+    assert scheduler.due()
+
+
+def test_backoff_then_breaker(clock):
+    scheduler = FetchScheduler(base_interval=10, failure_threshold=3, open_seconds=60)
+    scheduler.record_failure(ApiError(503))
+    assert not scheduler.due()
+    clock.now += 10 * 2 * 1.5 + 1
+    assert scheduler.due()
+
+    scheduler.record_failure(ApiError(503))
+    scheduler.record_failure(ApiError(503))
+    assert scheduler.state()['breaker'] == 'open'
+    clock.now += 61
+    assert scheduler.due() # The trial fetch
+    assert scheduler.state()['breaker'] == 'half-open'
+    assert not scheduler.due()
+
+    scheduler.record_failure(ApiError(503))
+    assert scheduler.state()['breaker'] == 'open'
+    assert scheduler.state()['next_fetch_in'] == pytest.approx(120)
+
+    clock.now += 121
+    assert scheduler.due()
+    scheduler.record_success()
+    assert scheduler.state()['breaker'] == 'closed'
+    assert scheduler.consecutive_failures == 0
+
+
+def test_config_errors_retry_slowly_without_tripping(clock):
+    scheduler = FetchScheduler(failure_threshold=2, config_retry_interval=60)
+    for _ in range(5):
+        scheduler.record_failure(ApiError(404))
+    assert scheduler.state()['breaker'] == 'closed'
+    assert scheduler.state()['next_fetch_in'] == pytest.approx(60)
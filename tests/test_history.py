@@ -0,0 +1,37 @@
+import pandas as pd
+
+from history import KpiHistory
+
+START = 1_800_000_000 // 900 * 900 # A quarter-hour boundary
+
+
+class Sample:
+    def __init__(self, fetched_at, built, key='Line-1 - Building'):
+        self.fetched_at = fetched_at
+        self.kpi = pd.DataFrame({
+            'Area_Line_Key': [key], 'Planned Sleeves': [100], 'Sleeves Build': [built], 'Not Produced Sleeves': [100 - built],
+        })
+
+
+def history_with(tmp_path, samples):
+    history = KpiHistory(str(tmp_path / 'history.db'))
+    for offset, built in samples:
+        history.record(Sample(START + offset, built))
+    return history
+
+
+def test_throughput_per_bucket(tmp_path):
+    history = history_with(tmp_path, [(0, 10), (300, 15), (900, 30), (1800, 30), (2700, 45)])
+    trend = history.throughput(['Line-1 - Building'], START, bucket_seconds=900, until=START + 2700)
+    assert trend['Line-1 - Building'].tolist() == [0, 15, 0, 15]
+
+
+def test_throughput_counts_from_the_new_value_after_a_reset(tmp_path):
+    history = history_with(tmp_path, [(0, 10), (900, 30), (1800, 5), (2700, 12)])
+    trend = history.throughput(['Line-1 - Building'], START, bucket_seconds=900, until=START + 2700)
+    assert trend['Line-1 - Building'].tolist() == [0, 20, 5, 7]
+
+
+def test_throughput_skips_lines_without_samples(tmp_path):
+    history = history_with(tmp_path, [(0, 10)])
+    assert history.throughput(['Line-9 - Curing'], START, until=START + 900).empty
@@ -0,0 +1,114 @@
+from datetime import datetime
+
+import pandas as pd
+
+import line_kpis
+from line_kpis import LineKpiEngine, shift_start
+
+HEADER = ['Timestamp', 'line', 'Process', 'BELT NAME']
+NOW = datetime(2026, 10, 17, 10, 30).timestamp()
+
+
+def plan(*rows):
+    return pd.DataFrame(
+        [(area, line, planned, f"{area} - {line}") for area, line, planned in rows],
+        columns=['Area', 'Line', 'Planned Sleeves', 'Area_Line_Key'],
+    )
+
+
+def scan(line, process, timestamp='2026-10-17 10:00:00'):
+    return [timestamp, line, process, 'B-1']
+
+
+def test_counts_scans_against_the_plan():
+    engine = LineKpiEngine()
+    engine.set_plan(plan(('Line-1', 'Building', 4), ('Line-1', 'Curing', 0)))
+    engine.add_rows(HEADER, [scan('Line-1', 'Building')] * 3 + [scan('Line-1', 'Curing')])
+
+    kpi = engine.frame().set_index('Area_Line_Key')
+    assert kpi.loc['Line-1 - Building', 'Sleeves Build'] == 3
+    assert kpi.loc['Line-1 - Building', 'Not Produced Sleeves'] == 1
+    assert kpi.loc['Line-1 - Building', 'Production rate %'] == 0.75
+    # No plan: nothing pending and 0 % instead of a division by zero
+    assert kpi.loc['Line-1 - Curing', 'Not Produced Sleeves'] == 0
+    assert kpi.loc['Line-1 - Curing', 'Production rate %'] == 0.0
+
+
+def test_overproduction_does_not_go_negative():
+    engine = LineKpiEngine()
+    engine.set_plan(plan(('Line-1', 'Building', 1)))
+    engine.add_rows(HEADER, [scan('Line-1', 'Building')] * 2)
+
+    kpi = engine.frame()
+    assert kpi['Not Produced Sleeves'].tolist() == [0]
+    assert kpi['Production rate %'].tolist() == [2.0]
+
+
+def test_blank_and_unplanned_rows():
+    engine = LineKpiEngine()
+    engine.set_plan(plan(('Line-1', 'Building', 5)))
+    engine.add_rows(HEADER, [['', '', '', ''], scan('Line-9', 'Building'), scan('Line-1', 'Building')])
+
+    assert engine.frame()['Sleeves Build'].tolist() == [1]
+    assert engine.unplanned_scans == 1
+
+
+def test_reset_starts_counting_again():
+    engine = LineKpiEngine()
+    engine.set_plan(plan(('Line-1', 'Building', 5)))
+    engine.add_rows(HEADER, [scan('Line-1', 'Building')] * 2)
+    engine.reset()
+    engine.add_rows(HEADER, [scan('Line-1', 'Building')])
+
+    assert engine.frame()['Sleeves Build'].tolist() == [1]
+
+
+def test_no_plan_gives_an_empty_frame():
+    engine = LineKpiEngine()
+    engine.add_rows(HEADER, [scan('Line-1', 'Building')])
+    assert engine.frame().empty
+    # Scans counted before the plan arrives still show up once it does
+    engine.set_plan(plan(('Line-1', 'Building', 5)))
+    assert engine.frame()['Sleeves Build'].tolist() == [1]
+
+
+def test_header_without_the_key_columns_is_ignored():
+    engine = LineKpiEngine()
+    engine.set_plan(plan(('Line-1', 'Building', 5)))
+    engine.add_rows(['Timestamp'], [['2026-10-17 10:00:00']])
+    assert engine.frame()['Sleeves Build'].tolist() == [0]
+
+
+def test_shift_start():
+    starts = ('06:00', '18:00')
+    assert shift_start(NOW, starts) == datetime(2026, 10, 17, 6, 0).timestamp()
+    assert shift_start(datetime(2026, 10, 17, 19, 0).timestamp(), starts) == datetime(2026, 10, 17, 18, 0).timestamp()
+    # Night shift, after midnight
+    assert shift_start(datetime(2026, 10, 18, 2, 0).timestamp(), starts) == datetime(2026, 10, 17, 18, 0).timestamp()
+
+
+def test_only_scans_of_the_current_shift_count(monkeypatch):
+    monkeypatch.setattr(line_kpis.time, 'time', lambda: NOW)
+    engine = LineKpiEngine(shift_starts=('06:00', '18:00'))
+    engine.set_plan(plan(('Line-1', 'Building', 5)))
+    engine.add_rows(HEADER, [
+        scan('Line-1', 'Building', '2026-10-16 10:00:00'), # Yesterday
+        scan('Line-1', 'Building', '2026-10-17 05:59:59'), # Night shift
+        scan('Line-1', 'Building', '2026-10-17 06:00:00'),
+        scan('Line-1', 'Building', 'not a time'), # Cannot be placed: counted
+    ])
+    assert engine.frame()['Sleeves Build'].tolist() == [2]
+    assert engine.earlier_scans == 2
+
+
+def test_counts_start_again_at_the_next_shift(monkeypatch):
+    clock = [NOW]
+    monkeypatch.setattr(line_kpis.time, 'time', lambda: clock[0])
+    engine = LineKpiEngine(shift_starts=('06:00', '18:00'))
+    engine.set_plan(plan(('Line-1', 'Building', 5)))
+    engine.add_rows(HEADER, [scan('Line-1', 'Building')] * 3)
+
+    clock[0] = datetime(2026, 10, 17, 18, 5).timestamp()
+    assert engine.frame()['Sleeves Build'].tolist() == [0]
+    engine.add_rows(HEADER, [scan('Line-1', 'Building', '2026-10-17 18:04:00')])
+    assert engine.frame()['Sleeves Build'].tolist() == [1]
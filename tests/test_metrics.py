@@ -0,0 +1,78 @@
+from metrics import Metrics
+
+
+def test_counters_with_labels():
+    metrics = Metrics()
+    metrics.inc('fetches_total', result='ok')
+    metrics.inc('fetches_total', 2, result='ok')
+    metrics.inc('fetches_total', result='error')
+
+    assert metrics.counter('fetches_total', result='ok') == 3
+    assert metrics.counter('fetches_total', result='error') == 1
+    assert metrics.counter('fetches_total', result='timeout') == 0
+
+
+def test_stage_histogram():
+    metrics = Metrics()
+    for seconds in (0.002, 0.02, 3.0):
+        metrics.observe('fetch', seconds)
+
+    text = metrics.render_prometheus()
+    assert 'lpt_stage_seconds_bucket{stage="fetch",le="0.005"} 1' in text
+    assert 'lpt_stage_seconds_bucket{stage="fetch",le="0.025"} 2' in text
+    assert 'lpt_stage_seconds_bucket{stage="fetch",le="+Inf"} 3' in text
+    assert 'lpt_stage_seconds_count{stage="fetch"} 3' in text
+
+    summary = metrics.stage_summary()['fetch']
+    assert summary['count'] == 3
+    assert summary['p50'] == 0.02
+
+
+def test_reset_stages_keeps_counters():
+    metrics = Metrics()
+    metrics.inc('renders_total')
+    with metrics.timer('render'):
+        pass
+    metrics.reset_stages()
+
+    assert metrics.stage_summary() == {}
+    assert metrics.counter('renders_total') == 1
+
+
+def test_cache_hit_ratio():
+    metrics = Metrics()
+
+    @metrics.cache_calls('thumbnail')
+    def cached(name, _cache={}):
+        if name not in _cache:
+            _cache[name] = load(name)
+        return _cache[name]
+
+    @metrics.cache_misses('thumbnail')
+    def load(name):
+        return name.upper()
+
+    for name in ('a', 'a', 'a', 'b'):
+        cached(name)
+
+    assert metrics.cache_summary() == {'thumbnail': {'requests': 4, 'misses': 2, 'hit_ratio': 0.5}}
+
+
+def test_gauges_skip_failing_callbacks_and_missing_values():
+    metrics = Metrics()
+    metrics.gauge('snapshot_age_seconds', lambda: 4, help_text='Age of the served snapshot')
+    metrics.gauge('line_rate', lambda: {(('line', 'Line-1'),): 0.5, (('line', 'Line-2'),): None})
+    metrics.gauge('broken', lambda: 1 / 0)
+
+    text = metrics.render_prometheus()
+    assert '# HELP lpt_snapshot_age_seconds Age of the served snapshot' in text
+    assert 'lpt_snapshot_age_seconds 4.0' in text
+    assert 'lpt_line_rate{line="Line-1"} 0.5' in text
+    assert 'Line-2' not in text
+    assert 'broken' not in text
+
+
+def test_label_values_are_escaped():
+    metrics = Metrics()
+    metrics.inc('errors_total', kind='say "hi"\n')
+    assert 'lpt_errors_total{kind="say \\"hi\\"\\n"} 1' in metrics.render_prometheus()
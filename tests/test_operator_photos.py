@@ -0,0 +1,59 @@
+from operator_photos import build_manifest
+
+
+def touch(directory, *names):
+    for name in names:
+        (directory / name).write_bytes(b'')
+
+
+def names(manifest, key):
+    return [(path.rsplit('/', 1)[-1], caption) for path, caption in manifest.get(key, [])]
+
+
+def test_photos_are_picked_up_from_file_names(tmp_path):
+    touch(tmp_path, 'Line-1-Building-Ian.JPG', 'Line-1-curing-Joseph.jpg', 'logo.png', 'notes.txt')
+    manifest = build_manifest(str(tmp_path))
+    assert names(manifest, 'Line-1 - Building') == [('Line-1-Building-Ian.JPG', 'Ian')]
+    assert names(manifest, 'Line-1 - Curing') == [('Line-1-curing-Joseph.jpg', 'Joseph')]
+    assert len(manifest) == 2
+
+
+def test_overrides_rename_photos(tmp_path):
+    touch(tmp_path, 'Line-1-Building-Ian.JPG', 'Line-1-Building-Sam.jpg')
+    manifest = build_manifest(str(tmp_path), overrides={
+        'Line-1 - Building': [('line-1-building-ian.jpg', 'Ian P.'), ('Line-1-Building-Gone.jpg', 'Gone')],
+    })
+    assert names(manifest, 'Line-1 - Building') == [('Line-1-Building-Ian.JPG', 'Ian P.'), ('Line-1-Building-Sam.jpg', 'Sam')]
+
+
+def test_a_photo_listed_under_another_line_moves_there(tmp_path):
+    touch(tmp_path, 'Line-1-Building-Pramoth.jpg', 'Line-1-Building-Chemal.jpg', 'Line-1-Curing-Charles.jpg')
+    manifest = build_manifest(str(tmp_path), overrides={
+        'Line-1 - Curing': [('Line-1-Building-Chemal.jpg', 'Chamal')],
+    })
+    assert names(manifest, 'Line-1 - Building') == [('Line-1-Building-Pramoth.jpg', 'Pramoth')]
+    assert names(manifest, 'Line-1 - Curing') == [('Line-1-Building-Chemal.jpg', 'Chamal'), ('Line-1-Curing-Charles.jpg', 'Charles')]
+
+
+def test_a_photo_listed_under_both_lines_shows_on_both(tmp_path):
+    touch(tmp_path, 'Line-1-Building-Chemal.jpg')
+    manifest = build_manifest(str(tmp_path), overrides={
+        'Line-1 - Building': [('Line-1-Building-Chemal.jpg', 'Chamal')],
+        'Line-1 - Curing': [('Line-1-Building-Chemal.jpg', 'Chamal')],
+    })
+    assert names(manifest, 'Line-1 - Building') == names(manifest, 'Line-1 - Curing') == [('Line-1-Building-Chemal.jpg', 'Chamal')]
+
+
+def test_a_none_caption_hides_the_photo(tmp_path):
+    touch(tmp_path, 'Line-1-Building-John Rey.jpg', 'Line-1-Building-Normandy.JPG')
+    manifest = build_manifest(str(tmp_path), overrides={'Line-1 - Building': [('Line-1-Building-John Rey.jpg', None)]})
+    assert names(manifest, 'Line-1 - Building') == [('Line-1-Building-Normandy.JPG', 'Normandy')]
+
+
+def test_removed_photo_leaves_the_roster(tmp_path):
+    touch(tmp_path, 'Line-1-Building-Ian.jpg')
+    overrides = {'Line-1 - Building': [('Line-1-Building-Ian.jpg', 'Ian P.')]}
+    assert names(build_manifest(str(tmp_path), overrides), 'Line-1 - Building') == [('Line-1-Building-Ian.jpg', 'Ian P.')]
+
+    (tmp_path / 'Line-1-Building-Ian.jpg').unlink()
+    assert build_manifest(str(tmp_path), overrides) == {}
@@ -0,0 +1,64 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from plants import Plant, PlantRefreshers, load_plants
+from snapshots import SnapshotRefresher
+from test_snapshot_refresher import KPI, scans_frame
+
+DEFAULT = Plant("Main", "sheet-0")
+
+
+def write_config(tmp_path, plants):
+    path = tmp_path / 'plants.json'
+    path.write_text(json.dumps({'plants': plants}), encoding='utf-8')
+    return str(path)
+
+
+def test_without_a_config_file_the_default_plant_is_served(tmp_path):
+    assert load_plants(str(tmp_path / 'missing.json'), DEFAULT) == {"Main": DEFAULT}
+
+
+def test_plants_from_the_config_file(tmp_path):
+    path = write_config(tmp_path, [
+        {'name': "Colombo", 'spreadsheet_id': "sheet-1", 'image_dir': "photos/colombo",
+         'roster': {"Line-1 - Building": [["Line-1-Building-Ian.jpg", "Ian"]]}},
+        {'name': "Kandy Plant #2", 'spreadsheet_id': "sheet-2", 'scans_sheet': "Scans"},
+    ])
+    plants = load_plants(path, DEFAULT)
+
+    assert list(plants) == ["Colombo", "Kandy Plant #2"]
+    colombo, kandy = plants.values()
+    assert colombo.image_dir == str(tmp_path / 'photos' / 'colombo')
+    assert colombo.roster == {"Line-1 - Building": [("Line-1-Building-Ian.jpg", "Ian")]}
+    assert (colombo.kpi_sheet, kandy.scans_sheet) == ("Calculation", "Scans")
+    assert kandy.key == "kandy-plant-2"
+
+
+@pytest.mark.parametrize('plants', [
+    [],
+    [{'name': "Colombo"}],
+    [{'name': "Colombo", 'spreadsheet_id': "a"}, {'name': "colombo", 'spreadsheet_id': "b"}],
+])
+def test_invalid_configs(tmp_path, plants):
+    with pytest.raises(ValueError):
+        load_plants(write_config(tmp_path, plants), DEFAULT)
+
+
+def test_a_failing_plant_only_stales_itself():
+    def broken():
+        raise ConnectionError("spreadsheet unreachable")
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        plants = PlantRefreshers({
+            "Colombo": SnapshotRefresher(lambda: (KPI, scans_frame(['SLV-1'])), max_age=0, executor=executor),
+            "Kandy": SnapshotRefresher(broken, max_age=0, executor=executor),
+        })
+        snapshots = plants.refresh_all(timeout=10)
+
+    assert snapshots["Colombo"].scanned['Sleeve Name'].tolist() == ['SLV-1']
+    assert snapshots["Kandy"].kpi.empty
+    status = plants.status()
+    assert status["Colombo"][1] is None
+    assert isinstance(status["Kandy"][1], ConnectionError)
@@ -0,0 +1,111 @@
+from snapshots import RecentScansTail
+
+HEADER = ['Timestamp', 'line', 'Process', 'BELT NAME', 'Duration']
+
+
+class Recorder:
+    def __init__(self):
+        self.rows = []
+        self.resets = 0
+
+    def add_rows(self, header, rows):
+        self.rows.extend(rows)
+
+    def reset(self):
+        self.rows = []
+        self.resets += 1
+
+
+def scan(number, process='Building', duration='0:04:00'):
+    return [f'2026-10-17 10:{number:02d}:00', 'Line-1', process, f'SLV-{number}', duration]
+
+
+def new_tail(**kwargs):
+    recorder = Recorder()
+    tail = RecentScansTail('Recent Scanned', observers=[recorder], **kwargs)
+    tail.ingest_full([HEADER, scan(1), scan(2)])
+    return tail, recorder
+
+
+def test_tail_read_appends_new_rows():
+    tail, recorder = new_tail()
+    requested = tail.next_range()
+    assert requested == "'Recent Scanned'!A3:E"
+
+    assert tail.ingest([scan(2), scan(3)], requested)
+    assert tail.last_row_number == 4
+    assert tail.frame()['Sleeve Name'].tolist() == ['SLV-1', 'SLV-2', 'SLV-3']
+    assert [row[3] for row in recorder.rows] == ['SLV-1', 'SLV-2', 'SLV-3']
+
+
+def test_tail_read_that_no_longer_lines_up_needs_a_resync():
+    tail, _ = new_tail()
+    assert not tail.ingest([scan(9), scan(3)], tail.next_range())
+
+
+def test_resync_counts_every_row_once():
+    tail, recorder = new_tail()
+    tail.ingest_full([HEADER, scan(1), scan(2), scan(3)])
+    assert [row[3] for row in recorder.rows] == ['SLV-1', 'SLV-2', 'SLV-3']
+    assert recorder.resets == 1 # The first read only
+
+    # Cleared for a new shift
+    tail.ingest_full([HEADER, scan(7)])
+    assert recorder.resets == 2
+    assert [row[3] for row in recorder.rows] == ['SLV-7']
+
+
+def test_pushed_row_is_not_counted_again_when_read_back_reformatted():
+    tail, recorder = new_tail()
+    tail.add_local([scan(3, duration='252')])
+    assert tail.frame()['Sleeve Name'].tolist() == ['SLV-1', 'SLV-2', 'SLV-3']
+
+    assert tail.ingest([scan(2), scan(3, duration='0:04:12')], tail.next_range())
+    assert [row[3] for row in recorder.rows] == ['SLV-1', 'SLV-2', 'SLV-3']
+    assert not tail.local_rows
+    assert tail.frame()['Sleeve Name'].tolist() == ['SLV-1', 'SLV-2', 'SLV-3']
+
+
+def test_confirmed_row_missing_from_a_later_read_is_forgotten():
+    tail, _ = new_tail()
+    sequence = tail.add_local([scan(3)])
+
+    # Written but read before the write: still expected
+    requested = tail.next_range()
+    tail.confirm_local(sequence)
+    assert tail.ingest([scan(2)], requested)
+    assert len(tail.local_rows) == 1
+
+    # A read started after the write does not have it: dropped
+    assert tail.ingest([scan(2)], tail.next_range())
+    assert not tail.local_rows
+    assert not tail._local_by_key
+
+
+def test_pending_rows_are_bounded():
+    tail, _ = new_tail(max_local=3)
+    for number in range(10, 20):
+        tail.add_local([scan(number)])
+    assert [row[3] for row, *_ in tail.local_rows.values()] == ['SLV-17', 'SLV-18', 'SLV-19']
+    assert len(tail._local_by_key) == 3
+
+
+def test_old_pending_rows_expire():
+    tail, _ = new_tail(max_local_age=0)
+    tail.add_local([scan(3)])
+    assert tail.ingest([scan(2)], tail.next_range())
+    assert not tail.local_rows
+
+
+def test_cleared_sheet_keeps_pending_rows():
+    tail, recorder = new_tail()
+    tail.add_local([scan(3)])
+
+    tail.ingest_full([]) # Cleared, header row included
+    assert tail.frame().empty
+    assert len(tail.local_rows) == 1
+    assert tail.needs_full_fetch
+
+    tail.ingest_full([HEADER])
+    assert tail.frame()['Sleeve Name'].tolist() == ['SLV-3']
+    assert [row[3] for row in recorder.rows] == ['SLV-3']
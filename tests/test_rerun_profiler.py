@@ -0,0 +1,69 @@
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import rerun_profiler
+from rerun_profiler import RerunProfiler
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # One report name per call: 10 ms apart, within the same second
+    now = [1_800_000_000.0]
+
+    def tick():
+        now[0] += 0.01
+        return now[0]
+
+    monkeypatch.setattr(rerun_profiler, 'time', SimpleNamespace(
+        time=tick, perf_counter=time.perf_counter, strftime=lambda fmt: time.strftime(fmt, time.localtime(now[0])),
+    ))
+
+
+def stems(directory):
+    return sorted({os.path.splitext(name)[0] for name in os.listdir(directory)})
+
+
+def test_writes_a_profile_and_a_summary(tmp_path, clock):
+    profiler = RerunProfiler(str(tmp_path / 'profiles'), top=5)
+    result, path = profiler.run('render area', sum, [1, 2, 3])
+
+    assert result == 6
+    assert path.endswith('-render-area.pstats') and os.path.exists(path)
+    with open(path[:-len('.pstats')] + '.txt', encoding='utf-8') as f:
+        assert 'ms wall' in f.readline()
+    assert profiler.reports == 1
+
+
+def test_only_the_most_recent_reports_are_kept(tmp_path, clock):
+    directory = tmp_path / 'profiles'
+    profiler = RerunProfiler(str(directory), keep=3)
+    paths = [profiler.run(f'rerun {n}', len, 'abc')[1] for n in range(5)]
+
+    kept = stems(directory)
+    assert kept == sorted(os.path.splitext(os.path.basename(path))[0] for path in paths[-3:])
+    assert len(os.listdir(directory)) == 2 * 3 # .pstats + .txt each
+
+
+def test_failing_rerun_still_writes_its_report(tmp_path, clock):
+    profiler = RerunProfiler(str(tmp_path))
+
+    def fail():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        profiler.run('failing', fail)
+    assert profiler.reports == 1
+    assert len(stems(tmp_path)) == 1
+
+
+def test_a_busy_profiler_runs_unprofiled(tmp_path, clock):
+    profiler = RerunProfiler(str(tmp_path))
+    profiler._busy.acquire()
+    try:
+        assert profiler.run('other session', len, 'ab') == (2, None)
+    finally:
+        profiler._busy.release()
+    assert profiler.reports == 0
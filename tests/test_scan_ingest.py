@@ -0,0 +1,111 @@
+import http.client
+import json
+
+import pytest
+
+from scan_ingest import MAX_BODY_BYTES, ScanEventLog, ScanIngest, ScanIngestServer, event_row
+from snapshots import RecentScansTail
+
+HEADER = ['Timestamp', 'line', 'Process', 'BELT NAME', 'Duration']
+
+
+@pytest.fixture
+def server():
+    accepted = []
+    ingest = ScanIngestServer(0, lambda: HEADER, accepted.extend, ScanEventLog(), host="127.0.0.1")
+    ingest.accepted = accepted
+    yield ingest
+    ingest.httpd.shutdown()
+    ingest.httpd.server_close()
+
+
+def post(server, body=b'', content_length=None, headers=()):
+    connection = http.client.HTTPConnection('127.0.0.1', server.port, timeout=5)
+    connection.putrequest('POST', '/scans')
+    connection.putheader('Content-Length', str(len(body)) if content_length is None else content_length)
+    for name, value in headers:
+        connection.putheader(name, value)
+    connection.endheaders(body)
+    response = connection.getresponse()
+    status, payload = response.status, json.loads(response.read())
+    connection.close()
+    return status, payload
+
+
+def test_event_row():
+    row = event_row(
+        {'line': ' Line-1 ', 'process': 'Building', 'belt_name': 'SLV-1', 'duration': 252, 'timestamp': '2026-10-17 10:42:05'},
+        HEADER,
+    )
+    assert row == ['2026-10-17 10:42:05', 'Line-1', 'Building', 'SLV-1', '0:04:12']
+
+
+@pytest.mark.parametrize('event', [
+    [],
+    {'process': 'Building', 'belt_name': 'SLV-1', 'duration': 10},
+    {'line': 'Line-1', 'process': 'Building', 'belt_name': 'SLV-1', 'duration': 'soon'},
+    {'line': 'Line-1', 'process': 'Building', 'belt_name': 'SLV-1', 'duration': 'nan'},
+    {'line': 'Line-1', 'process': 'Building', 'belt_name': 'SLV-1', 'duration': 10, 'timestamp': 'today'},
+])
+def test_event_row_rejects(event):
+    with pytest.raises(ValueError):
+        event_row(event, HEADER)
+
+
+def test_accepts_scans(server):
+    scan = {'line': 'Line-1', 'process': 'Building', 'belt_name': 'SLV-1', 'duration': '0:01:00'}
+    status, payload = post(server, json.dumps([scan, scan]).encode())
+    assert (status, payload) == (202, {'accepted': 2})
+    assert len(server.accepted) == 2
+
+
+@pytest.mark.parametrize('content_length', ['abc', '-1'])
+def test_bad_content_length(server, content_length):
+    status, _ = post(server, b'{}', content_length=content_length)
+    assert status == 400
+    assert server.accepted == []
+
+
+def test_body_too_large(server):
+    status, _ = post(server, b'', content_length=str(MAX_BODY_BYTES + 1))
+    assert status == 413
+
+
+def test_token_is_checked():
+    ingest = ScanIngestServer(0, lambda: HEADER, lambda rows: None, ScanEventLog(), token='secret')
+    try:
+        scan = json.dumps({'line': 'L', 'process': 'Building', 'belt_name': 'S', 'duration': 5}).encode()
+        assert post(ingest, scan)[0] == 401
+        assert post(ingest, scan, headers=[('Authorization', 'Bearer secret')])[0] == 202
+    finally:
+        ingest.httpd.shutdown()
+        ingest.httpd.server_close()
+
+
+def test_network_host_needs_a_token():
+    with pytest.raises(ValueError):
+        ScanIngestServer(0, lambda: HEADER, lambda rows: None, ScanEventLog(), host="0.0.0.0")
+
+
+class FailingSource:
+    def append_rows(self, sheet_name, rows):
+        raise ConnectionError("Sheets is down")
+
+
+def test_full_backlog_refuses_scans():
+    tail = RecentScansTail('Recent Scanned')
+    tail.ingest_full([HEADER])
+    ingest = ScanIngest(tail, lambda: None, FailingSource(), 'Recent Scanned', 0, mirror_interval=3600)
+    ingest.log.max_backlog = 3
+    try:
+        rows = [event_row({'line': 'L', 'process': 'Building', 'belt_name': f'S{n}', 'duration': 5}, HEADER) for n in range(4)]
+        ingest.accept(rows[:2])
+        with pytest.raises(RuntimeError):
+            ingest.accept(rows[2:])
+        ingest.accept(rows[2:3])
+
+        assert (ingest.log.backlog, ingest.log.rejected) == (3, 2)
+        assert len(tail.local_rows) == 3 # Refused scans are not shown either
+    finally:
+        ingest.server.httpd.shutdown()
+        ingest.server.httpd.server_close()
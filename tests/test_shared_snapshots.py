@@ -0,0 +1,61 @@
+import os
+
+import pandas as pd
+import pytest
+
+from shared_snapshots import SharedSnapshots, fcntl
+from snapshots import Snapshot, compact_frame, content_hash
+from test_snapshots import kpi_frame, scanned_frame
+
+
+def snapshot(version, fetched_at, built=50):
+    kpi = kpi_frame().assign(**{'Sleeves Build': [built, 20]})
+    scanned = compact_frame(scanned_frame())
+    return Snapshot(kpi, scanned, fetched_at=fetched_at, version=version, content_hash=content_hash(kpi, scanned))
+
+
+def test_nothing_published_yet(tmp_path):
+    with pytest.raises(LookupError):
+        SharedSnapshots(str(tmp_path)).load()
+
+
+def test_replica_reads_the_published_version(tmp_path):
+    SharedSnapshots(str(tmp_path)).publish(snapshot(3, 1000.0))
+
+    loaded = SharedSnapshots(str(tmp_path)).load()
+    assert (loaded.version, loaded.fetched_at) == (3, 1000.0)
+    pd.testing.assert_frame_equal(loaded.kpi, kpi_frame())
+    assert loaded.scanned['Sleeve Name'].tolist() == scanned_frame()['Sleeve Name'].tolist()
+
+
+def test_unchanged_content_keeps_the_previous_frames(tmp_path):
+    publisher, replica = SharedSnapshots(str(tmp_path)), SharedSnapshots(str(tmp_path))
+    publisher.publish(snapshot(1, 1000.0))
+    first = replica.load()
+
+    publisher.publish(snapshot(2, 1010.0))
+    renewed = replica.load(previous=first)
+    assert renewed.kpi is first.kpi
+    assert (renewed.version, renewed.fetched_at) == (2, 1010.0)
+    assert replica.loaded == 1
+
+
+def test_old_versions_are_removed(tmp_path):
+    publisher = SharedSnapshots(str(tmp_path))
+    for version in range(1, 6):
+        publisher.publish(snapshot(version, 1000.0 + version, built=version))
+
+    arrow_files = [name for name in os.listdir(tmp_path) if name.endswith('.arrow')]
+    assert len(arrow_files) <= 2 * SharedSnapshots.KEEP_VERSIONS
+    assert SharedSnapshots(str(tmp_path)).load().kpi['Sleeves Build'].tolist() == [5, 20]
+
+
+@pytest.mark.skipif(fcntl is None, reason="publisher election needs flock")
+def test_one_publisher_at_a_time(tmp_path):
+    first, second = SharedSnapshots(str(tmp_path)), SharedSnapshots(str(tmp_path))
+    assert first.try_lead()
+    assert not second.try_lead()
+    assert not second.is_publisher
+
+    first._lock_file.close() # The publisher's process went away
+    assert second.try_lead()
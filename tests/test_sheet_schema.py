@@ -0,0 +1,56 @@
+from sheet_schema import KPI_SCHEMA, ColumnSpec, SheetSchema, parse_kpi_rows
+
+HEADER = ['Area', 'Line', 'Planning', 'Building', 'Pending', 'Percentage']
+
+
+def new_schema():
+    return SheetSchema(KPI_SCHEMA.columns.values())
+
+
+def test_formatted_cells():
+    df = parse_kpi_rows([HEADER, ['Line-1', 'Building', '1,200', '600', '600', '50.0%']], new_schema())
+    row = df.iloc[0]
+    assert row['Planned Sleeves'] == 1200
+    assert row['Sleeves Build'] == 600
+    assert row['Production rate %'] == 0.5
+    assert row['Area_Line_Key'] == 'Line-1 - Building'
+
+
+def test_padded_and_garbage_cells():
+    df = parse_kpi_rows([
+        HEADER,
+        ['Line-1', 'Building', ' 12', '12 ', 'abc', ' 5% '],
+        ['Line-1', 'Curing', '7', ' #N/A ', '3', '#DIV/0!'],
+    ], new_schema())
+    assert df['Planned Sleeves'].tolist() == [12, 7]
+    assert df['Sleeves Build'].tolist() == [12, 0]
+    assert df['Not Produced Sleeves'].tolist() == [0, 3] # "abc" -> 0, the rest of the column still parses
+    assert df['Production rate %'].tolist() == [0.05, 0.0]
+
+
+def test_convert_fallback_fills_with_zero():
+    import pyarrow as pa
+
+    column = ColumnSpec('Planning', kind="float").convert(pa.array(['1.5', 'n/a', ' 2 '], type=pa.string()))
+    assert column.tolist() == [1.5, 0.0, 2.0]
+
+
+def test_unchanged_columns_are_reused():
+    schema = new_schema()
+    data = [HEADER, ['Line-1', 'Building', '10', '5', '5', '50%']]
+    schema.parse(data)
+    _, planned = schema._cache['Planning']
+    schema.parse([list(row) for row in data])
+    assert schema._cache['Planning'][1] is planned # Not converted again
+
+    changed = schema.parse([HEADER, ['Line-1', 'Building', '11', '5', '5', '50%']])
+    assert schema._cache['Planning'][1] is not planned
+    assert changed['Planned Sleeves'].tolist() == [11]
+
+
+def test_schemas_do_not_share_their_memory():
+    plant_a, plant_b = new_schema(), new_schema()
+    plant_a.parse([HEADER, ['Line-1', 'Building', '10', '5', '5', '50%']])
+    df = plant_b.parse([HEADER, ['Line-9', 'Curing', '99', '1', '98', '1%']])
+    assert df['Planned Sleeves'].tolist() == [99]
+    assert df['Area'].tolist() == ['Line-9']
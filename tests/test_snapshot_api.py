@@ -0,0 +1,103 @@
+import gzip
+import http.client
+import json
+import time
+
+import pandas as pd
+import pytest
+
+from snapshot_api import SnapshotApiServer
+from snapshots import Snapshot
+
+
+def make_snapshot(version, built=5, areas=('Line-1', 'Line-2')):
+    kpi = pd.DataFrame({
+        'Area': [area for area in areas for _ in range(2)],
+        'Line': ['Building', 'Curing'] * len(areas),
+        'Planned Sleeves': [10] * 2 * len(areas),
+        'Sleeves Build': [built] * 2 * len(areas),
+        'Not Produced Sleeves': [10 - built] * 2 * len(areas),
+        'Production rate Display': [built / 10] * 2 * len(areas),
+    })
+    kpi['Area_Line_Key'] = kpi['Area'] + ' - ' + kpi['Line']
+    scanned = pd.DataFrame({
+        'Line Name': ['Line-1'], 'Process': ['Building'], 'Sleeve Name': ['SLV-1'], 'Time Taken': ['0:04:00'],
+    })
+    return Snapshot(kpi, scanned, fetched_at=time.time() - 30, version=version)
+
+
+@pytest.fixture
+def api():
+    current = {'snapshot': make_snapshot(1)}
+    server = SnapshotApiServer(0, lambda: current['snapshot'], host='127.0.0.1')
+    server.current = current
+    yield server
+    server.httpd.shutdown()
+    server.httpd.server_close()
+
+
+def get(api, path, headers=None):
+    connection = http.client.HTTPConnection('127.0.0.1', api.port, timeout=5)
+    connection.request('GET', path, headers=headers or {})
+    response = connection.getresponse()
+    result = response.status, dict(response.getheaders()), response.read()
+    connection.close()
+    return result
+
+
+def test_area_payload(api):
+    status, headers, body = get(api, '/api/areas/Line-1')
+    assert status == 200
+    assert headers['ETag'] == 'W/"1"'
+    assert 25 <= float(headers['X-Snapshot-Age']) < 60
+    payload = json.loads(body)
+    assert payload['area'] == 'Line-1'
+    assert [line['line'] for line in payload['lines']] == ['Building', 'Curing']
+    assert payload['lines'][0]['rate'] == 0.5
+    assert payload['scans']['Building'] == [['SLV-1', '0:04:00']]
+
+
+def test_unchanged_version_is_not_modified(api):
+    _, headers, _ = get(api, '/api/areas/Line-1')
+    status, revalidated, body = get(api, '/api/areas/Line-1', {'If-None-Match': headers['ETag']})
+    assert (status, body) == (304, b'')
+    assert revalidated['ETag'] == headers['ETag']
+    assert 'X-Snapshot-Age' in revalidated
+    assert api.not_modified == 1
+
+
+def test_new_version_gets_a_new_body(api):
+    _, headers, _ = get(api, '/api/areas/Line-1')
+    api.current['snapshot'] = make_snapshot(2, built=7)
+    status, new_headers, body = get(api, '/api/areas/Line-1', {'If-None-Match': headers['ETag']})
+    assert status == 200
+    assert new_headers['ETag'] == 'W/"2"'
+    assert json.loads(body)['lines'][0]['built'] == 7
+
+
+def test_wall_and_area_list(api):
+    assert json.loads(get(api, '/api/areas')[2])['areas'] == ['Line-1', 'Line-2']
+    wall = json.loads(get(api, '/api/wall')[2])
+    assert [area['area'] for area in wall['areas']] == ['Line-1', 'Line-2']
+
+
+def test_large_bodies_are_gzipped(api):
+    api.current['snapshot'] = make_snapshot(3, areas=[f'Line-{n}' for n in range(40)])
+    status, headers, body = get(api, '/api/wall', {'Accept-Encoding': 'gzip'})
+    assert status == 200
+    assert headers['Content-Encoding'] == 'gzip'
+    assert len(json.loads(gzip.decompress(body))['areas']) == 40
+
+
+def test_unknown_paths(api):
+    assert get(api, '/api/areas/Nowhere')[0] == 404
+    assert get(api, '/elsewhere')[0] == 404
+
+
+@pytest.mark.parametrize('path', ['/', '/kiosk', '/kiosk/'])
+def test_kiosk_page_uses_root_relative_api_paths(api, path):
+    status, headers, body = get(api, path)
+    assert status == 200
+    assert headers['Content-Type'].startswith('text/html')
+    assert b"fetch('api/" not in body
+    assert b"'/api'" in body
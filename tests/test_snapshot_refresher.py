@@ -0,0 +1,40 @@
+import pandas as pd
+
+from snapshots import SnapshotRefresher
+
+KPI = pd.DataFrame({'Area': ['Line-1'], 'Line': ['Building'], 'Area_Line_Key': ['Line-1 - Building'], 'Sleeves Build': [1]})
+
+
+def scans_frame(names):
+    return pd.DataFrame({'Line Name': ['Line-1'] * len(names), 'Process': ['Building'] * len(names),
+                         'Sleeve Name': names, 'Time Taken': ['0:04:00'] * len(names)})
+
+
+def test_refresh_keeps_a_scan_pushed_while_it_fetched():
+    scans = ['SLV-1']
+    refresher = None
+
+    def push(name):
+        scans.append(name)
+        refresher.publish(lambda: (KPI, scans_frame(scans)))
+
+    def fetch():
+        scans.append('SLV-2') # Read from the sheet
+        push('SLV-3') # Pushed before this fetch installs its snapshot
+        return lambda: (KPI, scans_frame(scans))
+
+    refresher = SnapshotRefresher(fetch, max_age=0)
+    refresher.refresh_now()
+    assert refresher.current.scanned['Sleeve Name'].tolist() == ['SLV-1', 'SLV-2', 'SLV-3']
+
+
+def test_versions_only_change_with_the_content():
+    refresher = SnapshotRefresher(lambda: (KPI, scans_frame(['SLV-1'])), max_age=0)
+    first = refresher.refresh_now()
+    second = refresher.refresh_now()
+    assert (first.version, second.version) == (1, 1)
+    assert second.index is first.index
+
+    third = refresher.publish(lambda: (KPI, scans_frame(['SLV-1', 'SLV-2'])))
+    assert third.version == 2
+    assert third.fetched_at == second.fetched_at
@@ -0,0 +1,54 @@
+import pandas as pd
+
+from snapshots import Snapshot, SnapshotStore, compact_frame, content_hash
+
+
+def scanned_frame(count=50):
+    return pd.DataFrame({
+        'Line Name': ['Line-1', 'Line-2'] * (count // 2),
+        'Process': ['Building'] * count,
+        'Sleeve Name': [f'SLV-{n}' for n in range(count)],
+        'Time Taken': [f'0:{n // 60:02d}:{n % 60:02d}' for n in range(count)],
+    })
+
+
+def kpi_frame():
+    return pd.DataFrame({
+        'Area': ['Line-1', 'Line-1'], 'Line': ['Building', 'Curing'],
+        'Area_Line_Key': ['Line-1 - Building', 'Line-1 - Curing'],
+        'Planned Sleeves': [100, 80], 'Sleeves Build': [50, 20], 'Not Produced Sleeves': [50, 60],
+    })
+
+
+def test_compact_dtypes():
+    scanned = compact_frame(scanned_frame())
+    assert isinstance(scanned['Line Name'].dtype, pd.CategoricalDtype)
+    assert not isinstance(scanned['Time Taken'].dtype, pd.CategoricalDtype)
+    assert scanned['Time Taken'].tolist() == scanned_frame()['Time Taken'].tolist()
+
+    kpi = compact_frame(kpi_frame())
+    assert kpi['Planned Sleeves'].dtype == 'int8'
+    assert kpi['Area_Line_Key'].tolist() == ['Line-1 - Building', 'Line-1 - Curing']
+
+
+def test_stored_categorical_durations_come_back_as_strings():
+    old = compact_frame(scanned_frame()).astype({'Time Taken': 'category'})
+    assert not isinstance(compact_frame(old)['Time Taken'].dtype, pd.CategoricalDtype)
+
+
+def test_compaction_keeps_the_content_hash_stable():
+    first = content_hash(compact_frame(kpi_frame()), compact_frame(scanned_frame()))
+    again = content_hash(compact_frame(compact_frame(kpi_frame())), compact_frame(compact_frame(scanned_frame())))
+    assert first == again
+
+
+def test_store_round_trip(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    kpi, scanned = compact_frame(kpi_frame()), compact_frame(scanned_frame())
+    store.save(Snapshot(kpi, scanned, fetched_at=1000.0, version=3, content_hash=content_hash(kpi, scanned)))
+
+    loaded = store.load()
+    assert (loaded.version, loaded.fetched_at) == (3, 1000.0)
+    assert loaded.index.areas == ['Line-1']
+    assert loaded.scanned['Time Taken'].tolist() == scanned['Time Taken'].tolist()
+    assert content_hash(loaded.kpi, loaded.scanned) == loaded.content_hash
@@ -0,0 +1,54 @@
+import pandas as pd
+
+from snapshots import SnapshotIndex
+from wall_view import format_production_rate, wall_grid_html
+
+
+def kpi(*rows):
+    return pd.DataFrame([
+        {'Area': area, 'Line': line, 'Planned Sleeves': planned, 'Sleeves Build': built,
+         'Not Produced Sleeves': planned - built, 'Production rate Display': round(built / planned, 3),
+         'Area_Line_Key': f"{area} - {line}"}
+        for area, line, planned, built in rows
+    ])
+
+
+class IndexWithoutLines:
+    areas = ['Line-5']
+
+    def area(self, area_name):
+        return kpi(('Line-1', 'Building', 1, 0)).iloc[0:0]
+
+
+def test_one_card_per_area():
+    index = SnapshotIndex(kpi(('Line-1', 'Building', 100, 50), ('Line-1', 'Curing', 80, 80), ('Line-2', 'Building', 10, 1)), pd.DataFrame())
+    grid = wall_grid_html(index, card_min_width=300)
+
+    assert 'minmax(300px, 1fr)' in grid
+    assert grid.count('class="wall-card"') == 2
+    assert '<tr><th>Building</th><td>100</td><td>50</td><td>50.0%</td><td>50</td></tr>' in grid
+    assert '<td>100%</td>' in grid
+
+
+def test_names_from_the_sheet_are_escaped():
+    index = SnapshotIndex(kpi(('<b>Line & "A"</b>', '<script>x</script>', 10, 5)), pd.DataFrame())
+    grid = wall_grid_html(index)
+
+    assert '<h4>&lt;b&gt;Line &amp; &quot;A&quot;&lt;/b&gt;</h4>' in grid
+    assert '<th>&lt;script&gt;x&lt;/script&gt;</th>' in grid
+    assert '<script>' not in grid and '<b>' not in grid
+
+
+def test_area_without_lines_gets_an_empty_card():
+    grid = wall_grid_html(IndexWithoutLines())
+    assert '<h4>Line-5</h4><table><tr><th></th><th>Target</th><th>Completed</th><th>Rate</th><th>Pending</th></tr></table>' in grid
+
+
+def test_no_areas():
+    assert wall_grid_html(SnapshotIndex(pd.DataFrame(), pd.DataFrame())).endswith('<div class="wall-grid"></div>')
+
+
+def test_format_production_rate():
+    assert format_production_rate(1.0) == '100%'
+    assert format_production_rate(0.9994) == '99.9%'
+    assert format_production_rate(1.25) == '125.0%'
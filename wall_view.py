@@ -0,0 +1,38 @@
+import html
+
+
+# "100%" for a finished line, otherwise one decimal place
+def format_production_rate(value):
+    return "100%" if value == 1.0 else f"{value:.1%}"
+
+
+def wall_css(card_min_width):
+    return f"""<style>
+.wall-grid {{ display: grid; grid-template-columns: repeat(auto-fill, minmax({card_min_width}px, 1fr)); gap: 10px; }}
+.wall-card {{ padding: 6px 12px; border: 1px solid #333; border-radius: 8px; }}
+.wall-card h4 {{ font-size: 24px; color: #fff; }}
+.wall-card table {{ width: 100%; border-collapse: collapse; }}
+.wall-card th, .wall-card td {{ padding: 2px 6px; text-align: right; border: none; color: #fff; }}
+.wall-card th {{ font-weight: normal; font-size: 14px; color: #aaa; }}
+.wall-card th:first-child {{ text-align: left; }}
+.wall-card td {{ font-size: 24px; font-weight: bold; }}
+</style>"""
+
+
+# Every area of a SnapshotIndex as one HTML grid of cards, a row per line:
+# Target / Completed / Rate / Pending. Area and line names come from the sheet
+# and are escaped; an area without lines gets a card with just the header row.
+def wall_grid_html(index, card_min_width=340):
+    cards = []
+    for area_name in index.areas:
+        rows = "".join(
+            f"<tr><th>{html.escape(str(row['Line']))}</th><td>{int(row['Planned Sleeves'])}</td>"
+            f"<td>{int(row['Sleeves Build'])}</td><td>{format_production_rate(row['Production rate Display'])}</td>"
+            f"<td>{int(row['Not Produced Sleeves'])}</td></tr>"
+            for row in index.area(area_name).to_dict('records')
+        )
+        cards.append(
+            f'<div class="wall-card"><h4>{html.escape(str(area_name))}</h4><table>'
+            f'<tr><th></th><th>Target</th><th>Completed</th><th>Rate</th><th>Pending</th></tr>{rows}</table></div>'
+        )
+    return f'{wall_css(card_min_width)}<div class="wall-grid">{"".join(cards)}</div>'